@@ -0,0 +1,39 @@
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+
+from ..models import Evidence
+
+
+class EvidenceSummarySerializer(serializers.ModelSerializer):
+    """One row of the evidence history.
+
+    Every field is a plain column, so views can load rows with
+    ``.only(*EvidenceSummarySerializer.Meta.fields)``; metadata, hashes
+    and location are left out.
+    """
+
+    class Meta:
+        model = Evidence
+        fields = ('id', 'title', 'image', 'image_hash', 'is_authentic', 'confidence',
+                  'metadata_status', 'status', 'model_version', 'created_at')
+        read_only_fields = fields
+
+
+class EvidenceDetailSerializer(EvidenceSummarySerializer):
+    """A single piece of evidence with its stored analysis document."""
+
+    class Meta(EvidenceSummarySerializer.Meta):
+        fields = EvidenceSummarySerializer.Meta.fields + ('address', 'address_pending', 'analysis')
+        read_only_fields = fields
+
+
+class EvidenceHistoryPagination(CursorPagination):
+    """Keyset pagination over (created_at, id), served by the (owner, -created_at, -id) index.
+
+    Each page is a ``WHERE created_at < <cursor> ... LIMIT n`` query, so its
+    cost stays the same however deep the client pages, unlike OFFSET.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
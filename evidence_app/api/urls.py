@@ -4,6 +4,16 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
     VerifyEvidence,
+    VerifyEvidenceBatch,
+    VerificationJobStatus,
+    EvidenceAddress,
+    EvidenceList,
+    EvidenceByHash,
+    EvidenceDetail,
+    EvidenceReport,
+    SimilarEvidence,
+    SimilarEvidenceSearch,
+    verify_evidence_asgi,
 
     register_user,
     login_user,
@@ -17,6 +27,16 @@ app_name = 'evidence_api'
 urlpatterns = [
     # Core Evidence API
     path('verify/', VerifyEvidence.as_view(), name='verify_evidence'),
+    path('verify/asgi/', verify_evidence_asgi, name='verify_evidence_asgi'),
+    path('verify/batch/', VerifyEvidenceBatch.as_view(), name='verify_evidence_batch'),
+    path('verify/jobs/<uuid:job_id>/', VerificationJobStatus.as_view(), name='verify_job_status'),
+    path('evidence/', EvidenceList.as_view(), name='evidence_list'),
+    path('evidence/by-hash/<str:image_hash>/', EvidenceByHash.as_view(), name='evidence_by_hash'),
+    path('evidence/<int:evidence_id>/', EvidenceDetail.as_view(), name='evidence_detail'),
+    path('evidence/<int:evidence_id>/report/', EvidenceReport.as_view(), name='evidence_report'),
+    path('evidence/<int:evidence_id>/address/', EvidenceAddress.as_view(), name='evidence_address'),
+    path('evidence/similar/', SimilarEvidenceSearch.as_view(), name='evidence_similar_search'),
+    path('evidence/<int:evidence_id>/similar/', SimilarEvidence.as_view(), name='evidence_similar'),
    
      path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
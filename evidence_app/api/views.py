@@ -1,6 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -10,25 +11,126 @@ from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse, FileResponse, Http404
-
-from ..models import Evidence
-from ..utils.ai_models import check_tampering
-from ..utils.metadata import verify_metadata
-from ..utils.imagehash import generate_sha256_hash
-from django.utils import timezone
-import datetime
-
-# Assuming this exists
+from django.http import JsonResponse, FileResponse, Http404, HttpResponse, StreamingHttpResponse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from ..models import Evidence, VerificationJob
+from .serializers import EvidenceDetailSerializer, EvidenceHistoryPagination, EvidenceSummarySerializer
+from ..utils.batch import ArchiveTooLarge, check_archives, iter_batch_files, verify_batch
+from ..utils.ingest import IngestedUpload
+from ..utils.ai_models import get_inference_stats
+from ..utils.jobs import enqueue_job
+from ..utils.metadata import full_exif_details
+from ..utils import metrics
+from ..utils.metrics import REQUEST_SECONDS, VERIFICATIONS, server_timing, stage
+from ..utils.persistence import ainsert_evidence, insert_evidence
+from ..utils.phash import hamming, perceptual_hashes, to_unsigned
+from ..utils.phash_index import find_similar
+from ..utils.pipeline import (
+    aanalyze_image, analysis_from_cache, analyze_image, apply_results, build_report, build_results, cacheable_analysis,
+    enrich_later, multicrop_requested, verdict_model_version,
+)
+from ..utils.preprocess import decode_for_model
+from ..utils.result_cache import get_cached_result, store_result
+from ..uploadhandlers import HashingUploadHandler
 
 import json
+import logging
 import os
+import re
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+
+class UploadRejected(APIException):
+    """An upload refused by HashingUploadHandler (too large, or not an image)."""
+
+    def __init__(self, status_code, detail):
+        self.status_code = status_code
+        super().__init__(detail)
+
+
+def verify_upload_limits():
+    """(max bytes per file, max bytes per request body) for single-image uploads."""
+    limit = getattr(settings, 'VERIFY_UPLOAD_MAX_BYTES', 50 * 1024 * 1024)
+    return limit, limit + 64 * 1024  # room for the multipart framing and form fields
+
+
+class HashedUploadMixin:
+    # Multipart fields holding zip archives rather than images
+    archive_fields = ()
+
+    def upload_limits(self):
+        """(max bytes per file, max bytes per request body)."""
+        return verify_upload_limits()
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Hash, size-check and sniff uploads while Django streams them to disk
+        max_file_size, max_request_size = self.upload_limits()
+        self.upload_handler = HashingUploadHandler(
+            request,
+            max_file_size=max_file_size,
+            max_request_size=max_request_size,
+            archive_fields=self.archive_fields,
+        )
+        request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Parse the body once the caller is authenticated, so a refused upload fails here
+        request.FILES
+        if self.upload_handler.rejection is not None:
+            raise UploadRejected(*self.upload_handler.rejection)
 
 
-class VerifyEvidence(APIView):
+class ServerTimingMixin:
+    """Per-stage ``Server-Timing`` header and request latency histogram for the verify endpoints.
+
+    Views add their stages to ``self.timings``; the upload and hash stages
+    come from the upload handler.
+    """
+    timing_endpoint = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.request_started = time.perf_counter()
+        self.timings = {}
+        return super().initialize_request(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        elapsed = time.perf_counter() - self.request_started
+        REQUEST_SECONDS.observe(elapsed, self.timing_endpoint)
+        handler = getattr(self, 'upload_handler', None)
+        timings = dict(handler.timings if handler is not None else {}, **self.timings)
+        response['Server-Timing'] = server_timing(timings, elapsed * 1000.0)
+        return response
+
+
+class VerifyEvidence(ServerTimingMixin, HashedUploadMixin, APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    timing_endpoint = 'verify'
+
+    def wants_async(self, request):
+        flag = request.query_params.get('async')
+        if flag is None:
+            return getattr(settings, 'VERIFY_ASYNC', False)
+        return flag.lower() in ('1', 'true', 'yes')
+
+    def wants_full_details(self, request):
+        return request.query_params.get('details') == 'full'
+
+    def wants_multicrop(self, request):
+        return multicrop_requested(request.query_params.get('multicrop'))
 
     def post(self, request):
         try:
@@ -36,56 +138,443 @@ class VerifyEvidence(APIView):
             if not image_file:
                 return Response({'detail': 'No image provided'}, status=400)
 
-            evidence = Evidence(image=image_file)
-            evidence.save()
-
-            img_path = evidence.image.path
             original_filename = image_file.name
 
-            # Log path to confirm image is saved
-            print("[DEBUG] Saved image path:", img_path)
-
-            # AI + Metadata
-            label, confidence = check_tampering(img_path)
-            print("[DEBUG] AI Label:", label, "| Confidence:", confidence)
-
-            metadata = verify_metadata(img_path)
-            print("[DEBUG] Metadata:", metadata)
-
-            readable_time = timezone.now().strftime("%B %d, %Y at %I:%M %p")
-
-            hash_value = generate_sha256_hash(img_path)
-            if not hash_value:
-                return Response({'error': 'Hashing failed'}, status=500)
-
-            # Save Results
-            evidence.is_authentic = (label == 'Real')
-            evidence.confidence = float(confidence)
-            evidence.metadata_status = metadata['status']
-            evidence.image_hash = hash_value
-            evidence.save()
-
-            results = {
-                'id': evidence.id,
-                'image_url': evidence.image.url,
-                'is_authentic': evidence.is_authentic,
-                'confidence': evidence.confidence,
-                'metadata_status': metadata['status'],
-                'metadata_details': metadata.get('details', {}),
-                'metadata_device': metadata.get('device'),  # Add this
-                'metadata_location': metadata.get('address'),  # Add this
-                'image_hash': hash_value,
-                'filename': original_filename, 
-                'timestamp': readable_time,
-            }
-            print("[DEBUG] Response payload:", results)
+            upload = IngestedUpload(image_file)
+            try:
+                hash_value = upload.sha256
+                multicrop = self.wants_multicrop(request)
+                version = verdict_model_version(multicrop)
+
+                # Re-uploaded exhibit: reuse the stored verdict for this digest + model version
+                cached = get_cached_result(hash_value, version)
+                if cached is None and self.wants_async(request):
+                    upload.close()
+                    return self.enqueue(request, image_file, hash_value, multicrop)
+
+                timings = self.timings
+                timings.update(self.upload_handler.timings)
+                if cached is not None:
+                    label, confidence, metadata, hashes, summary = analysis_from_cache(cached)
+                else:
+                    # AI + Metadata, from the single read done by the ingest stage
+                    label, confidence, metadata, hashes, summary = analyze_image(
+                        upload.image, upload.exif, timings, multicrop,
+                    )
+            finally:
+                upload.close()
+
+            # Digest, verdict and analysis are all known: one INSERT writes the caller's own row
+            evidence = Evidence(image=image_file, image_hash=hash_value, owner=request.user)
+            apply_results(evidence, label, confidence, metadata, hashes, timings, summary)
+            with stage('db', timings):
+                insert_evidence(evidence)
+            VERIFICATIONS.inc('cached' if cached is not None else label.lower())
+            logger.debug("Saved image: %s", evidence.image.name)
+
+            results = build_results(evidence, metadata, original_filename)
+            logger.debug("Response payload: %s", results)
+
+            if cached is not None:
+                results['cached'] = True
+            elif label != 'Error':
+                store_result(hash_value, cacheable_analysis(evidence), version)
+            enrich_later(evidence)
+
+            # Full tag dump is opt-in and never cached
+            if self.wants_full_details(request):
+                results = dict(results, metadata_details=full_exif_details(exif_bytes=upload.exif))
             return Response(results, status=200)
 
         except Exception as e:
-            import traceback
-            print("❌ ERROR in /api/verify:")
-            traceback.print_exc()
+            logger.exception("Error in /api/verify")
+            return Response({'error': str(e)}, status=500)
+
+    def enqueue(self, request, image_file, hash_value, multicrop=False):
+        """Store the upload as pending Evidence, queue a job and answer 202 straight away."""
+        evidence = Evidence(image=image_file, image_hash=hash_value, owner=request.user,
+                            status=Evidence.STATUS_PENDING)
+        with stage('db', self.timings), transaction.atomic():
+            insert_evidence(evidence)
+            job = VerificationJob.objects.create(evidence=evidence, filename=image_file.name, multicrop=multicrop)
+            # Workers must not see the job before its Evidence row is committed
+            transaction.on_commit(lambda: enqueue_job(job))
+        VERIFICATIONS.inc('queued')
+
+        return Response({
+            'job_id': str(job.id),
+            'id': evidence.id,
+            'status': job.status,
+            'status_url': request.build_absolute_uri(
+                reverse('evidence_api:verify_job_status', args=[job.id])
+            ),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+
+def _read_verify_upload(request):
+    """Sync half of verify_evidence_asgi: parse the multipart body and open the image.
+
+    Returns (upload handler, IngestedUpload or None).
+    """
+    handler = HashingUploadHandler(request, *verify_upload_limits())
+    request.upload_handlers = [handler]
+    image_file = request.FILES.get('image')
+    if handler.rejection is not None or image_file is None:
+        return handler, None
+    return handler, IngestedUpload(image_file)
+
+
+async def _verify_asgi(request, timings):
+    try:
+        auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({'detail': e.detail}, status=401)
+    if auth is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    user = auth[0]
+
+    handler, upload = await sync_to_async(_read_verify_upload)(request)
+    timings.update(handler.timings)
+    if handler.rejection is not None:
+        status_code, detail = handler.rejection
+        return JsonResponse({'detail': detail}, status=status_code)
+    if upload is None:
+        return JsonResponse({'detail': 'No image provided'}, status=400)
+
+    full_details = request.GET.get('details') == 'full'
+    multicrop = multicrop_requested(request.GET.get('multicrop'))
+    version = verdict_model_version(multicrop)
+    try:
+        cached = await sync_to_async(get_cached_result)(upload.sha256, version)
+        if cached is not None:
+            label, confidence, metadata, hashes, summary = analysis_from_cache(cached)
+        else:
+            label, confidence, metadata, hashes, summary = await aanalyze_image(
+                upload.image, upload.exif, timings, multicrop,
+            )
+        upload.close()
+
+        evidence = Evidence(image=upload.file, image_hash=upload.sha256, owner=user)
+        apply_results(evidence, label, confidence, metadata, hashes, timings, summary)
+        with stage('db', timings):
+            await ainsert_evidence(evidence)
+        VERIFICATIONS.inc('cached' if cached is not None else label.lower())
+
+        results = build_results(evidence, metadata, upload.name)
+        if cached is not None:
+            results['cached'] = True
+        elif label != 'Error':
+            await sync_to_async(store_result)(upload.sha256, cacheable_analysis(evidence), version)
+        enrich_later(evidence)
+
+        if full_details:
+            results = dict(results, metadata_details=await sync_to_async(full_exif_details)(exif_bytes=upload.exif))
+        return JsonResponse(results)
+
+    except Exception as e:
+        logger.exception("Error in /api/verify/asgi")
+        return JsonResponse({'error': str(e)}, status=500)
+    finally:
+        upload.close()
+
+
+@csrf_exempt
+@require_POST
+async def verify_evidence_asgi(request):
+    """POST /api/verify/asgi/: the verify endpoint as a native coroutine, for ASGI servers.
+
+    Under uvicorn the server buffers the request body before the view
+    runs, so a slow client costs a waiting coroutine rather than a worker
+    thread. Parsing the multipart body and the pipeline's CPU stages run in
+    threads, the geocode is an async HTTP request, and the Evidence row is
+    written through the async ORM.
+
+    Same request and response as /api/verify/, minus ``?async=1`` jobs:
+    this endpoint doesn't hold a worker while it waits anyway.
+    """
+    started = time.perf_counter()
+    timings = {}
+    response = await _verify_asgi(request, timings)
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, 'verify_asgi')
+    response['Server-Timing'] = server_timing(timings, elapsed * 1000.0)
+    return response
+
+class VerifyEvidenceBatch(ServerTimingMixin, HashedUploadMixin, APIView):
+    """Verify many images in one request: repeated 'images' files and/or a zip 'archive'.
+
+    Results come back as one JSON document, or as NDJSON (one line per image,
+    sent as each batch finishes) with ?stream=true or Accept: application/x-ndjson.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    archive_fields = ('archive',)
+    timing_endpoint = 'verify_batch'
+
+    def upload_limits(self):
+        return (getattr(settings, 'VERIFY_UPLOAD_MAX_BYTES', 50 * 1024 * 1024),
+                getattr(settings, 'BATCH_UPLOAD_MAX_BYTES', 500 * 1024 * 1024))
+
+    def wants_stream(self, request):
+        if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return True
+        return 'application/x-ndjson' in request.META.get('HTTP_ACCEPT', '')
+
+    def ndjson_lines(self, results):
+        """Streamed body; a failure part-way ends it with an {"error": ...} line, never a silent cut."""
+        try:
+            for item in results:
+                yield json.dumps(item) + '\n'
+        except Exception as e:
+            if not isinstance(e, ArchiveTooLarge):
+                logger.exception("Error in /api/verify/batch")
+            yield json.dumps({'error': str(e)}) + '\n'
+
+    def post(self, request):
+        files = request.FILES.getlist('images')
+        archives = request.FILES.getlist('archive')
+        if not files and not archives:
+            return Response({'detail': 'No images provided'}, status=400)
+
+        try:
+            total = len(files) + check_archives(archives)
+        except zipfile.BadZipFile:
+            return Response({'detail': 'Invalid zip archive'}, status=400)
+        except ArchiveTooLarge as e:
+            return Response({'detail': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        limit = getattr(settings, 'BATCH_VERIFY_MAX_ITEMS', 500)
+        if total > limit:
+            return Response({'detail': f'Batch is limited to {limit} images'}, status=400)
+
+        results = verify_batch(iter_batch_files(files, archives), owner=request.user)
+        if self.wants_stream(request):
+            return StreamingHttpResponse(self.ndjson_lines(results), content_type='application/x-ndjson')
+
+        try:
+            results = list(results)
+        except ArchiveTooLarge as e:
+            return Response({'detail': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except Exception as e:
+            logger.exception("Error in /api/verify/batch")
             return Response({'error': str(e)}, status=500)
+        return Response({'count': len(results), 'results': results}, status=200)
+
+
+class EvidenceAddress(APIView):
+    """Lightweight poll for an address being resolved in the background."""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, evidence_id):
+        evidence = (Evidence.objects
+                    .filter(pk=evidence_id, owner=request.user)
+                    .values('id', 'latitude', 'longitude', 'address', 'address_pending')
+                    .first())
+        if evidence is None:
+            return Response({'detail': 'Evidence not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(evidence, status=status.HTTP_200_OK)
+
+
+class EvidenceHistoryMixin:
+    """Owner-scoped, newest-first evidence listing with cursor pagination."""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def history_queryset(self, request):
+        return (Evidence.objects
+                .filter(owner=request.user)
+                .only(*EvidenceSummarySerializer.Meta.fields))
+
+    def paginated_response(self, request, queryset, **extra):
+        paginator = EvidenceHistoryPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = EvidenceSummarySerializer(page, many=True, context={'request': request})
+        return Response(dict(extra, **paginator.get_paginated_response(serializer.data).data))
+
+
+class EvidenceList(EvidenceHistoryMixin, APIView):
+    """The caller's evidence, newest first; filter with ?is_authentic= and ?status=, page with ?cursor=."""
+
+    def get(self, request):
+        queryset = self.history_queryset(request)
+
+        is_authentic = request.query_params.get('is_authentic')
+        if is_authentic is not None:
+            if is_authentic.lower() not in ('true', 'false', '1', '0'):
+                return Response({'detail': 'is_authentic must be true or false'}, status=400)
+            queryset = queryset.filter(is_authentic=is_authentic.lower() in ('true', '1'))
+
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+
+        return self.paginated_response(request, queryset)
+
+
+class EvidenceByHash(EvidenceHistoryMixin, APIView):
+    """Has this exact file been verified before? Looks up the caller's evidence by SHA-256."""
+
+    SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+    def get(self, request, image_hash):
+        image_hash = image_hash.lower()
+        if not self.SHA256_RE.match(image_hash):
+            return Response({'detail': 'Expected a hex SHA-256 digest'}, status=400)
+
+        queryset = self.history_queryset(request).filter(image_hash=image_hash)
+        return self.paginated_response(request, queryset, image_hash=image_hash)
+
+
+class EvidenceDetail(APIView):
+    """One piece of the caller's evidence, with the analysis stored when it was verified."""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, evidence_id):
+        evidence = (Evidence.objects
+                    .filter(pk=evidence_id, owner=request.user)
+                    .only(*EvidenceDetailSerializer.Meta.fields)
+                    .first())
+        if evidence is None:
+            return Response({'detail': 'Evidence not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(EvidenceDetailSerializer(evidence, context={'request': request}).data)
+
+
+class EvidenceReport(APIView):
+    """Verification report built from the stored analysis; never re-reads the image."""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, evidence_id):
+        evidence = (Evidence.objects
+                    .filter(pk=evidence_id, owner=request.user)
+                    .only('id', 'title', 'image', 'image_hash', 'created_at', 'address_pending', 'analysis')
+                    .first())
+        if evidence is None:
+            return Response({'detail': 'Evidence not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not evidence.analysis:
+            return Response({'detail': 'Evidence has no stored analysis yet'}, status=status.HTTP_409_CONFLICT)
+        return Response(build_report(evidence), status=status.HTTP_200_OK)
+
+
+class NearDuplicateMixin:
+    """Shared response for the near-duplicate (perceptual hash) searches."""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    # Probe cost grows quickly with the radius (see MultiIndexHashTable)
+    MAX_SEARCH_DISTANCE = 16
+    # Matches looked up per query while filtering them down to the caller's
+    LOOKUP_CHUNK = 500
+
+    def search_params(self, request):
+        default = getattr(settings, 'PHASH_MAX_DISTANCE', 10)
+        try:
+            max_distance = int(request.query_params.get('max_distance', default))
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return None
+        if not 0 <= max_distance <= self.MAX_SEARCH_DISTANCE or limit < 1:
+            return None
+        return max_distance, min(limit, 100)
+
+    def similar_response(self, request, phash, dhash, exclude=None):
+        params = self.search_params(request)
+        if params is None:
+            return Response(
+                {'detail': f'max_distance must be 0-{self.MAX_SEARCH_DISTANCE} and limit positive'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_distance, limit = params
+
+        # The index covers everyone's evidence: only the caller's rows are
+        # returned, so the limit is applied after the owner filter.
+        matches = find_similar(phash, max_distance, exclude=exclude)
+        owned = Evidence.objects.filter(owner=request.user).only(
+            'id', 'image', 'image_hash', 'is_authentic', 'confidence', 'dhash',
+        )
+
+        results = []
+        for start in range(0, len(matches), self.LOOKUP_CHUNK):
+            if len(results) >= limit:
+                break
+            chunk = matches[start:start + self.LOOKUP_CHUNK]
+            rows = owned.in_bulk([pk for pk, _ in chunk])
+            for pk, distance in chunk:
+                evidence = rows.get(pk)
+                if evidence is None:
+                    continue  # someone else's, or deleted since it was indexed
+                results.append({
+                    'id': evidence.id,
+                    'distance': distance,
+                    'dhash_distance': hamming(dhash, evidence.dhash) if evidence.dhash is not None else None,
+                    'image_url': evidence.image.url if evidence.image else None,
+                    'image_hash': evidence.image_hash,
+                    'is_authentic': evidence.is_authentic,
+                    'confidence': evidence.confidence,
+                })
+                if len(results) == limit:
+                    break
+
+        return Response({
+            'phash': f'{to_unsigned(phash):016x}',
+            'max_distance': max_distance,
+            'count': len(results),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+class SimilarEvidenceSearch(NearDuplicateMixin, HashedUploadMixin, APIView):
+    """Find stored evidence that looks like an uploaded image (resized, re-saved, re-compressed copies)."""
+
+    def post(self, request):
+        image_file = request.FILES.get('image')
+        if not image_file:
+            return Response({'detail': 'No image provided'}, status=400)
+
+        try:
+            upload = IngestedUpload(image_file)
+            phash, dhash = perceptual_hashes(decode_for_model(upload.image))
+            upload.close()
+        except Exception:
+            return Response({'detail': 'Not a valid image'}, status=400)
+        return self.similar_response(request, phash, dhash)
+
+
+class SimilarEvidence(NearDuplicateMixin, APIView):
+    """Near-duplicates of an already verified piece of evidence."""
+
+    def get(self, request, evidence_id):
+        evidence = (Evidence.objects
+                    .filter(pk=evidence_id, owner=request.user)
+                    .values('phash', 'dhash')
+                    .first())
+        if evidence is None:
+            return Response({'detail': 'Evidence not found'}, status=status.HTTP_404_NOT_FOUND)
+        if evidence['phash'] is None:
+            return Response({'detail': 'Evidence has no perceptual hash yet'}, status=status.HTTP_409_CONFLICT)
+        return self.similar_response(request, evidence['phash'], evidence['dhash'], exclude=evidence_id)
+
+
+class VerificationJobStatus(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = VerificationJob.objects.get(pk=job_id, evidence__owner=request.user)
+        except VerificationJob.DoesNotExist:
+            return Response({'detail': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'job_id': str(job.id),
+            'id': job.evidence_id,
+            'status': job.status,
+            'result': job.result,
+            'error': job.error or None,
+        }, status=status.HTTP_200_OK)
 
 
 @csrf_exempt
@@ -179,3 +668,26 @@ class RegisterView(APIView):
             return Response({"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def metrics_view(request):
+    """Prometheus scrape endpoint.
+
+    Metrics are kept per process: under gunicorn each scrape reports the
+    worker that served it. With METRICS_TOKEN set, scrapers must send it
+    as a bearer token. Without one the endpoint is only open with DEBUG on,
+    or to a logged-in staff user.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        if request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+            return HttpResponse(status=401)
+    elif not settings.DEBUG and not request.user.is_staff:
+        return HttpResponse(status=403)
+
+    gauges = {}
+    try:
+        stats = get_inference_stats()
+        gauges['evidence_inference_queue_depth'] = ('Images waiting for the model.', stats['queue_depth'])
+        gauges['evidence_inference_avg_batch_size'] = ('Mean images per model call.', stats.get('avg_batch_size', 0.0))
+    except Exception:
+        logger.exception("Reading inference stats failed")
+    return HttpResponse(metrics.render(gauges), content_type=metrics.CONTENT_TYPE)
@@ -1,6 +1,22 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class EvidenceAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'evidence_app'
+
+    def ready(self):
+        # Upload staging dir (inside MEDIA_ROOT by default); Django's checks expect it to exist
+        if settings.FILE_UPLOAD_TEMP_DIR:
+            os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+
+        # Load the model and trace the predict graph once per worker, before
+        # the first request, instead of on the first verify call. Under
+        # INFERENCE_PRELOAD the app is loaded in the gunicorn master, and its
+        # hooks decide what to warm before and after forking.
+        if getattr(settings, 'INFERENCE_WARMUP', False) and not getattr(settings, 'INFERENCE_PRELOAD', False):
+            from .utils.ai_models import warmup_model
+            warmup_model()
@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+
+
+def timed(fn, iterations, warmup=0):
+    """Call ``fn`` ``warmup + iterations`` times and return the timed durations in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def summarize(samples):
+    """p50/p99/mean summary (milliseconds) of a list of latency samples."""
+    samples = np.asarray(samples, dtype=np.float64)
+    return {
+        'n': int(samples.size),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p99_ms': float(np.percentile(samples, 99)),
+    }
+
+
+def environment():
+    """Where and on what a result was measured, so runs can be compared across commits."""
+    import datetime
+    import os
+    import platform
+    import subprocess
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'measured_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+# Result keys compared by compare(); lower is better for all but throughput
+COMPARED_KEYS = ('mean_ms', 'p50_ms', 'p99_ms', 'per_image_ms', 'mb_per_s', 'throughput_rps')
+
+
+def compare(baseline, current, path=''):
+    """{dotted.key: {baseline, current, change_pct}} for every timing present in both results."""
+    changes = {}
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        dotted = f'{path}.{key}' if path else key
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            changes.update(compare(baseline[key], value, dotted))
+        elif key in COMPARED_KEYS and isinstance(value, (int, float)) and baseline[key]:
+            changes[dotted] = {
+                'baseline': baseline[key],
+                'current': value,
+                'change_pct': (value - baseline[key]) / baseline[key] * 100.0,
+            }
+    return changes
@@ -0,0 +1,67 @@
+import glob
+import os
+import tempfile
+
+import exifread
+from PIL import Image
+
+from . import summarize, timed
+
+
+def make_phone_jpeg(path, size=(4000, 3000)):
+    """JPEG with the EXIF a phone writes: make/model, timestamps, GPS and a large MakerNote."""
+    exif = Image.Exif()
+    exif[0x010F] = 'samsung'
+    exif[0x0110] = 'SM-G991B'
+    exif[0x0131] = 'G991BXXU5CVF1'
+    exif_ifd = exif.get_ifd(0x8769)
+    exif_ifd[0x9003] = '2024:03:14 15:09:26'
+    exif_ifd[0x9004] = '2024:03:14 15:09:26'
+    exif_ifd[0x927C] = os.urandom(24 * 1024)  # MakerNote blob
+    exif[0x8825] = {1: 'N', 2: (5.0, 57.0, 48.5), 3: 'E', 4: (10.0, 9.0, 12.25)}
+
+    img = Image.effect_noise(size, 64).convert('RGB')
+    img.save(path, 'JPEG', quality=90, exif=exif.tobytes())
+
+
+def run(iterations=20, corpus=None, **options):
+    """EXIF extraction time per image: full exifread dump vs the targeted IFD walker.
+
+    Pass ``corpus`` (a directory of real phone JPEGs) to measure those;
+    otherwise a few synthetic phone-like JPEGs are generated.
+    """
+    from ..utils.metadata import verify_metadata
+
+    def legacy(path):
+        with open(path, 'rb') as f:
+            tags = exifread.process_file(f)
+        return {k: str(v) for k, v in tags.items()}
+
+    def targeted(path):
+        return verify_metadata(path, resolve_address=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if corpus:
+            paths = sorted(glob.glob(os.path.join(corpus, '*.jp*g')) + glob.glob(os.path.join(corpus, '*.JP*G')))
+        else:
+            paths = []
+            for i in range(3):
+                path = os.path.join(tmp, f'phone_{i}.jpg')
+                make_phone_jpeg(path)
+                paths.append(path)
+
+        if not paths:
+            return {'error': f'No JPEGs found in {corpus}'}
+
+        def run_all(fn):
+            return lambda: [fn(p) for p in paths]
+
+        per_image = len(paths)
+        legacy_ms = [t / per_image for t in timed(run_all(legacy), iterations, warmup=1)]
+        targeted_ms = [t / per_image for t in timed(run_all(targeted), iterations, warmup=1)]
+
+    return {
+        'images': per_image,
+        'legacy_exifread_full': summarize(legacy_ms),
+        'targeted_ifd_walk': summarize(targeted_ms),
+    }
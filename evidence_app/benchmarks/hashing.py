@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+from . import summarize, timed
+
+# Evidence file sizes: a phone JPEG, a large TIFF, a RAW-sized file
+SIZES_MB = (4, 32, 128)
+
+
+def _throughput(summary, size_mb):
+    return dict(summary, mb_per_s=size_mb / (summary['p50_ms'] / 1000.0))
+
+
+def run(iterations=10, **options):
+    """SHA-256 throughput (MB/s) of the two hashing paths: a stored file, and an UploadedFile's chunks."""
+    from django.core.files.uploadedfile import TemporaryUploadedFile
+
+    from ..utils.imagehash import generate_sha256_hash, hash_uploaded_file
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in SIZES_MB:
+            path = os.path.join(tmp, f'{size_mb}mb.bin')
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size_mb * 1024 * 1024))
+
+            upload = TemporaryUploadedFile(f'{size_mb}mb.jpg', 'image/jpeg', size_mb * 1024 * 1024, None)
+            with open(path, 'rb') as f:
+                upload.write(f.read())
+            upload.seek(0)
+
+            try:
+                results[f'{size_mb}MB'] = {
+                    'file_path': _throughput(
+                        summarize(timed(lambda: generate_sha256_hash(path), iterations, warmup=1)), size_mb),
+                    'uploaded_file': _throughput(
+                        summarize(timed(lambda: hash_uploaded_file(upload), iterations, warmup=1)), size_mb),
+                }
+            finally:
+                upload.close()
+    return results
@@ -0,0 +1,43 @@
+import gc
+
+import numpy as np
+
+from . import summarize, timed
+
+
+def run(iterations=50, batch_sizes=(1, 8, 32), **options):
+    """Predict latency: per-call session teardown vs the persistent compiled graph, then per batch size.
+
+    Uses a randomly initialised copy of the production architecture so no
+    model download is needed; latency doesn't depend on the weights. Larger
+    batches run proportionally fewer iterations.
+    """
+    from tensorflow.keras import backend as K
+
+    from ..utils.ai_models import INPUT_SHAPE, build_model, make_predict_fn
+
+    model = build_model()
+    x = np.random.rand(1, *INPUT_SHAPE).astype(np.float32)
+
+    def legacy():
+        # Previous behaviour: predict, then drop graph state and collect.
+        model.predict(x, verbose=0)
+        K.clear_session()
+        gc.collect()
+
+    predict = make_predict_fn(model, 1)
+
+    def persistent():
+        predict(x)
+
+    results = {
+        'legacy_clear_session': summarize(timed(legacy, iterations, warmup=1)),
+        'persistent_compiled': summarize(timed(persistent, iterations, warmup=1)),
+    }
+
+    for batch_size in batch_sizes:
+        batch = np.random.rand(batch_size, *INPUT_SHAPE).astype(np.float32)
+        predict_batch = make_predict_fn(model, batch_size)
+        summary = summarize(timed(lambda: predict_batch(batch), max(3, iterations // batch_size), warmup=1))
+        results[f'batch_{batch_size}'] = dict(summary, per_image_ms=summary['p50_ms'] / batch_size)
+    return results
@@ -0,0 +1,236 @@
+import http.client
+import io
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+from PIL import Image
+
+from . import summarize
+
+# Synthetic evidence: no metadata at all, camera EXIF, and camera EXIF with a GPS fix
+VARIANTS = ('no_exif', 'exif', 'exif_gps')
+
+IMAGE_SIZE = (1600, 1200)
+
+
+def make_jpeg(variant, size=IMAGE_SIZE, seed=0):
+    """Distinct noisy JPEG bytes (so the result cache never hits), with the EXIF ``variant`` asks for."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    tile = rng.integers(0, 256, (h // 8, w // 8, 3), dtype=np.uint8)
+    img = Image.fromarray(tile).resize(size, Image.BILINEAR)
+
+    kwargs = {}
+    if variant != 'no_exif':
+        exif = Image.Exif()
+        exif[0x010F] = 'samsung'
+        exif[0x0110] = 'SM-G991B'
+        exif_ifd = exif.get_ifd(0x8769)
+        exif_ifd[0x9003] = '2024:03:14 15:09:26'
+        exif_ifd[0x9004] = '2024:03:14 15:09:26'
+        if variant == 'exif_gps':
+            exif[0x8825] = {1: 'N', 2: (5.0, 57.0, 48.5), 3: 'E', 4: (10.0, 9.0, 12.25)}
+        kwargs['exif'] = exif.tobytes()
+
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=90, **kwargs)
+    return buffer.getvalue()
+
+
+def parse_server_timing(header):
+    """{stage: ms} from a Server-Timing header."""
+    timings = {}
+    for entry in (header or '').split(','):
+        name, _, params = entry.strip().partition(';')
+        if params.startswith('dur='):
+            timings[name] = float(params[4:])
+    return timings
+
+
+class _ConstantBackend:
+    """Instant stand-in model, for measuring everything around inference."""
+
+    def predict(self, batch):
+        return np.full((len(batch), 1), 0.5, dtype=np.float32)
+
+
+class _KerasStandIn:
+    """The production architecture with random weights: real inference cost, no download."""
+
+    def __init__(self, batch_size):
+        from ..utils.ai_models import build_model, make_predict_fn
+        from ..utils.batching import batch_buckets
+        self.predict = make_predict_fn(build_model(), batch_size)
+        self.batch_sizes = batch_buckets(batch_size)
+
+
+def _drive(post, payloads, concurrency):
+    """POST every payload from ``concurrency`` threads; per-request (ms, status, stage timings)."""
+    def one(payload):
+        start = time.perf_counter()
+        status, server_timing = post(payload)
+        return (time.perf_counter() - start) * 1000.0, status, parse_server_timing(server_timing)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        records = list(pool.map(one, payloads))
+    return records, time.perf_counter() - start
+
+
+def _report(records, wall_seconds):
+    ok = [r for r in records if r[1] == 200]
+    stages = {}
+    for _, _, timings in ok:
+        for name, ms in timings.items():
+            stages.setdefault(name, []).append(ms)
+    return {
+        'requests': len(records),
+        'errors': len(records) - len(ok),
+        'throughput_rps': len(records) / wall_seconds,
+        'latency': summarize([r[0] for r in ok]) if ok else None,
+        'server_stages_mean_ms': {name: float(np.mean(v)) for name, v in stages.items()},
+    }
+
+
+def _http_poster(url, token, path):
+    import requests
+
+    endpoint = url.rstrip('/') + path
+    local = threading.local()
+
+    def post(payload):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            session.headers['Authorization'] = f'Bearer {token}'
+        response = session.post(endpoint, files={'image': ('evidence.jpg', payload, 'image/jpeg')})
+        return response.status_code, response.headers.get('Server-Timing')
+    return post
+
+
+def _trickle_poster(url, token, path, upload_seconds, pieces=20):
+    """POSTs whose body goes out in ``pieces`` over ``upload_seconds``, like a slow uplink."""
+    parts = urlsplit(url)
+    prefix = parts.path.rstrip('/')
+
+    def post(payload):
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="evidence.jpg"\r\n'
+                f'Content-Type: image/jpeg\r\n\r\n').encode() + payload + f'\r\n--{boundary}--\r\n'.encode()
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=600)
+        try:
+            connection.putrequest('POST', prefix + path)
+            connection.putheader('Authorization', f'Bearer {token}')
+            connection.putheader('Content-Type', f'multipart/form-data; boundary={boundary}')
+            connection.putheader('Content-Length', str(len(body)))
+            connection.endheaders()
+            step = -(-len(body) // pieces)
+            for offset in range(0, len(body), step):
+                connection.send(body[offset:offset + step])
+                time.sleep(upload_seconds / pieces)
+            response = connection.getresponse()
+            response.read()
+            return response.status, response.getheader('Server-Timing')
+        finally:
+            connection.close()
+    return post
+
+
+def _client_poster(token, path):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+
+    local = threading.local()
+
+    def post(payload):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.post(path, {
+            'image': SimpleUploadedFile('evidence.jpg', payload, content_type='image/jpeg'),
+        })
+        return response.status_code, response.get('Server-Timing')
+    return post
+
+
+def _run_in_process(payloads, concurrency, stand_in, path):
+    """Run against a throwaway test database and media dir, with a stand-in model."""
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from ..utils import ai_models
+    from ..utils.batching import InferenceBatcher
+
+    batch_size = 8
+    backend = _ConstantBackend() if stand_in == 'constant' else _KerasStandIn(batch_size)
+    saved_batcher = ai_models._batcher
+    ai_models._batcher = InferenceBatcher(backend.predict, max_batch_size=batch_size, max_wait_ms=5,
+                                          input_shape=ai_models.INPUT_SHAPE,
+                                          batch_sizes=getattr(backend, 'batch_sizes', None))
+
+    setup_test_environment()
+    old_db_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media,
+            FILE_UPLOAD_TEMP_DIR=os.path.join(media, '.uploads'),
+            RESULT_CACHE_ENABLED=False,
+            VERIFY_ASYNC=False,
+            GEOCODER_BACKEND='offline',  # no Nominatim traffic from a benchmark
+        ):
+            os.makedirs(os.path.join(media, '.uploads'))
+            user = User.objects.create_user('loadtest', password=None)
+            post = _client_poster(str(RefreshToken.for_user(user).access_token), path)
+            return {variant: _report(*_drive(post, items, concurrency)) for variant, items in payloads.items()}
+    finally:
+        connection.creation.destroy_test_db(old_db_name, verbosity=0)
+        teardown_test_environment()
+        ai_models._batcher = saved_batcher
+
+
+def run(iterations=50, concurrency=4, url=None, token=None, stand_in='keras', path='/api/verify/',
+        upload_seconds=0.0, **options):
+    """Load test of a verify endpoint (``path``) with synthetic JPEGs, per EXIF variant.
+
+    Without ``url`` requests go through Django's test client in this
+    process, against a throwaway test database, with a randomly initialised
+    stand-in model (``stand_in='constant'`` swaps in an instant one to time
+    everything but inference). With ``url`` they go over HTTP to a running
+    server, authenticated with ``token`` (a JWT access token).
+
+    ``upload_seconds`` trickles each body over that long, to measure how
+    many slow clients a deployment serves at once: run the same test
+    against gunicorn (/api/verify/) and uvicorn (/api/verify/asgi/) at a
+    high ``concurrency`` and compare throughput.
+
+    Each variant sends ``iterations`` distinct images; latencies are client
+    side, and the per-stage means come from the Server-Timing headers.
+    """
+    payloads = {
+        variant: [make_jpeg(variant, seed=v * 100000 + i) for i in range(iterations)]
+        for v, variant in enumerate(VARIANTS)
+    }
+
+    if url:
+        if not token:
+            return {'error': 'A JWT access token is required with url'}
+        if upload_seconds:
+            post = _trickle_poster(url, token, path, upload_seconds)
+        else:
+            post = _http_poster(url, token, path)
+        results = {variant: _report(*_drive(post, items, concurrency)) for variant, items in payloads.items()}
+    elif upload_seconds:
+        return {'error': 'upload_seconds needs a url: the test client sends bodies in one piece'}
+    else:
+        results = _run_in_process(payloads, concurrency, stand_in, path)
+
+    return dict(results, concurrency=concurrency, path=path, upload_seconds=upload_seconds,
+                target=url or f'in-process ({stand_in} stand-in model)')
@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+
+from . import summarize, timed
+
+
+def _popcount64(x):
+    """Bit count of each element of a uint64 array."""
+    return np.unpackbits(x.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+
+def run(iterations=50, size=300000, max_distance=10, **options):
+    """Perceptual hashing cost and near-duplicate lookup: multi-index table vs a NumPy linear scan.
+
+    ``size`` random 64-bit hashes stand in for the Evidence table; each
+    query is a stored hash with a few bits flipped.
+    """
+    from ..utils.phash import perceptual_hashes
+    from ..utils.phash_index import MultiIndexHashTable
+    from ..utils.preprocess import TARGET_SIZE
+
+    decoded = np.random.randint(0, 256, TARGET_SIZE + (3,), dtype=np.uint8)
+
+    values = [random.getrandbits(64) for _ in range(size)]
+    index = MultiIndexHashTable()
+    for key, value in enumerate(values):
+        index.add(key, value)
+    array = np.array(values, dtype=np.uint64)
+
+    queries = [values[random.randrange(size)] ^ (1 << random.randrange(64)) for _ in range(iterations)]
+    it = iter(queries * 2)
+
+    def linear():
+        q = next(it)
+        return np.nonzero(_popcount64(array ^ np.uint64(q)) <= max_distance)[0]
+
+    return {
+        'hash_224px': summarize(timed(lambda: perceptual_hashes(decoded), iterations, warmup=1)),
+        'multi_index_search': summarize(timed(lambda: index.search(next(it), max_distance), iterations)),
+        'linear_scan': summarize(timed(linear, iterations)),
+        'indexed_hashes': len(index),
+    }
@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+# Typical phone sensor resolutions (12, 24 and 50 MP)
+RESOLUTIONS = {
+    '12MP': (4000, 3000),
+    '24MP': (6000, 4000),
+    '50MP': (8160, 6120),
+}
+
+
+def make_photo(path, size):
+    """Write a noisy JPEG of ``size`` so the encoder can't compress it to nothing."""
+    w, h = size
+    tile = np.random.randint(0, 256, (h // 8, w // 8, 3), dtype=np.uint8)
+    Image.fromarray(tile).resize(size, Image.BILINEAR).save(path, 'JPEG', quality=92)
+
+
+def legacy_preprocess(path):
+    """Previous path: re-encode a 600x600 copy over the file, then reload it at 224x224."""
+    with Image.open(path) as img:
+        img = img.convert('RGB').resize((600, 600))
+        img.save(path)
+    with Image.open(path) as img:
+        img = img.convert('RGB').resize((224, 224), Image.NEAREST)
+        array = np.asarray(img, dtype=np.float32)[..., ::-1]
+    return array - np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB.
+
+    Prefers VmHWM, which (unlike ru_maxrss) is not inherited across exec,
+    so a freshly spawned process starts from its own baseline.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(variant, path, iterations, queue):
+    from ..utils.preprocess import preprocess
+
+    fn = preprocess if variant == 'in_memory' else legacy_preprocess
+    baseline_kb = peak_rss_kb()
+
+    samples = []
+    for _ in range(iterations):
+        # The legacy path destroys its input, so each run gets a fresh copy.
+        work = path + '.work.jpg'
+        shutil.copyfile(path, work)
+        start = time.perf_counter()
+        fn(work)
+        samples.append((time.perf_counter() - start) * 1000.0)
+        os.remove(work)
+
+    peak_kb = peak_rss_kb()
+    queue.put((samples, (peak_kb - baseline_kb) / 1024.0))
+
+
+def run(iterations=5, **options):
+    """Decode time and peak RSS growth of the legacy and in-memory preprocessing paths.
+
+    Each variant runs in its own process, so peak RSS reflects only that variant.
+    """
+    from . import summarize
+
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, size in RESOLUTIONS.items():
+            path = os.path.join(tmp, f'{label}.jpg')
+            make_photo(path, size)
+            results[label] = {'file_mb': os.path.getsize(path) / 1e6}
+
+            for variant in ('legacy', 'in_memory'):
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_measure, args=(variant, path, iterations, queue))
+                proc.start()
+                samples, peak_mb = queue.get()
+                proc.join()
+                results[label][variant] = dict(summarize(samples), peak_rss_growth_mb=peak_mb)
+    return results
@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from .preprocess import peak_rss_kb
+
+
+def memory_kb():
+    """Rss, Pss and private (unshared) memory of this process in KB, from smaps_rollup."""
+    fields = {'Rss': 0, 'Pss': 0, 'Private_Clean': 0, 'Private_Dirty': 0}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in fields:
+                    fields[key] = int(rest.split()[0])
+    except OSError:
+        fields['Rss'] = peak_rss_kb()
+    return {
+        'rss_kb': fields['Rss'],
+        'pss_kb': fields['Pss'],
+        'private_kb': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def _setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'evidence_authenticator.settings')
+    import django
+    django.setup()
+
+
+def _measure_setup(queue):
+    """What every process (migrate, admin commands, web workers) pays before doing any work."""
+    start = time.perf_counter()
+    _setup_django()
+    from django.urls import get_resolver
+    get_resolver().url_patterns  # imports every view module, like the system checks do
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    queue.put({
+        'setup_ms': elapsed_ms,
+        'peak_rss_mb': peak_rss_kb() / 1024.0,
+        'tensorflow_imported': 'tensorflow' in sys.modules,
+    })
+
+
+def _load_and_warm():
+    # A randomly initialised copy of the production architecture stands in for
+    # the downloaded weights; memory and timing don't depend on their values.
+    from ..utils import ai_models
+    if ai_models.get_backend_class().name == 'keras':
+        ai_models._model = ai_models.build_model()
+    ai_models.warmup_model()
+
+
+def _measure_workers(preload, workers, queue):
+    """Fork ``workers`` children the way gunicorn does, with or without the preload hook first."""
+    _setup_django()
+    from ..utils import ai_models
+
+    preloaded = False
+    if preload:
+        ai_models.download_model_if_needed = lambda: None  # the stand-in model needs no file
+        preloaded = ai_models.preload_inference()
+
+    results = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            start = time.perf_counter()
+            if not preloaded:
+                _load_and_warm()
+            ai_models.get_batcher().predict(np.zeros(ai_models.INPUT_SHAPE, dtype=np.float32))
+            report = {'first_predict_ms': (time.perf_counter() - start) * 1000.0, **memory_kb()}
+            os.write(write_fd, json.dumps(report).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as pipe:
+            results.append(json.loads(pipe.read() or b'{}'))
+        os.waitpid(pid, 0)
+
+    queue.put(results)
+
+
+def _in_fresh_process(target, *args):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=args + (queue,))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def run(iterations=3, workers=2, **options):
+    """Process startup cost and per-worker memory with and without preloading the model.
+
+    ``setup`` runs django.setup() plus the URLconf import in a fresh
+    interpreter. The worker variants fork ``workers`` children, each
+    running one prediction, after either doing nothing in the parent
+    (``load_in_worker``) or running the gunicorn preload hook there first
+    (``preload_in_master``). Private memory is what each extra worker
+    really costs; ``first_predict_ms`` is what a cold worker's first
+    request would wait.
+    """
+    from . import summarize
+
+    setups = [_in_fresh_process(_measure_setup) for _ in range(iterations)]
+    results = {
+        'setup': {
+            **summarize([s['setup_ms'] for s in setups]),
+            'peak_rss_mb': max(s['peak_rss_mb'] for s in setups),
+            'tensorflow_imported': any(s['tensorflow_imported'] for s in setups),
+        },
+    }
+
+    for variant, preload in (('load_in_worker', False), ('preload_in_master', True)):
+        children = _in_fresh_process(_measure_workers, preload, workers)
+        results[variant] = {
+            'first_predict_ms': summarize([c['first_predict_ms'] for c in children]),
+            'mean_rss_mb': float(np.mean([c['rss_kb'] for c in children])) / 1024.0,
+            'mean_pss_mb': float(np.mean([c['pss_kb'] for c in children])) / 1024.0,
+            'mean_private_mb': float(np.mean([c['private_kb'] for c in children])) / 1024.0,
+        }
+    return results
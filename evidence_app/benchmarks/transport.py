@@ -0,0 +1,50 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import summarize, timed
+
+
+class _ConstantBackend:
+    """Model stand-in that answers instantly, so only the transport is measured."""
+
+    def predict(self, batch):
+        return np.full((len(batch), 1), 0.5, dtype=np.float32)
+
+
+def run(iterations=200, concurrency=8, **options):
+    """Per-request cost of reaching the model in-process vs through the inference server socket.
+
+    Both paths go through an identical InferenceBatcher in front of an
+    instant "model", so the difference is the Unix-socket round trip
+    (header + raw 600 KB float32 tensor out, score back).
+    """
+    from ..utils.batching import InferenceBatcher
+    from ..utils.inference_server import INPUT_SHAPE, InferenceClient, InferenceServer
+
+    x = np.random.rand(*INPUT_SHAPE).astype(np.float32)
+    local = InferenceBatcher(_ConstantBackend().predict, max_batch_size=8, max_wait_ms=1, input_shape=INPUT_SHAPE)
+
+    socket_path = os.path.join(tempfile.mkdtemp(), 'inference.sock')
+    server = InferenceServer(socket_path, _ConstantBackend(), max_batch_size=8, max_wait_ms=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = InferenceClient(socket_path, connections=concurrency)
+
+    def concurrent(target):
+        # ``iterations`` requests from ``concurrency`` threads; ms per request
+        with ThreadPoolExecutor(concurrency) as pool:
+            return timed(lambda: list(pool.map(lambda _: target.predict(x), range(iterations))), 5, warmup=1)
+
+    try:
+        return {
+            'in_process': summarize(timed(lambda: local.predict(x), iterations, warmup=5)),
+            'socket': summarize(timed(lambda: client.predict(x), iterations, warmup=5)),
+            f'in_process_x{concurrency}_total': summarize(concurrent(local)),
+            f'socket_x{concurrency}_total': summarize(concurrent(client)),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from ...models import Evidence
+from ...utils.phash import perceptual_hashes, to_signed
+from ...utils.preprocess import decode_for_model
+
+
+class Command(BaseCommand):
+    help = "Compute perceptual hashes for evidence stored before near-duplicate search existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(Evidence.objects
+                         .filter(pk__gt=last_pk, phash__isnull=True)
+                         .exclude(image='')
+                         .order_by('pk')
+                         .only('id', 'image')[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            hashed = []
+            for evidence in batch:
+                try:
+                    with Image.open(evidence.image.path) as img:
+                        evidence.phash, evidence.dhash = (to_signed(h) for h in perceptual_hashes(decode_for_model(img)))
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Evidence {evidence.pk}: {e}")
+                    continue
+                hashed.append(evidence)
+
+            Evidence.objects.bulk_update(hashed, ['phash', 'dhash'])
+            done += len(hashed)
+            self.stdout.write(f"Hashed {done} evidence file(s)...")
+
+        self.stdout.write(f"Done: {done} hashed, {failed} failed.")
+        if done:
+            # Each process's near-duplicate index only scans rows newer than it has seen
+            self.stdout.write("Restart the web and job workers to include them in near-duplicate search.")
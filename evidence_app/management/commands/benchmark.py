@@ -0,0 +1,78 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import (
+    compare, environment, exif, hashing, inference, loadtest, phash, preprocess, startup, transport,
+)
+
+SUITES = {
+    'exif': exif.run,
+    'hash': hashing.run,
+    'inference': inference.run,
+    'loadtest': loadtest.run,
+    'phash': phash.run,
+    'preprocess': preprocess.run,
+    'startup': startup.run,
+    'transport': transport.run,
+}
+
+
+class Command(BaseCommand):
+    help = "Run a verify-pipeline benchmark suite and print latency percentiles as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=sorted(SUITES))
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--corpus', help="Directory of sample images, for suites that take one.")
+        parser.add_argument('--batch-sizes', default='1,8,32',
+                            help="Comma-separated batch sizes for the inference suite.")
+        parser.add_argument('--concurrency', type=int, default=4, help="Parallel clients (loadtest).")
+        parser.add_argument('--url', help="Base URL of a running server to load test, instead of in-process.")
+        parser.add_argument('--token', help="JWT access token for --url.")
+        parser.add_argument('--path', default='/api/verify/',
+                            help="Verify endpoint to load test, e.g. /api/verify/asgi/ under uvicorn.")
+        parser.add_argument('--upload-seconds', type=float, default=0.0,
+                            help="Spread each upload over this many seconds, like a slow client (--url only).")
+        parser.add_argument('--stand-in', choices=('keras', 'constant'), default='keras',
+                            help="In-process loadtest model: random-weight ResNet50, or an instant constant.")
+        parser.add_argument('--output', help="Also write the result (with environment info) to this JSON file.")
+        parser.add_argument('--compare', help="A previous --output file of the same suite to compare against.")
+
+    def handle(self, *args, **options):
+        suite = SUITES.get(options['suite'])
+        if suite is None:
+            raise CommandError(f"Unknown suite: {options['suite']}")
+
+        try:
+            batch_sizes = tuple(int(b) for b in options['batch_sizes'].split(','))
+        except ValueError:
+            raise CommandError("--batch-sizes must be comma-separated integers")
+
+        results = suite(
+            iterations=options['iterations'],
+            corpus=options['corpus'],
+            batch_sizes=batch_sizes,
+            concurrency=options['concurrency'],
+            url=options['url'],
+            token=options['token'],
+            path=options['path'],
+            upload_seconds=options['upload_seconds'],
+            stand_in=options['stand_in'],
+        )
+        document = {'suite': options['suite'], 'environment': environment(), 'results': results}
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            if baseline.get('suite') != options['suite']:
+                raise CommandError(f"{options['compare']} holds '{baseline.get('suite')}' results")
+            document['comparison'] = {
+                'baseline_commit': baseline.get('environment', {}).get('commit'),
+                'changes': compare(baseline['results'], results),
+            }
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(document, f, indent=2)
+        self.stdout.write(json.dumps(document, indent=2))
@@ -0,0 +1,194 @@
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils.batch import IMAGE_EXTENSIONS
+from ...utils.inference_backends import get_backend
+from ...utils.preprocess import preprocess
+
+FORMATS = ('tflite', 'onnx')
+
+
+def _image_paths(directory, limit=None):
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+    )
+    return paths[:limit] if limit else paths
+
+
+def _score(predict, batch_size, inputs):
+    """Run ``inputs`` through a fixed-batch predict fn, padding the last batch."""
+    scores = []
+    for start in range(0, len(inputs), batch_size):
+        chunk = inputs[start:start + batch_size]
+        padded = np.zeros((batch_size,) + chunk.shape[1:], dtype=np.float32)
+        padded[:len(chunk)] = chunk
+        scores.append(np.asarray(predict(padded)).reshape(batch_size, -1)[:len(chunk), 0])
+    return np.concatenate(scores)
+
+
+class Command(BaseCommand):
+    help = ("Convert the Keras .h5 model to TFLite and/or ONNX, optionally with INT8 "
+            "post-training quantization, and compare the result against Keras.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS + ('all',), default='tflite')
+        parser.add_argument('--model', help="Source .h5 (default: the downloaded production model).")
+        parser.add_argument('--output-dir', help="Write here instead of TFLITE_MODEL_PATH / ONNX_MODEL_PATH.")
+        parser.add_argument('--quantize', choices=('none', 'int8'), default='none',
+                            help="int8: static quantization with --calibration-dir, "
+                                 "dynamic-range (weights only) without it.")
+        parser.add_argument('--calibration-dir', help="Representative images for INT8 calibration.")
+        parser.add_argument('--calibration-samples', type=int, default=200)
+        parser.add_argument('--validation-dir',
+                            help="Directory with real/ and fake/ subfolders; reports accuracy vs Keras.")
+        parser.add_argument('--validation-samples', type=int, default=None,
+                            help="Cap on images per class.")
+        parser.add_argument('--batch-size', type=int, default=8,
+                            help="Batch size used for the validation comparison.")
+
+    def handle(self, *args, **options):
+        from ...utils.ai_models import download_model_if_needed, load_model_file
+
+        source = options['model'] or download_model_if_needed()
+        if not os.path.exists(source):
+            raise CommandError(f"Model file not found: {source}")
+
+        # load_model_file covers the weights-only fallback, so exports work for
+        # files that only hold weights for the known architecture.
+        model = load_model_file(source)
+
+        calibration = None
+        if options['quantize'] == 'int8' and options['calibration_dir']:
+            calibration = self._load_inputs(_image_paths(options['calibration_dir'], options['calibration_samples']))
+            if calibration is None:
+                raise CommandError("No usable calibration images found.")
+            self.stdout.write(f"Calibrating with {len(calibration)} image(s).")
+
+        formats = FORMATS if options['format'] == 'all' else (options['format'],)
+        exported = {}
+        for fmt in formats:
+            path = self._output_path(fmt, options['output_dir'])
+            export = self._export_tflite if fmt == 'tflite' else self._export_onnx
+            export(model, path, options['quantize'], calibration)
+            exported[fmt] = path
+            self.stdout.write(f"Wrote {fmt} model to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        if options['validation_dir']:
+            self._compare(model, exported, options)
+
+    def _load_inputs(self, paths):
+        """Preprocess images into one (N, 224, 224, 3) float32 array, skipping unreadable files."""
+        inputs = []
+        for path in paths:
+            try:
+                inputs.append(preprocess(path))
+            except Exception as e:
+                self.stderr.write(self.style.WARNING(f"Skipping {path}: {e}"))
+        return np.stack(inputs).astype(np.float32) if inputs else None
+
+    def _output_path(self, fmt, output_dir):
+        path = getattr(settings, 'TFLITE_MODEL_PATH' if fmt == 'tflite' else 'ONNX_MODEL_PATH')
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, os.path.basename(path))
+        return path
+
+    def _export_tflite(self, model, path, quantize, calibration):
+        import tensorflow as tf
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        if quantize == 'int8':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            if calibration is not None:
+                converter.representative_dataset = lambda: ([sample[np.newaxis]] for sample in calibration)
+                converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+                # Float in/out: the (de)quantize steps stay inside the graph.
+
+        with open(path, 'wb') as f:
+            f.write(converter.convert())
+
+    def _export_onnx(self, model, path, quantize, calibration):
+        import tensorflow as tf
+        try:
+            import tf2onnx
+        except ImportError as e:
+            raise CommandError("ONNX export needs the tf2onnx package.") from e
+
+        from ...utils.ai_models import INPUT_SHAPE
+
+        float_path = path if quantize == 'none' else path + '.float.onnx'
+        spec = (tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name='input'),)
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=17, output_path=float_path)
+        if quantize == 'none':
+            return
+
+        try:
+            from onnxruntime import quantization
+        except ImportError as e:
+            raise CommandError("ONNX quantization needs the onnxruntime package.") from e
+
+        if calibration is None:
+            quantization.quantize_dynamic(float_path, path, weight_type=quantization.QuantType.QInt8)
+        else:
+            class Reader(quantization.CalibrationDataReader):
+                def __init__(self):
+                    self.samples = iter(calibration)
+
+                def get_next(self):
+                    sample = next(self.samples, None)
+                    return None if sample is None else {'input': sample[np.newaxis]}
+
+            quantization.quantize_static(
+                float_path, path, Reader(),
+                activation_type=quantization.QuantType.QInt8,
+                weight_type=quantization.QuantType.QInt8,
+            )
+        os.remove(float_path)
+
+    def _compare(self, model, exported, options):
+        from ...utils.ai_models import make_predict_fn
+
+        limit = options['validation_samples']
+        inputs, labels = [], []
+        for label, folder in ((0, 'real'), (1, 'fake')):
+            directory = os.path.join(options['validation_dir'], folder)
+            if not os.path.isdir(directory):
+                raise CommandError(f"Missing validation folder: {directory}")
+            loaded = self._load_inputs(_image_paths(directory, limit))
+            if loaded is not None:
+                inputs.append(loaded)
+                labels.extend([label] * len(loaded))
+        if not inputs:
+            raise CommandError("No usable validation images found.")
+        inputs, labels = np.concatenate(inputs), np.array(labels)
+
+        batch_size = options['batch_size']
+        rows = [('keras', make_predict_fn(model, batch_size))]
+        rows += [(fmt, get_backend(fmt, batch_size=batch_size, model_path=path).predict)
+                 for fmt, path in exported.items()]
+
+        self.stdout.write(f"\nValidation: {len(labels)} image(s), {int(labels.sum())} fake")
+        self.stdout.write(f"{'backend':<8} {'accuracy':>9} {'delta':>8} {'mean |Δscore|':>14} "
+                          f"{'agreement':>10} {'ms/image':>9}")
+
+        reference = None
+        for name, predict in rows:
+            _score(predict, batch_size, inputs[:batch_size])  # warm up
+            start = time.perf_counter()
+            scores = _score(predict, batch_size, inputs)
+            ms_per_image = (time.perf_counter() - start) * 1000 / len(inputs)
+
+            accuracy = float(np.mean((scores > 0.5) == labels))
+            if reference is None:
+                reference = (scores, accuracy)
+            ref_scores, ref_accuracy = reference
+            self.stdout.write(
+                f"{name:<8} {accuracy:>9.4f} {accuracy - ref_accuracy:>+8.4f} "
+                f"{float(np.mean(np.abs(scores - ref_scores))):>14.5f} "
+                f"{float(np.mean((scores > 0.5) == (ref_scores > 0.5))):>10.4f} {ms_per_image:>9.2f}"
+            )
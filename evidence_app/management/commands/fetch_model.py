@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils import model_registry
+
+
+class Command(BaseCommand):
+    help = "Download (if needed) and verify the model artifact for MODEL_VERSION, e.g. at build time."
+
+    def handle(self, *args, **options):
+        try:
+            path = model_registry.fetch_model()
+        except model_registry.ModelArtifactError as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(f"{model_registry.current_model_version()}: {path} "
+                          f"(sha256 {model_registry.checksum(path)})")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ...utils import result_cache
+
+
+class Command(BaseCommand):
+    help = "Drop cached verification results from model versions other than MODEL_VERSION."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Also drop results for the current model version.")
+
+    def handle(self, *args, **options):
+        deleted = result_cache.invalidate(stale_only=not options['all'])
+        self.stdout.write(f"Removed {deleted} cached result(s).")
@@ -0,0 +1,51 @@
+import signal
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils.inference_backends import get_backend
+from ...utils.inference_server import INPUT_SHAPE, InferenceServer, InferenceServerError
+
+
+class Command(BaseCommand):
+    help = ("Load the model once and serve predictions to every web worker over a Unix socket "
+            "(point INFERENCE_SERVER_SOCKET at the same path).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=getattr(settings, 'INFERENCE_SERVER_SOCKET', None))
+        parser.add_argument('--backend', help="Inference backend (default: INFERENCE_BACKEND).")
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'INFERENCE_BATCH_SIZE', 8))
+        parser.add_argument('--batch-wait-ms', type=float, default=getattr(settings, 'INFERENCE_BATCH_WAIT_MS', 10))
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError("Pass --socket or set INFERENCE_SERVER_SOCKET.")
+
+        backend = get_backend(options['backend'], batch_size=options['batch_size'])
+        try:
+            server = InferenceServer(
+                options['socket'], backend,
+                max_batch_size=options['batch_size'],
+                max_wait_ms=options['batch_wait_ms'],
+            )
+        except InferenceServerError as e:
+            raise CommandError(str(e)) from e
+
+        # Trace the predict graph before the first client connects
+        server.batcher.predict(np.zeros(INPUT_SHAPE, dtype=np.float32))
+
+        def stop(signum, frame):
+            # shutdown() blocks until serve_forever() returns, so call it off the main thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Inference server listening on {options['socket']}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.stdout.write("Inference server stopped.")
@@ -0,0 +1,35 @@
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...utils import jobs
+
+
+def _worker_main(poll_interval):
+    jobs._init_worker_process()
+    jobs.run_worker(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Run a pool of processes that drain pending VerificationJobs (VERIFY_JOB_BROKER='db')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'VERIFY_JOB_WORKERS', 2))
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            jobs.run_worker(options['poll_interval'])
+            return
+
+        ctx = multiprocessing.get_context('spawn')
+        workers = [
+            ctx.Process(target=_worker_main, args=(options['poll_interval'],), daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} verification worker(s).")
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0003_remove_evidence_blockchain_hash_evidence_image_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_hash', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=64)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('image_hash', 'model_version'), name='unique_result_per_model')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0004_verificationresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='VerificationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('evidence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='evidence_app.evidence')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='evidence_ap_status_8480ec_idx')],
+            },
+        ),
+    ]
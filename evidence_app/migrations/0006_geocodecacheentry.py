@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0005_verification_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geohash', models.CharField(max_length=12, unique=True)),
+                ('address', models.TextField(blank=True, null=True)),
+                ('failed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
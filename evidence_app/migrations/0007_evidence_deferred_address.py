@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0006_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='address',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='address_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
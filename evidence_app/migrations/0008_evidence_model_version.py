@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0007_evidence_deferred_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
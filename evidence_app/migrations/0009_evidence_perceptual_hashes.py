@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0008_evidence_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='dhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='phash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
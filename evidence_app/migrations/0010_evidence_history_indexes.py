@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0009_evidence_perceptual_hashes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='evidence', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(fields=['image_hash'], name='evidence_ap_image_h_40db7d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='evidence_ap_owner_i_a04204_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(fields=['is_authentic'], name='evidence_ap_is_auth_148734_idx'),
+        ),
+    ]
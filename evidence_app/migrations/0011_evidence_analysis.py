@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0010_evidence_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='analysis',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
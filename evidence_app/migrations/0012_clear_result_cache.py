@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_cached_results(apps, schema_editor):
+    # Cached payloads used to be whole API responses, including the first
+    # uploader's Evidence id and file URL; they are rebuilt on the next miss.
+    apps.get_model('evidence_app', 'VerificationResult').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0011_evidence_analysis'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_cached_results, migrations.RunPython.noop),
+    ]
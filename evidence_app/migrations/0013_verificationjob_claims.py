@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0012_clear_result_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='verificationjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
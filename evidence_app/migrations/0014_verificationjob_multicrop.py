@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence_app', '0013_verificationjob_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationjob',
+            name='multicrop',
+            field=models.BooleanField(default=False),
+        ),
+    ]
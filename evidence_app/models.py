@@ -1,22 +1,88 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
-from .utils.imagehash import generate_sha256_hash  # ✅ Renamed utility function
+from django.utils import timezone
+
 
 class Evidence(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     title = models.CharField(max_length=255, default="Untitled")
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True,
+                              on_delete=models.SET_NULL, related_name='evidence')
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     image = models.ImageField(upload_to='evidence/')
     is_authentic = models.BooleanField(default=False)
     confidence = models.FloatField(default=0.0)
     metadata_status = models.CharField(max_length=100, blank=True)
     image_hash = models.CharField(max_length=256, null=True, blank=True)  # ✅ Just a hash now
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DONE)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    address = models.TextField(null=True, blank=True)  # filled in by background enrichment
+    address_pending = models.BooleanField(default=False)
+    model_version = models.CharField(max_length=64, blank=True)  # model that produced the verdict
+    phash = models.BigIntegerField(null=True, blank=True)  # 64-bit perceptual hashes (signed), see utils.phash
+    dhash = models.BigIntegerField(null=True, blank=True)
+    analysis = models.JSONField(default=dict, blank=True)  # full stored analysis, see pipeline.build_analysis
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['image_hash']),
+            # History listing: one user's evidence, newest first (id breaks ties)
+            models.Index(fields=['owner', '-created_at', '-id']),
+            models.Index(fields=['is_authentic']),
+        ]
+
+
+class VerificationResult(models.Model):
+    """Persistent tier of the verification result cache (see utils/result_cache.py)."""
+    image_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=64)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['image_hash', 'model_version'], name='unique_result_per_model'),
+        ]
+
+
+class VerificationJob(models.Model):
+    """A queued async verification; the table doubles as the local job broker."""
+    STATUS_CHOICES = Evidence.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    evidence = models.ForeignKey(Evidence, on_delete=models.CASCADE, related_name='jobs')
+    filename = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=Evidence.STATUS_PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # when a worker last took it, see utils/jobs.py
+    attempts = models.PositiveSmallIntegerField(default=0)
+    multicrop = models.BooleanField(default=False)  # the request's ?multicrop=, resolved when queued
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)  # Save image first to get the path
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
-        if is_new and self.image:
-            # ✅ Generate SHA256 hash for the image and store it
-            hash_value = generate_sha256_hash(self.image.path)
 
-            if hash_value:
-                self.image_hash = hash_value
-                super().save(update_fields=["image_hash"])
+class GeocodeCacheEntry(models.Model):
+    """Reverse-geocode result shared by all workers, keyed by geohash cell (see utils/geocoding.py)."""
+    geohash = models.CharField(max_length=12, unique=True)
+    address = models.TextField(null=True, blank=True)
+    failed = models.BooleanField(default=False)  # negative entry: lookup errored
+    created_at = models.DateTimeField(db_index=True)
@@ -1,3 +1,452 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Evidence, VerificationJob
+from .utils import phash_index, result_cache
+from .utils.batch import ArchiveTooLarge, iter_archive
+from .utils.dag import Stage, StageTimeout, run_stages
+from .utils.enrichment import resume_stale_address_resolution
+from .utils.exif import parse_exif, read_exif_block
+from .utils.gazetteer import Gazetteer
+from .utils.ingest import IngestedUpload
+from .utils.jobs import claim_next_job, process_job
+from .utils.metadata import verify_metadata
+from .utils.multicrop import MULTICROP_VERSION_SUFFIX, STRIDE, TILE, prepare_crops, score_crops
+from .utils.pipeline import build_analysis
+from .utils.preprocess import pixels_to_model_input
+
+MEDIA_ROOT = tempfile.mkdtemp()
+UPLOAD_TEMP_DIR = os.path.join(MEDIA_ROOT, '.uploads')
+
+
+def jpeg_upload(name='evidence.jpg', color=(120, 30, 60)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def edited_upload(fmt, name):
+    exif = Image.Exif()
+    exif[0x0131] = 'Adobe Photoshop 25.0'  # Software
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (90, 90, 90)).save(buffer, fmt, exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def zip_upload(members, name='bundle.zip'):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for member_name, data in members.items():
+            zf.writestr(member_name, data)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='application/zip')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, FILE_UPLOAD_TEMP_DIR=UPLOAD_TEMP_DIR,
+                   VERIFY_ASYNC=False, RESULT_CACHE_ENABLED=False)
+@mock.patch('evidence_app.utils.pipeline.check_tampering', lambda image: ('Real', 0.9))
+class VerifyEvidenceWritesTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        user = User.objects.create_user(username='examiner', password='not-used')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def evidence_writes(self, queries):
+        return [q['sql'] for q in queries
+                if 'evidence_app_evidence' in q['sql']
+                and q['sql'].lstrip().split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+    def test_verify_writes_evidence_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/verify/', {'image': jpeg_upload()}, **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        writes = self.evidence_writes(queries)
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('INSERT'))
+
+        evidence = Evidence.objects.get(pk=response.json()['id'])
+        self.assertEqual(evidence.image_hash, response.json()['image_hash'])
+        self.assertTrue(evidence.is_authentic)
+        self.assertEqual(evidence.analysis['verdict']['label'], 'Real')
+
+    def test_failed_analysis_still_closes_the_upload(self):
+        with mock.patch('evidence_app.api.views.analyze_image', side_effect=RuntimeError('model down')), \
+                mock.patch.object(IngestedUpload, 'close', autospec=True) as close:
+            response = self.client.post('/api/verify/', {'image': jpeg_upload()}, **self.auth)
+
+        self.assertEqual(response.status_code, 500)
+        close.assert_called_once()
+        self.assertEqual(Evidence.objects.count(), 0)
+
+    async def test_asgi_verify_matches_sync_verify(self):
+        response = await self.async_client.post(
+            '/api/verify/asgi/', {'image': jpeg_upload()},
+            headers={'Authorization': self.auth['HTTP_AUTHORIZATION']},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('inference;dur=', response['Server-Timing'])
+        evidence = await Evidence.objects.aget(pk=response.json()['id'])
+        self.assertEqual(evidence.image_hash, response.json()['image_hash'])
+        self.assertEqual(evidence.analysis['verdict']['label'], 'Real')
+
+    def test_batch_writes_one_insert_per_chunk(self):
+        files = [jpeg_upload(f'{i}.jpg', (i * 40, 10, 10)) for i in range(3)]
+        with mock.patch('evidence_app.utils.batch.check_tampering_many',
+                        lambda images: [('Fake', 0.8)] * len(images)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/verify/batch/', {'images': files}, **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(len(self.evidence_writes(queries)), 1)
+        self.assertEqual(Evidence.objects.count(), 3)
+
+
+class IngestTest(SimpleTestCase):
+    def test_exif_is_read_from_jpeg_and_tiff(self):
+        for fmt, name in (('JPEG', 'edited.jpg'), ('TIFF', 'edited.tif')):
+            with self.subTest(fmt=fmt):
+                upload = IngestedUpload(edited_upload(fmt, name))
+                metadata = verify_metadata(exif_bytes=upload.exif, resolve_address=False)
+                upload.close()
+                self.assertEqual(metadata['status'], 'Photoshop detected')
+
+
+class ExifBlockTest(SimpleTestCase):
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix='.jpg')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_corrupt_segment_length_means_no_exif(self):
+        for length in (b'\x00\x00', b'\x00\x01'):
+            with self.subTest(length=length):
+                path = self.write(b'\xff\xd8\xff\xe1' + length + b'Exif\x00\x00' + b'\0' * 64)
+                self.assertIsNone(read_exif_block(path))
+
+    def test_truncated_app1_segment(self):
+        path = self.write(b'\xff\xd8\xff\xe1\x10\x00Exif\x00\x00II*\x00')
+        self.assertIsNone(parse_exif(read_exif_block(path)))
+
+
+def auth_for(username):
+    user = User.objects.create_user(username=username, password='not-used')
+    return user, {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, FILE_UPLOAD_TEMP_DIR=UPLOAD_TEMP_DIR,
+                   VERIFY_ASYNC=False, RESULT_CACHE_ENABLED=True)
+class ResultCacheTest(TestCase):
+    def setUp(self):
+        result_cache._memory.clear()
+        self.alice, self.alice_auth = auth_for('alice')
+        self.bob, self.bob_auth = auth_for('bob')
+
+    def test_cache_hit_by_another_user_gets_its_own_evidence(self):
+        with mock.patch('evidence_app.utils.pipeline.check_tampering', lambda image: ('Fake', 0.8)):
+            first = self.client.post('/api/verify/', {'image': jpeg_upload()}, **self.alice_auth).json()
+        with mock.patch('evidence_app.utils.pipeline.check_tampering') as model:
+            second = self.client.post('/api/verify/', {'image': jpeg_upload()}, **self.bob_auth).json()
+        model.assert_not_called()
+
+        self.assertTrue(second['cached'])
+        self.assertEqual((second['is_authentic'], second['confidence']), (False, 0.8))
+        self.assertNotEqual(second['id'], first['id'])
+        self.assertNotEqual(second['image_url'], first['image_url'])
+
+        evidence = Evidence.objects.get(pk=second['id'])
+        self.assertEqual(evidence.owner, self.bob)
+        self.assertEqual(evidence.analysis['verdict']['label'], 'Fake')
+        history = self.client.get(f"/api/evidence/by-hash/{first['image_hash']}/", **self.bob_auth).json()
+        self.assertEqual([item['id'] for item in history['results']], [second['id']])
+
+
+@mock.patch.multiple('evidence_app.utils.phash_index', _index=None, _synced_pk=0, _unsettled=frozenset())
+class NearDuplicateTest(TestCase):
+    def setUp(self):
+        self.alice, self.alice_auth = auth_for('alice')
+        self.bob, self.bob_auth = auth_for('bob')
+
+    def evidence(self, owner, phash):
+        return Evidence.objects.create(owner=owner, image='evidence/copy.jpg', phash=phash, dhash=phash)
+
+    def test_only_the_callers_evidence_is_returned(self):
+        mine = self.evidence(self.bob, 0x0F0F)
+        theirs = self.evidence(self.alice, 0x0F0E)
+        also_mine = self.evidence(self.bob, 0x0F0C)
+
+        response = self.client.get(f'/api/evidence/{mine.pk}/similar/?limit=1', **self.bob_auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['results']], [also_mine.pk])
+
+        response = self.client.get(f'/api/evidence/{theirs.pk}/similar/', **self.alice_auth)
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_pending_rows_do_not_hold_back_the_sync(self):
+        pending = Evidence.objects.create(owner=self.bob, image='evidence/queued.jpg', status=Evidence.STATUS_PENDING)
+        hashed = self.evidence(self.bob, 0x0F0F)
+        self.assertEqual(phash_index.find_similar(0x0F0F), [(hashed.pk, 0)])
+
+        # The cursor moves on; the pending row is re-checked by primary key
+        self.assertEqual(phash_index._synced_pk, hashed.pk)
+        self.assertEqual(phash_index._unsettled, {pending.pk})
+
+        Evidence.objects.filter(pk=pending.pk).update(status=Evidence.STATUS_DONE, phash=0x0F0E)
+        self.assertEqual([pk for pk, _ in phash_index.find_similar(0x0F0F)], [hashed.pk, pending.pk])
+
+
+@mock.patch.multiple('evidence_app.utils.phash_index', _index=None, _synced_pk=0, _unsettled=frozenset())
+class OwnerScopingTest(TestCase):
+    def setUp(self):
+        alice, self.alice_auth = auth_for('alice')
+        _, self.bob_auth = auth_for('bob')
+        evidence = Evidence.objects.create(
+            owner=alice, image='evidence/alice.jpg', image_hash='ab' * 32, phash=1, dhash=1,
+            analysis=build_analysis('Real', 0.9, {}, hashes=(1, 1)),
+        )
+        job = VerificationJob.objects.create(evidence=evidence, status=Evidence.STATUS_DONE)
+        self.urls = [
+            f'/api/evidence/{evidence.pk}/',
+            f'/api/evidence/{evidence.pk}/report/',
+            f'/api/evidence/{evidence.pk}/address/',
+            f'/api/evidence/{evidence.pk}/similar/',
+            f'/api/verify/jobs/{job.pk}/',
+        ]
+
+    def test_other_users_get_404(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, **self.alice_auth).status_code, 200)
+                self.assertEqual(self.client.get(url, **self.bob_auth).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, FILE_UPLOAD_TEMP_DIR=UPLOAD_TEMP_DIR,
+                   RESULT_CACHE_ENABLED=False, VERIFY_UPLOAD_MAX_BYTES=4096)
+class BatchArchiveTest(TestCase):
+    def setUp(self):
+        _, self.auth = auth_for('examiner')
+
+    def test_member_declaring_more_than_the_image_limit_is_refused(self):
+        archive = zip_upload({'ok.jpg': jpeg_upload().read(), 'huge.jpg': b'\xff\xd8\xff' + b'\0' * 8192})
+        response = self.client.post('/api/verify/batch/', {'archive': archive}, **self.auth)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Evidence.objects.count(), 0)
+
+    def test_decompressed_bytes_are_capped_while_extracting(self):
+        archive = zip_upload({'a.jpg': b'\0' * 3000, 'b.jpg': b'\0' * 3000})
+        members = iter_archive(archive, max_member_bytes=4096, max_total_bytes=5000)
+        self.assertEqual(next(members).size, 3000)
+        with self.assertRaises(ArchiveTooLarge):
+            next(members)
+
+    def test_stream_ends_with_an_error_line_when_the_batch_fails(self):
+        with mock.patch('evidence_app.utils.batch.check_tampering_many', side_effect=RuntimeError('model down')):
+            response = self.client.post('/api/verify/batch/?stream=true', {'images': [jpeg_upload()]}, **self.auth)
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['{"error": "model down"}'])
+
+
+@override_settings(VERIFY_JOB_STALE_SECONDS=60, VERIFY_JOB_MAX_ATTEMPTS=2)
+class JobClaimTest(TestCase):
+    def setUp(self):
+        evidence = Evidence.objects.create(image='evidence/queued.jpg', status=Evidence.STATUS_PENDING)
+        self.job = VerificationJob.objects.create(evidence=evidence, filename='queued.jpg')
+
+    def lose_worker(self):
+        VerificationJob.objects.update(claimed_at=timezone.now() - timedelta(minutes=5))
+
+    def test_pending_job_is_claimed_once(self):
+        self.assertEqual(claim_next_job(), self.job.pk)
+        self.assertIsNone(claim_next_job())
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), (Evidence.STATUS_PROCESSING, 1))
+        self.assertIsNotNone(self.job.claimed_at)
+
+    def test_stale_claim_is_retried_then_abandoned(self):
+        claim_next_job()
+        self.lose_worker()
+        self.assertEqual(claim_next_job(), self.job.pk)
+
+        self.lose_worker()
+        self.assertIsNone(claim_next_job())
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), (Evidence.STATUS_FAILED, 2))
+        self.assertEqual(Evidence.objects.get().status, Evidence.STATUS_FAILED)
+
+
+@override_settings(GEOCODE_STALE_SECONDS=60)
+class AddressRecoveryTest(TestCase):
+    def test_lost_lookup_is_rescheduled(self):
+        created = timezone.now() - timedelta(minutes=5)
+        lost = Evidence.objects.create(image='evidence/lost.jpg', latitude=48.85, longitude=2.35,
+                                       address_pending=True, created_at=created)
+        Evidence.objects.create(image='evidence/fresh.jpg', latitude=48.85, longitude=2.35, address_pending=True)
+
+        inline = mock.Mock(submit=lambda fn, *args: fn(*args))
+        with mock.patch('evidence_app.utils.enrichment._get_executor', return_value=inline), \
+                mock.patch('evidence_app.utils.enrichment.close_old_connections'), \
+                mock.patch('evidence_app.utils.enrichment.reverse_geocode', return_value='Paris, FR'):
+            self.assertEqual(resume_stale_address_resolution(), 1)
+
+        lost.refresh_from_db()
+        self.assertEqual((lost.address, lost.address_pending), ('Paris, FR', False))
+        self.assertEqual(Evidence.objects.filter(address_pending=True).count(), 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, FILE_UPLOAD_TEMP_DIR=UPLOAD_TEMP_DIR,
+                   RESULT_CACHE_ENABLED=False, INFERENCE_MULTICROP=False)
+class AsyncMulticropTest(TestCase):
+    def test_queued_job_keeps_the_multicrop_flag(self):
+        _, auth = auth_for('examiner')
+        response = self.client.post('/api/verify/?async=1&multicrop=1', {'image': jpeg_upload()}, **auth)
+        self.assertEqual(response.status_code, 202)
+        job = VerificationJob.objects.get(pk=response.json()['job_id'])
+        self.assertTrue(job.multicrop)
+
+        analysis = ('Real', 0.9, {'status': 'No metadata'}, (1, 1), {'grid': [1, 1]})
+        with mock.patch('evidence_app.utils.pipeline.analyze_stored_evidence', return_value=analysis) as analyze:
+            process_job(job.pk)
+        self.assertIs(analyze.call_args.args[2], True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Evidence.STATUS_DONE)
+        self.assertTrue(job.evidence.model_version.endswith(MULTICROP_VERSION_SUFFIX))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, FILE_UPLOAD_TEMP_DIR=UPLOAD_TEMP_DIR, VERIFY_UPLOAD_MAX_BYTES=4096)
+class UploadLimitsTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='examiner', password='not-used')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_oversized_upload_is_refused(self):
+        upload = SimpleUploadedFile('big.jpg', b'\xff\xd8\xff' + b'\0' * 8192, content_type='image/jpeg')
+        response = self.client.post('/api/verify/', {'image': upload}, **self.auth)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Evidence.objects.count(), 0)
+
+    def test_non_image_upload_is_refused(self):
+        upload = SimpleUploadedFile('notes.jpg', b'not really a picture', content_type='image/jpeg')
+        response = self.client.post('/api/verify/', {'image': upload}, **self.auth)
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(os.listdir(UPLOAD_TEMP_DIR), [])
+
+
+@override_settings(DEBUG=False, METRICS_TOKEN='')
+class MetricsAccessTest(TestCase):
+    def test_metrics_need_a_token_or_staff(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        staff = User.objects.create_user(username='ops', password='not-used', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class StageGraphTest(SimpleTestCase):
+    def test_independent_stages_overlap(self):
+        timings = {}
+        start = time.perf_counter()
+        results = run_stages([
+            Stage('a', lambda: time.sleep(0.2) or 1),
+            Stage('b', lambda: time.sleep(0.2) or 2),
+            Stage('sum', lambda a, b: a + b, after=('a', 'b')),
+        ], timings)
+        self.assertLess(time.perf_counter() - start, 0.35)
+        self.assertEqual(results['sum'], 3)
+        self.assertEqual(set(timings), {'a', 'b', 'sum'})
+
+    def test_stalled_stage_falls_back(self):
+        start = time.perf_counter()
+        results = run_stages([
+            Stage('slow', lambda: time.sleep(1) or 'late', timeout=0.05, fallback=None),
+            Stage('fast', lambda: 'done'),
+        ])
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(results, {'slow': None, 'fast': 'done'})
+
+        with self.assertRaises(StageTimeout):
+            run_stages([Stage('slow', lambda: time.sleep(1), timeout=0.05)])
+
+
+class GazetteerTest(SimpleTestCase):
+    def test_nearest_at_high_latitude(self):
+        # At 80°N a degree of longitude is ~19 km: the place three cells east
+        # is closer than the one in the neighbouring row.
+        gazetteer = Gazetteer(['South', 'East'], ['NO', 'NO'], [79.6, 80.01], [10.2, 11.6])
+        name, country, distance = gazetteer.nearest(80.01, 10.01, max_km=100)
+        self.assertEqual((name, country), ('East', 'NO'))
+        self.assertAlmostEqual(distance, 30.7, delta=0.5)
+
+    def test_nearest_respects_max_km(self):
+        gazetteer = Gazetteer(['South', 'East'], ['NO', 'NO'], [79.6, 80.01], [10.2, 11.6])
+        self.assertIsNone(gazetteer.nearest(80.01, 10.01, max_km=25))
+        self.assertIsNone(gazetteer.nearest(-45.0, 170.0, max_km=100))
+
+
+class MultiCropTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = Image.fromarray(rng.integers(0, 256, (400, 600, 3), dtype=np.uint8))
+
+    def test_tiles_and_mirrors_come_from_one_decode(self):
+        crops = prepare_crops(self.image, max_crops=14)
+        half = 1 + crops.nx * crops.ny
+        self.assertEqual((crops.ny, crops.nx), (2, 3))
+        self.assertEqual(crops.batch.shape, (2 * half, TILE, TILE, 3))
+
+        work = np.asarray(self.image.resize((TILE + 2 * STRIDE, TILE + STRIDE), Image.BILINEAR))
+        last_tile = work[STRIDE:STRIDE + TILE, 2 * STRIDE:2 * STRIDE + TILE]
+        np.testing.assert_allclose(crops.batch[half - 1], pixels_to_model_input(last_tile), atol=1e-4)
+        np.testing.assert_array_equal(crops.batch[half + 1], crops.batch[1][:, ::-1])
+
+    def test_heatmap_has_one_score_per_tile(self):
+        crops = prepare_crops(self.image, max_crops=14)
+
+        # The second tile scores 0.9, its mirror image 0.1, every other view 0.1
+        scores = iter([0.9 if i == 2 else 0.1 for i in range(len(crops.batch))])
+
+        def submit(view):
+            future = Future()
+            future.set_result(next(scores))
+            return future
+
+        batcher = mock.Mock(submit=mock.Mock(side_effect=submit))
+        with mock.patch('evidence_app.utils.ai_models.get_batcher', return_value=batcher), \
+                self.settings(MULTICROP_AGGREGATE='max'):
+            (label, confidence), summary = score_crops(crops)
+
+        self.assertEqual(batcher.submit.call_count, 14)
+        self.assertEqual(summary['grid'], [2, 3])
+        self.assertEqual(summary['heatmap'][0], [0.1, 0.5, 0.1])
+        self.assertEqual((label, round(confidence, 4)), ('Real', 0.5))
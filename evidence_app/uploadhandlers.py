@@ -0,0 +1,116 @@
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+from .utils.metrics import record_stage
+
+# Leading bytes of the formats the pipeline accepts. TIFF covers the
+# TIFF-based RAW formats (DNG, CR2, NEF, ARW) too.
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',          # JPEG
+    b'\x89PNG\r\n\x1a\n',     # PNG
+    b'GIF87a', b'GIF89a',     # GIF
+    b'II*\x00', b'MM\x00*',   # TIFF
+    b'II+\x00', b'MM\x00+',   # BigTIFF
+    b'BM',                    # BMP
+)
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06')
+
+# Enough to tell every signature above apart (WebP needs 12)
+SNIFF_BYTES = 12
+
+
+def sniff_image(head):
+    if head.startswith(IMAGE_SIGNATURES):
+        return True
+    return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to a temp file, updating a SHA256 digest chunk by chunk as they're written.
+
+    The finished file carries the hex digest as ``uploaded_file.sha256`` so the
+    rest of the pipeline never has to re-read it to hash it.
+
+    Uploads are checked as they arrive: a body over ``max_request_size``
+    is refused before any of it is read, a file stops being received once
+    it passes ``max_file_size``, and the first bytes of each file must look
+    like an image (or a zip, for ``archive_fields``). A refused upload
+    leaves its reason in ``rejection`` as ``(http_status, message)``.
+
+    Temp files live in FILE_UPLOAD_TEMP_DIR, next to MEDIA_ROOT, so
+    storage moves them into place with a rename.
+
+    ``timings`` ends up with the 'upload' stage (receiving and writing the
+    body, hashing included) and the 'hash' stage alone, in ms.
+    """
+
+    def __init__(self, request=None, max_file_size=None, max_request_size=None, archive_fields=()):
+        super().__init__(request)
+        self.max_file_size = max_file_size
+        self.max_request_size = max_request_size
+        self.archive_fields = archive_fields
+        self.rejection = None
+        self.timings = {}
+        self.started = None
+        self.hash_seconds = 0.0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.started = time.perf_counter()
+        if self.max_request_size is not None and content_length > self.max_request_size:
+            self.rejection = (413, f"Request body is larger than the {self.max_request_size} byte limit")
+            # Parsed as empty: the body is never read
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        if settings.FILE_UPLOAD_TEMP_DIR:
+            os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.head = b''
+        self.is_archive = self.field_name in self.archive_fields
+
+    def reject(self, status, message):
+        self.rejection = (status, message)
+        self.file.close()  # deletes the partial temp file
+        raise StopUpload(connection_reset=True)
+
+    def check_head(self):
+        if self.is_archive:
+            if not self.head.startswith(ZIP_SIGNATURES):
+                self.reject(415, f"{self.file_name} is not a zip archive")
+        elif not sniff_image(self.head):
+            self.reject(415, f"{self.file_name} is not a supported image")
+
+    def receive_data_chunk(self, raw_data, start):
+        if (self.max_file_size is not None and not self.is_archive
+                and start + len(raw_data) > self.max_file_size):
+            self.reject(413, f"{self.file_name} is larger than the {self.max_file_size} byte limit")
+
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) == SNIFF_BYTES:
+                self.check_head()
+
+        hash_start = time.perf_counter()
+        self.sha256.update(raw_data)
+        self.hash_seconds += time.perf_counter() - hash_start
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if len(self.head) < SNIFF_BYTES:
+            self.check_head()  # shorter than the sniff window
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.sha256 = self.sha256.hexdigest()
+        return uploaded_file
+
+    def upload_complete(self):
+        if self.started is not None:
+            record_stage('upload', time.perf_counter() - self.started, self.timings)
+            record_stage('hash', self.hash_seconds, self.timings)
@@ -1,121 +1,239 @@
-import os
+import logging
+import threading
+
 import numpy as np
-import tensorflow as tf
-import gdown
-from tensorflow.keras.preprocessing import image
-from tensorflow.keras import backend as K
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input
-from PIL import Image
-import gc
-
-# ✅ Model file setup
-MODEL_FILE_NAME = 'deepfake_detection_resnet50.h5'
-MODEL_PATH = os.path.join(os.path.dirname(__file__), MODEL_FILE_NAME)
-DRIVE_FILE_ID = '1MaD9ZpejHMoULsSlD8ipMRTDkk8QAeyt'
-DRIVE_URL = f'https://drive.google.com/uc?id={DRIVE_FILE_ID}'
-
-# ✅ Global model reference (lazy-loaded)
-_model = None
+from django.conf import settings
 
-def download_model_if_needed():
-    """Download model from Google Drive if not found locally."""
-    if not os.path.exists(MODEL_PATH):
-        print("[INFO] Model not found locally. Downloading from Google Drive...")
-        gdown.download(DRIVE_URL, MODEL_PATH, quiet=False)
-        print("[INFO] Download complete!")
+# TensorFlow and gdown are imported inside the functions that need them, so
+# importing this module (every web process, migrate, admin commands, ...)
+# doesn't pay the multi-second TensorFlow import.
 
-def load_model_safely():
-    """Load model safely with fallback strategy."""
-    global _model
+from .batching import InferenceBatcher, batch_buckets
+from .inference_backends import get_backend, get_backend_class
+from .inference_server import InferenceClient
+from .model_registry import fetch_model
+from .preprocess import TARGET_SIZE, preprocess
 
-    if _model is not None:
-        return _model  # Already loaded
+logger = logging.getLogger(__name__)
 
-    # Step 1: Download if missing
-    download_model_if_needed()
+# ✅ Fixed input shape for the compiled predict signature
+INPUT_SHAPE = TARGET_SIZE + (3,)
 
-    # Step 2: Clear old Keras sessions
-    K.clear_session()
+# ✅ Global model reference (lazy-loaded, once per worker process)
+_model = None
+_model_lock = threading.Lock()
+
+# ✅ Shared micro-batching engine (lazy-created, one per worker process)
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def download_model_if_needed():
+    """Return the local path of the verified model file, downloading it if needed (see model_registry)."""
+    return fetch_model()
+
+def build_model():
+    """Build the ResNet50 tampering classifier architecture (randomly initialised)."""
+    import tensorflow as tf
+    from tensorflow.keras.layers import Input
+    from tensorflow.keras.models import Model
+
+    input_tensor = Input(shape=INPUT_SHAPE, name='input')
+    base_model = tf.keras.applications.ResNet50(
+        include_top=False,
+        input_tensor=input_tensor,
+        weights=None
+    )
+    x = base_model.output
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    x = tf.keras.layers.Dense(1024, activation='relu')(x)
+    x = tf.keras.layers.Dropout(0.5)(x)
+    x = tf.keras.layers.Dense(512, activation='relu')(x)
+    x = tf.keras.layers.Dropout(0.3)(x)
+    output = tf.keras.layers.Dense(1, activation='sigmoid')(x)
+    return Model(inputs=input_tensor, outputs=output)
+
+def load_model_file(path):
+    """Load a Keras model file, falling back to the known architecture + weights only."""
+    import tensorflow as tf
 
     try:
         # Try standard full model load
-        _model = tf.keras.models.load_model(MODEL_PATH)
-        print("[INFO] Model loaded successfully (full model).")
+        model = tf.keras.models.load_model(path, compile=False)
+        logger.info("Model loaded successfully (full model).")
+        return model
     except (ValueError, TypeError, OSError) as e:
-        print(f"[WARNING] Full model load failed: {str(e)}")
-        print("[INFO] Attempting to load model weights only...")
+        logger.warning("Full model load failed: %s", e)
+        logger.info("Attempting to load model weights only...")
         try:
-            input_tensor = Input(shape=(224, 224, 3), name='input')
-            base_model = tf.keras.applications.ResNet50(
-                include_top=False,
-                input_tensor=input_tensor,
-                weights=None
-            )
-            x = base_model.output
-            x = tf.keras.layers.GlobalAveragePooling2D()(x)
-            x = tf.keras.layers.Dense(1024, activation='relu')(x)
-            x = tf.keras.layers.Dropout(0.5)(x)
-            x = tf.keras.layers.Dense(512, activation='relu')(x)
-            x = tf.keras.layers.Dropout(0.3)(x)
-            output = tf.keras.layers.Dense(1, activation='sigmoid')(x)
-
-            _model = Model(inputs=input_tensor, outputs=output)
-            _model.load_weights(MODEL_PATH)
-            _model.compile(
-                optimizer=tf.keras.optimizers.Adam(learning_rate=1e-5),
-                loss='binary_crossentropy',
-                metrics=['accuracy']
-            )
-            print("[INFO] Model weights loaded successfully!")
+            model = build_model()
+            model.load_weights(path)
+            logger.info("Model weights loaded successfully!")
+            return model
         except Exception as ex:
-            print(f"[CRITICAL] Weight loading failed: {str(ex)}")
-            _model = None
+            logger.critical("Weight loading failed: %s", ex)
             raise RuntimeError("Unable to load model or weights.")
 
-    return _model
+def load_model_safely():
+    """Load model safely with fallback strategy.
 
-def resize_image_for_memory(img_path):
-    """Resize image to a smaller size before processing to reduce memory usage."""
-    try:
-        with Image.open(img_path) as img:
-            img = img.convert('RGB')  # Ensure 3 channels
-            img = img.resize((600, 600))  # Resize to smaller size (adjust if needed)
-            img.save(img_path)
-        print("[INFO] Image resized to reduce memory usage.")
-    except Exception as e:
-        print(f"[WARNING] Failed to resize image: {str(e)}")
+    The model is loaded once per worker and kept for the life of the process;
+    the Keras session is never cleared so the traced graph stays warm.
+    """
+    global _model
+
+    if _model is not None:
+        return _model  # Already loaded
+
+    with _model_lock:
+        if _model is not None:
+            return _model
 
-def preprocess_image(img_path):
-    """Preprocess image for ResNet50."""
-    model = load_model_safely()
-    if model is None:
-        raise RuntimeError("Model not loaded - cannot preprocess image.")
+        # Step 1: Verified local copy (downloaded if missing or corrupt)
+        path = download_model_if_needed()
 
-    # Resize image to reduce memory pressure
-    resize_image_for_memory(img_path)
+        # Step 2: Load (full model, or architecture + weights)
+        _model = load_model_file(path)
+
+    return _model
 
-    img = image.load_img(img_path, target_size=(224, 224))
-    img_array = image.img_to_array(img)
-    img_array = tf.keras.applications.resnet50.preprocess_input(img_array)
-    return np.expand_dims(img_array, axis=0)
+def make_predict_fn(model, batch_size):
+    """Compile a predict function for fixed (n, 224, 224, 3) batches, n in batch_buckets(batch_size).
+
+    Every shape is traced here, once, so no request ever triggers a trace;
+    callers pad short batches up to the next traced size (1, 2, 4, ...,
+    ``batch_size``) rather than all the way to ``batch_size``.
+    """
+    import tensorflow as tf
+
+    @tf.function
+    def predict(batch):
+        return model(batch, training=False)
+
+    graphs = {
+        size: predict.get_concrete_function(tf.TensorSpec((size,) + INPUT_SHAPE, tf.float32))
+        for size in batch_buckets(batch_size)
+    }
+    return lambda batch: graphs[len(batch)](tf.constant(batch)).numpy()
+
+def preprocess_image(source):
+    """Preprocess image for ResNet50.
+
+    ``source`` is either a file path or an already-opened PIL image (as handed
+    down by the ingest stage). Decoding happens once, in memory; the evidence
+    file itself is never modified.
+    """
+    return np.expand_dims(preprocess(source), axis=0)
+
+def inference_server_socket():
+    return getattr(settings, 'INFERENCE_SERVER_SOCKET', None)
+
+def get_batcher():
+    """Return the shared inference batcher, creating it on first use.
+
+    With INFERENCE_SERVER_SOCKET set this is a client for
+    `manage.py run_inference_server` instead, and no model is loaded in
+    this process.
+    """
+    global _batcher
+
+    if _batcher is not None:
+        return _batcher
+
+    with _batcher_lock:
+        if _batcher is None and inference_server_socket():
+            _batcher = InferenceClient(
+                inference_server_socket(),
+                timeout=getattr(settings, 'INFERENCE_CLIENT_TIMEOUT', 30.0),
+                connections=getattr(settings, 'INFERENCE_CLIENT_CONNECTIONS', 8),
+            )
+        elif _batcher is None:
+            batch_size = getattr(settings, 'INFERENCE_BATCH_SIZE', 8)
+            backend = get_backend(batch_size=batch_size)
+            _batcher = InferenceBatcher(
+                backend.predict,
+                max_batch_size=batch_size,
+                max_wait_ms=getattr(settings, 'INFERENCE_BATCH_WAIT_MS', 10),
+                input_shape=INPUT_SHAPE,
+                batch_sizes=backend.batch_sizes,
+            )
+    return _batcher
+
+def warmup_model():
+    """Load the model and trace the compiled predict signature once, at startup."""
+    get_batcher().predict(np.zeros(INPUT_SHAPE, dtype=np.float32))
+    logger.info("Model warmed up.")
+
+def preload_inference():
+    """Prepare inference in a process that is about to fork workers (the gunicorn master).
+
+    Fork-safe backends are loaded and warmed here, so workers inherit the
+    model copy-on-write. For the others (TensorFlow's runtime can't be used
+    across fork) only the imports and the model download happen here; each
+    worker then loads and warms the model right after it is forked.
+    Returns True if the model itself was preloaded.
+    """
+    if inference_server_socket():
+        return False  # the model lives in the inference server
+
+    backend_class = get_backend_class()
+    if backend_class.fork_safe:
+        warmup_model()
+        return True
+
+    backend_class.prepare()
+    logger.info("Preloaded %s libraries; the model loads in each worker.", backend_class.name)
+    return False
+
+def get_inference_stats():
+    """Queue depth and batch fill counters for the shared batcher (the server's, when remote)."""
+    if _batcher is None:
+        return {'queue_depth': 0, 'batches_run': 0, 'items_run': 0}
+    return _batcher.stats()
 
 def check_tampering(image_path):
-    """Run image through model and return label + confidence."""
-    try:
-        model = load_model_safely()
-        if model is None:
-            return ('Error', 0.0)
+    """Run image through model and return label + confidence.
 
+    ``image_path`` may also be an opened PIL image (see preprocess_image).
+    """
+    try:
         img_array = preprocess_image(image_path)
-        prediction = model.predict(img_array, verbose=0)[0][0]
-        confidence = float(prediction)
-
-        # Clear TensorFlow session and collect garbage to free memory
-        K.clear_session()
-        gc.collect()
+        confidence = get_batcher().predict(img_array)
 
-        return ('Fake', confidence) if confidence > 0.5 else ('Real', 1 - confidence)
+        return verdict_from_score(confidence)
     except Exception as e:
-        print(f"[ERROR] Prediction failed: {str(e)}")
+        logger.error("Prediction failed: %s", e)
         return ('Error', 0.0)
+
+def verdict_from_score(confidence):
+    """Map the model's sigmoid output to (label, confidence in that label)."""
+    return ('Fake', confidence) if confidence > 0.5 else ('Real', 1 - confidence)
+
+def check_tampering_many(images):
+    """check_tampering for several images at once.
+
+    Every image is queued on the shared batcher before any result is awaited,
+    so they go through the model in full batches. Returns one (label,
+    confidence) per input, with ('Error', 0.0) for images that failed.
+    """
+    try:
+        batcher = get_batcher()
+    except Exception as e:
+        logger.error("Prediction failed: %s", e)
+        return [('Error', 0.0)] * len(images)
+
+    futures = []
+    for img in images:
+        try:
+            futures.append(batcher.submit(preprocess_image(img)))
+        except Exception as e:
+            logger.error("Preprocessing failed: %s", e)
+            futures.append(None)
+
+    verdicts = []
+    for future in futures:
+        try:
+            verdicts.append(verdict_from_score(future.result()) if future else ('Error', 0.0))
+        except Exception as e:
+            logger.error("Prediction failed: %s", e)
+            verdicts.append(('Error', 0.0))
+    return verdicts
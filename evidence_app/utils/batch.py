@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+from .ai_models import check_tampering_many
+from .ingest import IngestedUpload
+from .persistence import bulk_ingest
+from .pipeline import (
+    analysis_from_cache, analyze_metadata, apply_results, build_results, cacheable_analysis, enrich_later,
+    perceptual_hashes_or_none,
+)
+from .preprocess import decode_for_model
+from .metrics import VERIFICATIONS, stage
+from .result_cache import get_cached_result, store_result
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.webp', '.gif'}
+
+
+class ArchiveTooLarge(Exception):
+    """A zip archive whose images decompress past the upload limits."""
+
+
+def archive_limits():
+    """(max bytes per image, max bytes for every archived image of a request), decompressed."""
+    return (getattr(settings, 'VERIFY_UPLOAD_MAX_BYTES', 50 * 1024 * 1024),
+            getattr(settings, 'BATCH_ARCHIVE_MAX_BYTES', 1024 * 1024 * 1024))
+
+
+def _is_image_member(info):
+    name = os.path.basename(info.filename)
+    if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+        return False
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _extract(zf, info, limit):
+    """Copy one member into a temp file beside the uploads, hashing it on the way.
+
+    Sizes in the zip are the uploader's word, so the bytes actually
+    decompressed are counted too: past ``limit`` ArchiveTooLarge is raised.
+    """
+    name = os.path.basename(info.filename)
+    content = TemporaryUploadedFile(name, mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                                    info.file_size, None)
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with zf.open(info) as member:
+            for chunk in iter(lambda: member.read(1024 * 1024), b''):
+                size += len(chunk)
+                if size > limit:
+                    raise ArchiveTooLarge(f"{info.filename} decompresses past the archive size limits")
+                sha256.update(chunk)
+                content.write(chunk)
+        content.seek(0)
+    except BaseException:
+        content.close()  # deletes the temp file
+        raise
+    content.size = size
+    content.sha256 = sha256.hexdigest()
+    return content
+
+
+def iter_archive(archive, max_member_bytes, max_total_bytes):
+    """Yield each image in a zip archive as a temp-file upload carrying its SHA256.
+
+    Raises ArchiveTooLarge once an image passes ``max_member_bytes`` or all
+    of them together pass ``max_total_bytes``, decompressed.
+    """
+    if settings.FILE_UPLOAD_TEMP_DIR:
+        os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+    used = 0
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if not _is_image_member(info):
+                continue
+            content = _extract(zf, info, min(max_member_bytes, max_total_bytes - used))
+            used += content.size
+            yield content
+
+
+def check_archives(archives):
+    """Number of images in the zip archives, from their central directories alone.
+
+    Raises ArchiveTooLarge if an image declares more than the per-image
+    limit or all of them together more than BATCH_ARCHIVE_MAX_BYTES, and
+    zipfile.BadZipFile for anything that isn't a zip.
+    """
+    max_member, max_total = archive_limits()
+    count = declared = 0
+    for archive in archives:
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if not _is_image_member(info):
+                    continue
+                if info.file_size > max_member:
+                    raise ArchiveTooLarge(f"{info.filename} is larger than the {max_member} byte limit")
+                count += 1
+                declared += info.file_size
+        archive.seek(0)
+    if declared > max_total:
+        raise ArchiveTooLarge(f"Archived images add up to more than the {max_total} byte limit")
+    return count
+
+
+def iter_batch_files(files, archives):
+    """All uploaded images of a batch request, loose files first, then archive members."""
+    yield from files
+    max_member, remaining = archive_limits()
+    for archive in archives:
+        for content in iter_archive(archive, max_member, remaining):
+            remaining -= content.size
+            yield content
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _decode(upload):
+    try:
+        return decode_for_model(upload.image)
+    except Exception as e:
+        logger.error("Decoding %s failed: %s", upload.name, e)
+        return None
+
+
+def verify_batch(files, chunk_size=None, owner=None):
+    """Verify many images, yielding one result dict per image as each chunk completes.
+
+    Images are ingested and hashed, then each chunk's uncached images go
+    through the model together. Every image, cached or not, gets its own
+    Evidence row owned by ``owner``; a chunk's rows are written with a
+    single bulk_create.
+    """
+    from ..models import Evidence
+
+    chunk_size = chunk_size or getattr(settings, 'INFERENCE_BATCH_SIZE', 8)
+
+    for chunk in _chunks(enumerate(files), chunk_size):
+        analyzed = []  # (index, upload, analyze_image-style result, timings, from cache)
+        pending = []
+        for index, f in chunk:
+            try:
+                upload = IngestedUpload(f)
+            except Exception:
+                yield {'index': index, 'filename': f.name, 'error': 'Not a valid image'}
+                continue
+
+            cached = get_cached_result(upload.sha256)
+            if cached is not None:
+                analyzed.append((index, upload, analysis_from_cache(cached), {}, True))
+            else:
+                pending.append((index, upload))
+
+        if pending:
+            # One decode per image at model size, shared by the model and the perceptual hashes
+            timings = [{} for _ in pending]
+            decoded = []
+            for (_, upload), image_timings in zip(pending, timings):
+                with stage('preprocess', image_timings):
+                    decoded.append(_decode(upload))
+            model_timings = {}
+            with stage('inference', model_timings):
+                verdicts = check_tampering_many(decoded)
+
+            for (index, upload), image, (label, confidence), image_timings in zip(pending, decoded, verdicts, timings):
+                # The model ran once for the chunk; record each image's share
+                image_timings['inference'] = model_timings['inference'] / len(pending)
+                with stage('exif', image_timings):
+                    metadata = analyze_metadata(upload.exif)
+                with stage('phash', image_timings):
+                    hashes = perceptual_hashes_or_none(image) if image is not None else None
+                analyzed.append((index, upload, (label, confidence, metadata, hashes, None), image_timings, False))
+
+        if not analyzed:
+            continue
+
+        rows = []
+        for index, upload, analysis, image_timings, from_cache in sorted(analyzed, key=lambda item: item[0]):
+            label, confidence, metadata, hashes, summary = analysis
+            upload.close()
+            evidence = Evidence(image_hash=upload.sha256, owner=owner)
+            evidence.image.save(upload.name, upload.file, save=False)
+            apply_results(evidence, label, confidence, metadata, hashes, image_timings, summary)
+            rows.append((index, upload.name, evidence, metadata, label, from_cache))
+
+        with stage('db'):
+            bulk_ingest([evidence for _, _, evidence, _, _, _ in rows])
+
+        for index, name, evidence, metadata, label, from_cache in rows:
+            results = build_results(evidence, metadata, name)
+            if from_cache:
+                VERIFICATIONS.inc('cached')
+                results['cached'] = True
+            else:
+                VERIFICATIONS.inc(label.lower())
+                if label != 'Error':
+                    store_result(evidence.image_hash, cacheable_analysis(evidence))
+            enrich_later(evidence)
+            yield dict(results, index=index)
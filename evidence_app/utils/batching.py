@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _PendingItem:
+    __slots__ = ('tensor', 'future', 'enqueued_at')
+
+    def __init__(self, tensor):
+        self.tensor = tensor
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class TensorBufferPool:
+    """Reusable fixed-shape input buffers, so each batch doesn't allocate a fresh array."""
+
+    def __init__(self, shape, dtype=np.float32, size=2):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.size = size
+        self._free = [np.zeros(self.shape, dtype=dtype) for _ in range(size)]
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return np.zeros(self.shape, dtype=self.dtype)
+
+    def release(self, buffer):
+        with self._lock:
+            if len(self._free) < self.size:
+                self._free.append(buffer)
+
+
+def batch_buckets(max_batch_size):
+    """Batch sizes a fixed-shape model is compiled for: powers of two below ``max_batch_size``, then it."""
+    sizes = []
+    size = 1
+    while size < max_batch_size:
+        sizes.append(size)
+        size *= 2
+    sizes.append(max_batch_size)
+    return tuple(sizes)
+
+
+class InferenceBatcher:
+    """Queue preprocessed tensors from concurrent requests and run them through the model in batches.
+
+    A batch is flushed as soon as it holds ``max_batch_size`` items, or when the
+    oldest queued item has waited ``max_wait_ms`` milliseconds, whichever comes first.
+
+    When ``input_shape`` is given, every batch is copied into a pooled
+    buffer, padded to the smallest of ``batch_sizes`` that holds it (just
+    ``max_batch_size`` by default), so ``predict_fn`` only ever sees shapes
+    it was compiled for: a lone request runs as a batch of one, not of
+    ``max_batch_size``.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10.0, input_shape=None, batch_sizes=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.buffer_pools = {}
+        if input_shape is not None:
+            sizes = {min(int(size), self.max_batch_size) for size in batch_sizes or ()} | {self.max_batch_size}
+            self.buffer_pools = {size: TensorBufferPool((size,) + tuple(input_shape)) for size in sorted(sizes)}
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+        # Counters; written by the flusher thread, read by request threads, both under _cond
+        self.batches_run = 0
+        self.items_run = 0
+        self.failed_batches = 0
+
+    def submit(self, tensor):
+        """Queue a single preprocessed image (H, W, C) and return a Future for its score."""
+        if tensor.ndim == 4:
+            tensor = tensor[0]
+        item = _PendingItem(tensor)
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(item)
+            self._cond.notify()
+        return item.future
+
+    def predict(self, tensor, timeout=None):
+        """Blocking helper: queue ``tensor`` and wait for its prediction."""
+        return self.submit(tensor).result(timeout=timeout)
+
+    def stats(self):
+        with self._cond:
+            queue_depth = len(self._queue)
+            batches_run, items_run, failed_batches = self.batches_run, self.items_run, self.failed_batches
+        avg_batch = (items_run / batches_run) if batches_run else 0.0
+        return {
+            'queue_depth': queue_depth,
+            'batches_run': batches_run,
+            'items_run': items_run,
+            'failed_batches': failed_batches,
+            'avg_batch_size': avg_batch,
+            'batch_fill_rate': avg_batch / self.max_batch_size,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+
+    def _ensure_worker(self):
+        # Called with self._cond held. Threads don't survive fork(), so a forked
+        # worker process gets its own flusher thread on first use.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _buffer_pool(self, count):
+        """Pool of the smallest compiled batch size that holds ``count`` items (None when not padding)."""
+        for size, pool in self.buffer_pools.items():
+            if size >= count:
+                return pool
+        return None
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            pool = self._buffer_pool(len(batch))
+            buffer = None
+            try:
+                if pool is not None:
+                    buffer = pool.acquire()
+                    for i, item in enumerate(batch):
+                        buffer[i] = item.tensor
+                    inputs = buffer
+                else:
+                    inputs = np.stack([item.tensor for item in batch])
+                predictions = np.asarray(self.predict_fn(inputs))
+                predictions = predictions[:len(batch)].reshape(len(batch), -1)
+            except Exception as e:
+                with self._cond:
+                    self.failed_batches += 1
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+            finally:
+                if buffer is not None:
+                    pool.release(buffer)
+
+            with self._cond:
+                self.batches_run += 1
+                self.items_run += len(batch)
+            for item, prediction in zip(batch, predictions):
+                item.future.set_result(float(prediction[0]))
@@ -0,0 +1,189 @@
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+from django.conf import settings
+
+from .metrics import STAGE_TIMEOUTS, record_stage
+
+logger = logging.getLogger(__name__)
+
+# ✅ Shared stage pool (lazy-created, one per process)
+_executor = None
+_executor_lock = threading.Lock()
+
+_NO_FALLBACK = object()
+
+
+class StageTimeout(Exception):
+    """A stage without a fallback ran past its timeout."""
+
+
+class Stage:
+    """One node of a stage graph.
+
+    ``fn`` is called with the results of the stages named in ``after``, in
+    that order. ``timeout`` (seconds, counted from when the stage is
+    submitted) bounds how long the graph waits for it: past that its result
+    is ``fallback``, or StageTimeout is raised if it has none. A timed-out
+    stage can't be interrupted; it finishes in the background and its
+    result is dropped.
+    """
+
+    def __init__(self, name, fn, after=(), timeout=None, fallback=_NO_FALLBACK):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+def _get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PIPELINE_THREADS', 16),
+                thread_name_prefix='pipeline-stage',
+            )
+    return _executor
+
+
+def _call_timed(fn, args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def _record_late(name, future):
+    """Done callback for a stage the graph stopped waiting for: histogram only."""
+    if not future.cancelled() and future.exception() is None:
+        record_stage(name, future.result()[1])
+
+
+def _timed_out(s, timings):
+    """Result of a stage the graph stopped waiting for: its fallback, or StageTimeout."""
+    STAGE_TIMEOUTS.inc(s.name)
+    if s.fallback is _NO_FALLBACK:
+        raise StageTimeout(f"Stage {s.name} took longer than {s.timeout}s")
+    logger.warning("Stage %s took longer than %ss; going on without it", s.name, s.timeout)
+    if timings is not None:
+        timings[s.name] = s.timeout * 1000.0
+    return s.fallback
+
+
+def run_stages(stages, timings=None):
+    """Run a graph of Stages and return {name: result}.
+
+    Each stage is submitted to the shared pool as soon as the stages it
+    depends on have finished, so independent ones run side by side (TF ops,
+    hashlib, PIL decoding and socket waits all release the GIL) and the
+    graph takes as long as its slowest path rather than the sum of its
+    stages. The calling thread only schedules and waits.
+
+    Stage durations go to the stage histograms, and into ``timings`` (ms)
+    from this thread only; a timed-out stage is entered at its timeout. An
+    exception in a stage is raised here once it is seen.
+    """
+    pending = {s.name: s for s in stages}
+    results = {}
+    running = {}    # future -> Stage
+    deadlines = {}  # future -> time.monotonic() deadline
+    executor = _get_executor()
+
+    try:
+        while pending or running:
+            for name, s in list(pending.items()):
+                if all(dep in results for dep in s.after):
+                    del pending[name]
+                    future = executor.submit(_call_timed, s.fn, [results[dep] for dep in s.after])
+                    running[future] = s
+                    if s.timeout is not None:
+                        deadlines[future] = time.monotonic() + s.timeout
+
+            if not running:
+                raise ValueError(f"Stages {sorted(pending)} wait on missing stages or on each other")
+
+            wait_for = max(0.0, min(deadlines.values()) - time.monotonic()) if deadlines else None
+            done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                s = running.pop(future)
+                deadlines.pop(future, None)
+                value, seconds = future.result()
+                record_stage(s.name, seconds, timings)
+                results[s.name] = value
+
+            now = time.monotonic()
+            for future, deadline in list(deadlines.items()):
+                if deadline > now:
+                    continue
+                s = running.pop(future)
+                del deadlines[future]
+                future.add_done_callback(partial(_record_late, s.name))
+                results[s.name] = _timed_out(s, timings)
+    except BaseException:
+        # Still timed when they finish, but nothing waits on them any more
+        for future, s in running.items():
+            future.add_done_callback(partial(_record_late, s.name))
+        raise
+
+    return results
+
+
+async def run_stages_async(stages, timings=None):
+    """run_stages for async views: the graph is awaited instead of blocking a thread.
+
+    Plain stage functions still run on the shared pool; coroutine functions
+    (network waits) run on the event loop itself, and are cancelled when
+    they time out.
+    """
+    by_name = {s.name: s for s in stages}
+    missing = {dep for s in stages for dep in s.after} - set(by_name)
+    if missing:
+        raise ValueError(f"Stages wait on missing stages {sorted(missing)}")
+
+    async def run(s):
+        args = [await tasks[dep] for dep in s.after]
+        if inspect.iscoroutinefunction(s.fn):
+            start = time.perf_counter()
+            try:
+                value = await asyncio.wait_for(s.fn(*args), s.timeout)
+            except asyncio.TimeoutError:
+                return _timed_out(s, timings)
+            seconds = time.perf_counter() - start
+        else:
+            future = _get_executor().submit(_call_timed, s.fn, args)
+            try:
+                # shield: a timeout stops the wait, not the pool future (it can't be stopped)
+                value, seconds = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), s.timeout)
+            except asyncio.TimeoutError:
+                future.add_done_callback(partial(_record_late, s.name))
+                return _timed_out(s, timings)
+        record_stage(s.name, seconds, timings)
+        return value
+
+    # A cycle would never finish: refuse it before starting anything
+    order, ready = [], {name for name, s in by_name.items() if not s.after}
+    while ready:
+        order.append(ready.pop())
+        ready |= {name for name, s in by_name.items()
+                  if name not in order and name not in ready and all(dep in order for dep in s.after)}
+    if len(order) != len(by_name):
+        raise ValueError(f"Stages {sorted(set(by_name) - set(order))} wait on each other")
+
+    tasks = {}
+    for name in order:
+        tasks[name] = asyncio.ensure_future(run(by_name[name]))
+    try:
+        values = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return dict(zip(tasks, values))
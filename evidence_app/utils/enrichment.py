@@ -0,0 +1,105 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .geocoding import cache_key, reverse_geocode
+
+logger = logging.getLogger(__name__)
+
+# ✅ Background geocoding pool (lazy-created, one per process)
+_executor = None
+_executor_lock = threading.Lock()
+
+# geohash cell -> evidence ids waiting on that lookup
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'GEOCODE_ENRICHMENT_THREADS', 2),
+                thread_name_prefix='geocode-enrichment',
+            )
+    return _executor
+
+
+def schedule_address_resolution(evidence):
+    """Resolve ``evidence``'s address in the background and write it back when done.
+
+    Requests for the same geohash cell that arrive while a lookup is in
+    flight join that lookup instead of issuing another one.
+    """
+    if evidence.latitude is None or evidence.longitude is None:
+        return
+
+    key = cache_key(evidence.latitude, evidence.longitude)
+    with _inflight_lock:
+        if key in _inflight:
+            _inflight[key].append(evidence.pk)
+            return
+        _inflight[key] = [evidence.pk]
+
+    _get_executor().submit(_resolve, key, evidence.latitude, evidence.longitude)
+
+
+def resume_stale_address_resolution(limit=100):
+    """Re-schedule lookups that were lost with the process that queued them.
+
+    The pending lookups only live in that process's pool, so a restart or
+    crash between the INSERT and the write-back leaves ``address_pending``
+    set for good. Rows still pending GEOCODE_STALE_SECONDS after they were
+    created are scheduled again here; a failed lookup also clears the flag,
+    so only lost ones match. Returns how many were scheduled.
+    """
+    from ..models import Evidence
+
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'GEOCODE_STALE_SECONDS', 600))
+    stale = list(Evidence.objects
+                 .filter(address_pending=True, created_at__lt=stale_before)
+                 .order_by('pk')
+                 .only('pk', 'latitude', 'longitude')[:limit])
+    for evidence in stale:
+        schedule_address_resolution(evidence)
+    if stale:
+        logger.warning("Re-scheduled %d address lookup(s) left pending by a stopped process", len(stale))
+    return len(stale)
+
+
+def _resolve(key, lat, lon):
+    from ..models import Evidence
+    from .result_cache import update_result
+
+    close_old_connections()
+    address = None
+    try:
+        address = reverse_geocode(lat, lon)
+    except Exception:
+        logger.exception("Reverse geocoding %s failed", key)
+    finally:
+        with _inflight_lock:
+            evidence_ids = _inflight.pop(key, [])
+
+        try:
+            Evidence.objects.filter(pk__in=evidence_ids).update(address=address, address_pending=False)
+            # Keep the stored analysis document complete for reports
+            for evidence in Evidence.objects.filter(pk__in=evidence_ids).only('analysis'):
+                if evidence.analysis:
+                    evidence.analysis['metadata']['address'] = address
+                    evidence.save(update_fields=['analysis'])
+            hashes = (Evidence.objects.filter(pk__in=evidence_ids)
+                      .values_list('image_hash', flat=True).distinct())
+            for image_hash in hashes:
+                update_result(image_hash, address=address)
+        except Exception:
+            logger.exception("Writing back the address for %s failed", key)
+        finally:
+            close_old_connections()
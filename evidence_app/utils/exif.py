@@ -0,0 +1,188 @@
+import struct
+
+from PIL import Image
+
+# Only the tags verify_metadata actually looks at. Names follow exifread's
+# "<IFD> <Tag>" convention so results stay interchangeable with a full dump.
+IFD0_TAGS = {
+    0x010F: 'Image Make',
+    0x0110: 'Image Model',
+    0x0131: 'Image Software',
+    0x0132: 'Image DateTime',
+}
+EXIF_TAGS = {
+    0x9003: 'EXIF DateTimeOriginal',
+    0x9004: 'EXIF DateTimeDigitized',
+}
+GPS_TAGS = {
+    0x0001: 'GPS GPSLatitudeRef',
+    0x0002: 'GPS GPSLatitude',
+    0x0003: 'GPS GPSLongitudeRef',
+    0x0004: 'GPS GPSLongitude',
+}
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+
+# TIFF field type -> size in bytes
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8}
+
+# A TIFF-container file only gets its first 64 KB read; IFDs pointing past that are skipped.
+_TIFF_READ_LIMIT = 64 * 1024
+TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*')
+
+
+def _decode(raw, field_type, count, endian):
+    if field_type == 2:  # ASCII
+        return raw.split(b'\x00', 1)[0].decode('utf-8', errors='replace').strip()
+    if field_type == 3:
+        return struct.unpack(f'{endian}{count}H', raw)
+    if field_type == 4:
+        return struct.unpack(f'{endian}{count}I', raw)
+    if field_type in (5, 10):  # (S)RATIONAL
+        fmt = 'i' if field_type == 10 else 'I'
+        parts = struct.unpack(f'{endian}{2 * count}{fmt}', raw)
+        return tuple(num / den if den else 0.0 for num, den in zip(parts[::2], parts[1::2]))
+    return bytes(raw)
+
+
+def _walk_ifd(data, offset, endian, names, out):
+    """Decode the whitelisted entries of one IFD into ``out``; return any sub-IFD pointers."""
+    pointers = {}
+    if offset <= 0 or offset + 2 > len(data):
+        return pointers
+
+    (count,) = struct.unpack_from(f'{endian}H', data, offset)
+    for i in range(count):
+        entry = offset + 2 + 12 * i
+        if entry + 12 > len(data):
+            break
+        tag, field_type, n = struct.unpack_from(f'{endian}HHI', data, entry)
+
+        if tag in (EXIF_IFD_POINTER, GPS_IFD_POINTER):
+            (pointers[tag],) = struct.unpack_from(f'{endian}I', data, entry + 8)
+            continue
+
+        name = names.get(tag)
+        size = _TYPE_SIZES.get(field_type)
+        if name is None or size is None:
+            continue
+
+        length = size * n
+        if length <= 4:
+            raw = data[entry + 8:entry + 8 + length]
+        else:
+            (value_offset,) = struct.unpack_from(f'{endian}I', data, entry + 8)
+            raw = data[value_offset:value_offset + length]
+        if len(raw) != length:
+            continue
+        out[name] = _decode(raw, field_type, n, endian)
+
+    return pointers
+
+
+def parse_exif(block):
+    """Walk a TIFF-structured EXIF block and return only the whitelisted tags.
+
+    ``block`` may carry the "Exif\\0\\0" APP1 prefix. Returns None if it isn't
+    a TIFF structure at all, and a (possibly empty) dict otherwise.
+    """
+    if not block:
+        return None
+    if block.startswith(b'Exif\x00\x00'):
+        block = block[6:]
+    if len(block) < 8:
+        return None
+
+    if block[:2] == b'II':
+        endian = '<'
+    elif block[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+
+    magic, ifd0 = struct.unpack_from(f'{endian}HI', block, 2)
+    if magic != 42:
+        return None
+
+    tags = {}
+    try:
+        pointers = _walk_ifd(block, ifd0, endian, IFD0_TAGS, tags)
+        if EXIF_IFD_POINTER in pointers:
+            _walk_ifd(block, pointers[EXIF_IFD_POINTER], endian, EXIF_TAGS, tags)
+        if GPS_IFD_POINTER in pointers:
+            _walk_ifd(block, pointers[GPS_IFD_POINTER], endian, GPS_TAGS, tags)
+    except struct.error:
+        pass  # truncated block: keep whatever was decoded
+    return tags
+
+
+def read_exif_block(image_path):
+    """Read just the EXIF block of an image file.
+
+    For JPEGs this hops from marker to marker, reading segment headers only,
+    until it reaches the APP1 "Exif" segment (or the start of scan). TIFF
+    files are parsed from their first 64 KB. Other formats fall back to PIL,
+    which also only reads the header.
+    """
+    with open(image_path, 'rb') as f:
+        head = f.read(4)
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            while True:
+                marker = f.read(4)
+                if len(marker) < 4 or marker[0] != 0xFF:
+                    return None
+                kind = marker[1]
+                if kind in (0xD9, 0xDA):  # end of image / start of scan: no EXIF ahead
+                    return None
+                (length,) = struct.unpack('>H', marker[2:])
+                if length < 2:  # corrupt: the length counts its own two bytes
+                    return None
+                if kind == 0xE1:
+                    segment = f.read(length - 2)
+                    if segment.startswith(b'Exif\x00\x00'):
+                        return segment
+                    continue
+                f.seek(length - 2, 1)
+
+        if head in TIFF_SIGNATURES:
+            return read_tiff_block(f)
+
+    with Image.open(image_path) as img:
+        return img.info.get('exif')
+
+
+def read_tiff_block(f):
+    """The EXIF block of a TIFF-container file object: its first 64 KB, or None for other formats."""
+    f.seek(0)
+    if f.read(4) not in TIFF_SIGNATURES:
+        return None
+    f.seek(0)
+    return f.read(_TIFF_READ_LIMIT)
+
+
+def image_exif_block(img):
+    """The EXIF block of an opened (not yet decoded) PIL image, or None.
+
+    Pillow only fills ``info['exif']`` for formats that carry EXIF as a
+    separate segment (JPEG, PNG, WebP). A TIFF keeps those tags in its own
+    IFDs, so the head of the file is its EXIF block.
+    """
+    block = img.info.get('exif')
+    if block is None and img.format == 'TIFF' and getattr(img, 'fp', None) is not None:
+        position = img.fp.tell()
+        try:
+            block = read_tiff_block(img.fp)
+        finally:
+            img.fp.seek(position)
+    return block
+
+
+def format_value(value):
+    """Display form of a parsed value, close to exifread's str() of a tag."""
+    if isinstance(value, tuple):
+        parts = [f'{v:g}' if isinstance(v, float) else str(v) for v in value]
+        return parts[0] if len(parts) == 1 else '[' + ', '.join(parts) + ']'
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
@@ -0,0 +1,198 @@
+import csv
+import logging
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# GeoNames dump columns (cities500.txt, allCountries.txt, ...: tab-separated, no header)
+_GEONAMES_NAME = 1
+_GEONAMES_LAT = 4
+_GEONAMES_LON = 5
+_GEONAMES_COUNTRY = 8
+
+# ✅ Loaded gazetteer (lazy, once per process)
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+class Gazetteer:
+    """Nearest-place lookup over a local place list, using a lat/lon grid backed by NumPy arrays.
+
+    Places are sorted by grid cell so each cell is a contiguous slice found
+    with ``searchsorted``. A query scans rings of cells outward from the
+    query point until the nearest any ring could still be is farther than
+    the best place found (or than ``max_km``).
+    """
+
+    def __init__(self, names, countries, lats, lons, cell_deg=0.5):
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180.0 / cell_deg))
+        self.n_cols = int(np.ceil(360.0 / cell_deg))
+
+        cells = self._cell_ids(np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64))
+        order = np.argsort(cells, kind='stable')
+
+        self.cells = cells[order]
+        self.lats = np.asarray(lats, dtype=np.float64)[order]
+        self.lons = np.asarray(lons, dtype=np.float64)[order]
+        # Names stay a plain list: a fixed-width NumPy string array would pad
+        # every entry to the longest place name.
+        self.names = [names[i] for i in order.tolist()]
+        self.countries = np.asarray(countries, dtype='U3')[order]
+
+    def __len__(self):
+        return len(self.cells)
+
+    @classmethod
+    def from_geonames(cls, path, **kwargs):
+        """Load a GeoNames-style dump, using a compiled ``.npz`` next to it when it is up to date."""
+        compiled = path + '.npz'
+        if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+            data = np.load(compiled)
+            names = data['names'].tobytes().decode('utf-8').split('\x00')
+            return cls(names, data['countries'], data['lats'], data['lons'], **kwargs)
+
+        names, countries, lats, lons = [], [], [], []
+        with open(path, encoding='utf-8', newline='') as f:
+            for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+                if len(row) <= _GEONAMES_COUNTRY:
+                    continue
+                try:
+                    lats.append(float(row[_GEONAMES_LAT]))
+                    lons.append(float(row[_GEONAMES_LON]))
+                except ValueError:
+                    continue
+                names.append(row[_GEONAMES_NAME])
+                countries.append(row[_GEONAMES_COUNTRY])
+
+        countries = np.array(countries, dtype='U3')
+        lats, lons = np.array(lats), np.array(lons)
+        try:
+            with open(compiled, 'wb') as f:
+                names_blob = np.frombuffer('\x00'.join(names).encode('utf-8'), dtype=np.uint8)
+                np.savez(f, names=names_blob, countries=countries, lats=lats, lons=lons)
+        except OSError:
+            pass  # read-only location: just rebuild next time
+        return cls(names, countries, lats, lons, **kwargs)
+
+    def _cell_ids(self, lats, lons):
+        rows = np.clip(((lats + 90.0) // self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+        cols = ((lons + 180.0) // self.cell_deg).astype(np.int64) % self.n_cols
+        return rows * self.n_cols + cols
+
+    def _ring_indices(self, row, col, radius):
+        """Indices of all places in the ring of cells at Chebyshev distance ``radius``."""
+        cells = set()
+        for r in range(row - radius, row + radius + 1):
+            if r < 0 or r >= self.n_rows:
+                continue
+            edge = abs(r - row) == radius
+            cols = range(col - radius, col + radius + 1) if edge else (col - radius, col + radius)
+            cells.update(r * self.n_cols + (c % self.n_cols) for c in cols)
+
+        cells = np.fromiter(cells, dtype=np.int64, count=len(cells))
+        starts = np.searchsorted(self.cells, cells)
+        ends = np.searchsorted(self.cells, cells + 1)
+        spans = [(s, e) for s, e in zip(starts.tolist(), ends.tolist()) if e > s]
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in spans])
+
+    def _haversine_km(self, lat, lon, idx):
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lat2, lon2 = np.radians(self.lats[idx]), np.radians(self.lons[idx])
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+    def _ring_min_km(self, lat, radius, within_km):
+        """Lower bound on the distance from a point at ``lat`` to places in the ring at ``radius``.
+
+        Only places within ``within_km`` matter, so the bound only considers
+        rows that close. A place in the ring is at least ``radius - 1`` cells
+        away in rows or in columns; a column gap shrinks with the cosine of
+        latitude, so it is bounded using the most poleward of those rows.
+        """
+        if radius <= 1:
+            return 0.0
+        gap = np.radians(min((radius - 1) * self.cell_deg, 180.0))
+        row_km = EARTH_RADIUS_KM * gap
+        rows = min(radius, int(np.degrees(within_km / EARTH_RADIUS_KM) / self.cell_deg) + 1)
+        poleward = np.radians(min(abs(lat) + (rows + 1) * self.cell_deg, 90.0))
+        scale = np.sqrt(max(np.cos(np.radians(lat)) * np.cos(poleward), 0.0))
+        col_km = 2 * EARTH_RADIUS_KM * np.arcsin(min(scale * np.sin(gap / 2), 1.0))
+        return min(row_km, col_km)
+
+    def nearest(self, lat, lon, max_km=25.0):
+        """(name, country, distance_km) of the closest place within ``max_km``, or None."""
+        if not len(self):
+            return None
+
+        row = int(np.clip((lat + 90.0) // self.cell_deg, 0, self.n_rows - 1))
+        col = int(((lon + 180.0) // self.cell_deg) % self.n_cols)
+
+        reach = int(np.ceil(np.degrees(max_km / EARTH_RADIUS_KM) / self.cell_deg)) + 1
+        if abs(lat) + (reach + 1) * self.cell_deg >= 90.0:
+            # Every longitude is close to a pole, so rings would end up visiting
+            # every column: scan the band of rows within reach instead.
+            first = self.n_cols * max(row - reach, 0)
+            last = self.n_cols * (min(row + reach, self.n_rows - 1) + 1)
+            start, end = np.searchsorted(self.cells, [first, last]).tolist()
+            rings = [np.arange(start, end)]
+        else:
+            # Every cell has been visited by the last radius.
+            last_radius = max(self.n_rows, self.n_cols // 2 + 1)
+            rings = (self._ring_indices(row, col, radius) for radius in range(last_radius + 1))
+
+        best = None
+        best_km = max_km
+        for radius, idx in enumerate(rings):
+            if self._ring_min_km(lat, radius, best_km) > best_km:
+                break
+            if not idx.size:
+                continue
+            distances = self._haversine_km(lat, lon, idx)
+            i = int(np.argmin(distances))
+            if distances[i] <= best_km:
+                best, best_km = idx[i], float(distances[i])
+
+        if best is None:
+            return None
+        return self.names[best], str(self.countries[best]), best_km
+
+
+def get_gazetteer():
+    """The configured gazetteer (GAZETTEER_PATH), or None if it isn't available."""
+    global _gazetteer
+
+    if _gazetteer is not None:
+        return _gazetteer
+
+    path = getattr(settings, 'GAZETTEER_PATH', None)
+    if not path or not os.path.exists(path):
+        return None
+
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer.from_geonames(path)
+            logger.info("Gazetteer loaded: %d places.", len(_gazetteer))
+    return _gazetteer
+
+
+def offline_reverse_geocode(lat, lon):
+    """Nearest gazetteer place as "Name, CC", or None."""
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+
+    place = gazetteer.nearest(lat, lon, max_km=getattr(settings, 'GAZETTEER_MAX_DISTANCE_KM', 25.0))
+    if place is None:
+        return None
+    name, country, _ = place
+    return f"{name}, {country}" if country else name
@@ -0,0 +1,258 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from geopy.exc import GeocoderServiceError
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import Nominatim
+
+from .gazetteer import offline_reverse_geocode
+from .metrics import stage
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Check the table size once every this many inserts rather than on every write
+_EVICTION_CHECK_EVERY = 100
+
+# ✅ One geocoder client + rate limiter per process (lazy-created)
+_reverse = None
+_reverse_lock = threading.Lock()
+_inserts_since_check = 0
+
+NOMINATIM_REVERSE_URL = 'https://nominatim.openstreetmap.org/reverse'
+
+# Async lookups space themselves out like the sync RateLimiter: each one
+# reserves the next free slot, GEOCODE_MIN_DELAY_SECONDS after the last
+_next_slot = 0.0
+_slot_lock = threading.Lock()
+
+
+def geohash_encode(lat, lon, precision=7):
+    """Standard base32 geohash of (lat, lon)."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def _get_reverse():
+    """Shared, rate-limited Nominatim reverse() callable."""
+    global _reverse
+
+    with _reverse_lock:
+        if _reverse is None:
+            geolocator = Nominatim(user_agent=getattr(settings, 'GEOCODE_USER_AGENT', 'image_evidence_authenticator'))
+            _reverse = RateLimiter(
+                geolocator.reverse,
+                min_delay_seconds=getattr(settings, 'GEOCODE_MIN_DELAY_SECONDS', 1.0),
+                max_retries=0,
+                swallow_exceptions=False,
+            )
+    return _reverse
+
+
+def cache_key(lat, lon):
+    return geohash_encode(lat, lon, getattr(settings, 'GEOCODE_GEOHASH_PRECISION', 7))
+
+
+def _cached_address(entry):
+    """(hit, address) for a cache row (or None), ignoring expired entries."""
+    if entry is None:
+        return False, None
+
+    ttl = getattr(settings, 'GEOCODE_NEGATIVE_TTL' if entry.failed else 'GEOCODE_CACHE_TTL', 3600)
+    if timezone.now() - entry.created_at > timedelta(seconds=ttl):
+        return False, None
+    return True, entry.address
+
+
+def _lookup_cached(key):
+    """Return (hit, address) from the shared cache table, ignoring expired entries."""
+    from ..models import GeocodeCacheEntry
+
+    return _cached_address(GeocodeCacheEntry.objects.filter(geohash=key).first())
+
+
+async def _alookup_cached(key):
+    from ..models import GeocodeCacheEntry
+
+    return _cached_address(await GeocodeCacheEntry.objects.filter(geohash=key).afirst())
+
+
+def _eviction_due():
+    global _inserts_since_check
+
+    _inserts_since_check += 1
+    if _inserts_since_check >= _EVICTION_CHECK_EVERY:
+        _inserts_since_check = 0
+        return True
+    return False
+
+
+def _store(key, address, failed=False):
+    from ..models import GeocodeCacheEntry
+
+    GeocodeCacheEntry.objects.update_or_create(
+        geohash=key,
+        defaults={'address': address, 'failed': failed, 'created_at': timezone.now()},
+    )
+    if _eviction_due():
+        evict()
+
+
+async def _astore(key, address, failed=False):
+    from ..models import GeocodeCacheEntry
+
+    await GeocodeCacheEntry.objects.aupdate_or_create(
+        geohash=key,
+        defaults={'address': address, 'failed': failed, 'created_at': timezone.now()},
+    )
+    if _eviction_due():
+        await sync_to_async(evict)()
+
+
+def evict():
+    """Drop expired entries, then the oldest ones beyond GEOCODE_CACHE_MAX_ENTRIES."""
+    from ..models import GeocodeCacheEntry
+
+    now = timezone.now()
+    GeocodeCacheEntry.objects.filter(
+        failed=False, created_at__lt=now - timedelta(seconds=getattr(settings, 'GEOCODE_CACHE_TTL', 3600)),
+    ).delete()
+    GeocodeCacheEntry.objects.filter(
+        failed=True, created_at__lt=now - timedelta(seconds=getattr(settings, 'GEOCODE_NEGATIVE_TTL', 3600)),
+    ).delete()
+
+    max_entries = getattr(settings, 'GEOCODE_CACHE_MAX_ENTRIES', 100000)
+    cutoff = (GeocodeCacheEntry.objects.order_by('-created_at')
+              .values_list('created_at', flat=True)[max_entries:max_entries + 1]
+              .first())
+    if cutoff is not None:
+        GeocodeCacheEntry.objects.filter(created_at__lte=cutoff).delete()
+
+
+def reverse_geocode(lat, lon):
+    """Human-readable address for (lat, lon), or None.
+
+    GEOCODER_BACKEND picks the source: 'online' (Nominatim), 'offline' (the
+    local gazetteer) or 'offline_fallback' (gazetteer first, Nominatim when
+    it has no place nearby).
+    """
+    with stage('geocode'):
+        return lookup_address(lat, lon)
+
+
+def lookup_address(lat, lon):
+    """reverse_geocode without the stage timing, for callers that time it themselves."""
+    backend = getattr(settings, 'GEOCODER_BACKEND', 'online')
+
+    if backend in ('offline', 'offline_fallback'):
+        address = offline_reverse_geocode(lat, lon)
+        if address is not None or backend == 'offline':
+            return address
+
+    return online_reverse_geocode(lat, lon)
+
+
+def online_reverse_geocode(lat, lon):
+    """Nominatim reverse geocode, through the shared cache.
+
+    Lookups go through a database table shared by all workers, bucketed by
+    geohash cell. Failures are cached too (for GEOCODE_NEGATIVE_TTL).
+    """
+    key = cache_key(lat, lon)
+
+    hit, address = _lookup_cached(key)
+    if hit:
+        return address
+
+    try:
+        location = _get_reverse()((lat, lon), exactly_one=True)
+    except GeocoderServiceError:  # unavailable, timed out, rate limited, ...
+        _store(key, None, failed=True)
+        return None
+
+    address = location.address if location else None
+    _store(key, address)
+    return address
+
+
+async def alookup_address(lat, lon):
+    """lookup_address for async views: nothing blocks the event loop.
+
+    Nominatim is queried with an async HTTP client and the shared cache is
+    read and written through the async ORM. The offline gazetteer, which is
+    CPU work, runs in a thread.
+    """
+    backend = getattr(settings, 'GEOCODER_BACKEND', 'online')
+
+    if backend in ('offline', 'offline_fallback'):
+        address = await sync_to_async(offline_reverse_geocode, thread_sensitive=False)(lat, lon)
+        if address is not None or backend == 'offline':
+            return address
+
+    return await aonline_reverse_geocode(lat, lon)
+
+
+async def _await_slot():
+    global _next_slot
+
+    with _slot_lock:
+        now = time.monotonic()
+        slot = max(now, _next_slot)
+        _next_slot = slot + getattr(settings, 'GEOCODE_MIN_DELAY_SECONDS', 1.0)
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
+async def aonline_reverse_geocode(lat, lon):
+    """online_reverse_geocode over httpx, sharing the same cache table."""
+    key = cache_key(lat, lon)
+
+    hit, address = await _alookup_cached(key)
+    if hit:
+        return address
+
+    await _await_slot()
+    try:
+        async with httpx.AsyncClient(
+            headers={'User-Agent': getattr(settings, 'GEOCODE_USER_AGENT', 'image_evidence_authenticator')},
+            timeout=getattr(settings, 'GEOCODE_HTTP_TIMEOUT', 10.0),
+        ) as client:
+            response = await client.get(NOMINATIM_REVERSE_URL, params={'lat': lat, 'lon': lon, 'format': 'json'})
+            response.raise_for_status()
+            place = response.json()
+    except (httpx.HTTPError, ValueError):  # unavailable, timed out, rate limited, bad JSON, ...
+        await _astore(key, None, failed=True)
+        return None
+
+    # Nominatim answers {"error": ...}, without display_name, where there is nothing to name
+    address = place.get('display_name')
+    await _astore(key, address)
+    return address
@@ -1,10 +1,26 @@
 import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Read in 1 MB chunks so hashing never holds a whole evidence file in memory
+HASH_CHUNK_SIZE = 1024 * 1024
 
 def generate_sha256_hash(image_path):
     try:
+        sha256 = hashlib.sha256()
         with open(image_path, 'rb') as f:
-            image_data = f.read()
-            return hashlib.sha256(image_data).hexdigest()
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
     except Exception as e:
-        print(f"[Hash Error] {e}")
+        logger.error("Hashing %s failed: %s", image_path, e)
         return None
+
+def hash_uploaded_file(uploaded_file):
+    """SHA256 of a Django UploadedFile, read chunk by chunk, leaving it rewound."""
+    sha256 = hashlib.sha256()
+    for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+        sha256.update(chunk)
+    uploaded_file.seek(0)
+    return sha256.hexdigest()
@@ -0,0 +1,180 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+
+from .batching import batch_buckets
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    """Runs fixed-size batches of preprocessed (N, 224, 224, 3) float32 images through the model.
+
+    ``predict`` returns an (N, 1) array of sigmoid scores, for any N in
+    ``batch_sizes``. It is only ever called from the batcher's single
+    flusher thread.
+
+    ``fork_safe`` says whether a loaded backend keeps working in a forked
+    child, i.e. whether a gunicorn master may load it before forking workers.
+    """
+    name = None
+    fork_safe = False
+
+    def __init__(self, batch_size, model_path=None):
+        self.batch_size = batch_size
+        self.model_path = model_path
+        self.load()
+
+    @classmethod
+    def prepare(cls):
+        """Fork-safe groundwork for a process that is about to fork: imports and file downloads."""
+
+    @property
+    def batch_sizes(self):
+        """Batch sizes ``predict`` accepts; the batcher pads each batch to the smallest that fits."""
+        return (self.batch_size,)
+
+    def load(self):
+        raise NotImplementedError
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+
+class KerasBackend(InferenceBackend):
+    """The full TensorFlow/Keras model behind a tf.function compiled for a few fixed batch sizes."""
+    name = 'keras'
+
+    @property
+    def batch_sizes(self):
+        return batch_buckets(self.batch_size)
+
+    @classmethod
+    def prepare(cls):
+        # Importing TensorFlow is fork-safe; running an op is not: its thread
+        # pools don't survive fork(), so children of an initialised parent hang.
+        from .ai_models import download_model_if_needed
+        import tensorflow  # noqa: F401
+
+        download_model_if_needed()
+
+    def load(self):
+        from .ai_models import load_model_file, load_model_safely, make_predict_fn
+
+        model = load_model_file(self.model_path) if self.model_path else load_model_safely()
+        self._predict = make_predict_fn(model, self.batch_size)
+
+    def predict(self, batch):
+        return self._predict(batch)
+
+
+class TFLiteBackend(InferenceBackend):
+    """A converted .tflite model (float or INT8-quantized), run by the TFLite interpreter.
+
+    Uses a standalone interpreter package (``ai_edge_litert`` or the older
+    ``tflite_runtime``) when one is installed, so a deployment can drop full
+    TensorFlow; otherwise ``tf.lite``.
+    """
+    name = 'tflite'
+    fork_safe = True
+
+    def load(self):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+
+        path = self.model_path or getattr(settings, 'TFLITE_MODEL_PATH')
+        self.interpreter = Interpreter(model_path=path, num_threads=getattr(settings, 'INFERENCE_THREADS', None))
+        input_detail = self.interpreter.get_input_details()[0]
+        self.interpreter.resize_tensor_input(input_detail['index'], [self.batch_size, *input_detail['shape'][1:]])
+        self.interpreter.allocate_tensors()
+
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+
+    def predict(self, batch):
+        batch = _quantize(batch, self.input)
+        self.interpreter.set_tensor(self.input['index'], batch)
+        self.interpreter.invoke()
+        return _dequantize(self.interpreter.get_tensor(self.output['index']), self.output)
+
+
+class OnnxBackend(InferenceBackend):
+    """A converted .onnx model (float or INT8-quantized), run by ONNX Runtime on CPU."""
+    name = 'onnx'
+
+    @classmethod
+    def prepare(cls):
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            pass
+
+    def load(self):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("INFERENCE_BACKEND='onnx' needs the onnxruntime package.") from e
+
+        options = ort.SessionOptions()
+        threads = getattr(settings, 'INFERENCE_THREADS', None)
+        if threads:
+            options.intra_op_num_threads = threads
+        path = self.model_path or getattr(settings, 'ONNX_MODEL_PATH')
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    @property
+    def batch_sizes(self):
+        # export_model writes the batch dimension as dynamic
+        return batch_buckets(self.batch_size)
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def _quantize(batch, detail):
+    """Map a float batch onto an integer input tensor's scale/zero point (no-op for float inputs)."""
+    if detail['dtype'] == np.float32:
+        return batch
+    scale, zero_point = detail['quantization']
+    info = np.iinfo(detail['dtype'])
+    return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(detail['dtype'])
+
+
+def _dequantize(output, detail):
+    if detail['dtype'] == np.float32:
+        return output
+    scale, zero_point = detail['quantization']
+    return (output.astype(np.float32) - zero_point) * scale
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (KerasBackend, TFLiteBackend, OnnxBackend)
+}
+
+
+def get_backend_class(name=None):
+    """The backend class named by ``name`` or INFERENCE_BACKEND (default 'keras')."""
+    name = name or getattr(settings, 'INFERENCE_BACKEND', 'keras')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}; choose from {sorted(BACKENDS)}")
+    return BACKENDS[name]
+
+
+def get_backend(name=None, batch_size=None, model_path=None):
+    """Instantiate the inference backend named by INFERENCE_BACKEND (default 'keras')."""
+    backend_class = get_backend_class(name)
+    name = backend_class.name
+
+    batch_size = batch_size or getattr(settings, 'INFERENCE_BATCH_SIZE', 8)
+    backend = backend_class(batch_size, model_path=model_path)
+    logger.info("Inference backend: %s (%s)", name, model_path or 'configured model')
+    return backend
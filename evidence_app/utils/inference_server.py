@@ -0,0 +1,221 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .batching import InferenceBatcher
+from .preprocess import TARGET_SIZE
+
+# Wire format (both directions are length-prefixed; tensors travel as raw float32 bytes):
+#   request:  magic(4s) op(B) payload_len(I) | payload
+#   response: status(B) payload_len(I)       | payload
+MAGIC = b'EVI1'
+REQUEST_HEADER = struct.Struct('!4sBI')
+RESPONSE_HEADER = struct.Struct('!BI')
+SCORE = struct.Struct('!d')
+
+OP_PREDICT = 1
+OP_STATS = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+INPUT_SHAPE = TARGET_SIZE + (3,)
+INPUT_NBYTES = int(np.prod(INPUT_SHAPE)) * 4
+
+
+class InferenceServerError(RuntimeError):
+    """The inference server answered with an error, or couldn't be reached."""
+
+
+def _recv_into(sock, view):
+    """Fill ``view`` from ``sock``; False if the peer closed the connection first."""
+    received = 0
+    while received < len(view):
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            return False
+        received += n
+    return True
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    return bytes(buffer) if _recv_into(sock, memoryview(buffer)) else None
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """One client connection: a sequence of requests, answered in order."""
+
+    def handle(self):
+        sock = self.request
+        # Tensors are received straight into this array; no decoding or copying
+        # on the way in. It's safe to reuse: each request waits for its result.
+        tensor = np.empty(INPUT_SHAPE, dtype=np.float32)
+        tensor_view = memoryview(tensor).cast('B')
+
+        while True:
+            header = _recv_exact(sock, REQUEST_HEADER.size)
+            if header is None:
+                return
+            magic, op, length = REQUEST_HEADER.unpack(header)
+            if magic != MAGIC:
+                return
+
+            if op == OP_PREDICT:
+                if length != INPUT_NBYTES:
+                    self._reply(STATUS_ERROR, f"Expected {INPUT_NBYTES} tensor bytes, got {length}".encode())
+                    return
+                if not _recv_into(sock, tensor_view):
+                    return
+                try:
+                    score = self.server.batcher.predict(tensor)
+                except Exception as e:
+                    self._reply(STATUS_ERROR, str(e).encode())
+                    continue
+                self._reply(STATUS_OK, SCORE.pack(score))
+            elif op == OP_STATS:
+                self._reply(STATUS_OK, json.dumps(self.server.batcher.stats()).encode())
+            else:
+                self._reply(STATUS_ERROR, f"Unknown op {op}".encode())
+                return
+
+    def _reply(self, status, payload):
+        self.request.sendall(RESPONSE_HEADER.pack(status, len(payload)) + payload)
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve one model to every web worker over a Unix socket.
+
+    Each client connection gets a thread; all of them feed the same
+    InferenceBatcher, so requests from different worker processes are
+    batched together.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, backend, max_batch_size=8, max_wait_ms=10.0):
+        self.socket_path = socket_path
+        self.batcher = InferenceBatcher(
+            backend.predict,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            input_shape=INPUT_SHAPE,
+            batch_sizes=getattr(backend, 'batch_sizes', None),
+        )
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def _remove_stale_socket(path):
+    """Delete a socket file left by a dead server; refuse if a live server still answers on it."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise InferenceServerError(f"An inference server is already listening on {path}")
+    finally:
+        probe.close()
+
+
+class InferenceClient:
+    """Drop-in for InferenceBatcher (submit/predict/stats) that forwards to an InferenceServer.
+
+    Each thread keeps its own connection; tensors are sent as their raw
+    buffer, without pickling or copying. ``submit`` runs requests on a small
+    thread pool so several images can be in flight at once, which lets the
+    server batch them.
+    """
+
+    def __init__(self, socket_path, timeout=30.0, connections=8):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.connections = connections
+        self._local = threading.local()
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _check_fork(self):
+        # Sockets and pool threads are per process; a forked worker starts fresh.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._local = threading.local()
+                    self._executor = ThreadPoolExecutor(self.connections, thread_name_prefix='inference-client')
+                    self._pid = os.getpid()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise InferenceServerError(f"Inference server unavailable at {self.socket_path}: {e}") from e
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _request(self, op, payload=b''):
+        self._check_fork()
+        # One retry on a fresh connection covers a server restart between requests.
+        for attempt in (1, 2):
+            sock = self._connection()
+            try:
+                sock.sendall(REQUEST_HEADER.pack(MAGIC, op, len(payload)))
+                if len(payload):
+                    sock.sendall(payload)
+                header = _recv_exact(sock, RESPONSE_HEADER.size)
+                if header is None:
+                    raise ConnectionResetError("Inference server closed the connection")
+                status, length = RESPONSE_HEADER.unpack(header)
+                body = _recv_exact(sock, length) if length else b''
+                if body is None:
+                    raise ConnectionResetError("Inference server closed the connection")
+            except (ConnectionError, socket.timeout) as e:
+                self._drop_connection()
+                if attempt == 2 or isinstance(e, socket.timeout):
+                    raise InferenceServerError(f"Inference request failed: {e}") from e
+                continue
+
+            if status != STATUS_OK:
+                raise InferenceServerError(body.decode(errors='replace'))
+            return body
+
+    def predict(self, tensor, timeout=None):
+        """Score one preprocessed (H, W, C) or (1, H, W, C) float32 image."""
+        if tensor.ndim == 4:
+            tensor = tensor[0]
+        tensor = np.ascontiguousarray(tensor, dtype=np.float32)
+        if tensor.shape != INPUT_SHAPE:
+            raise ValueError(f"Expected a tensor of shape {INPUT_SHAPE}, got {tensor.shape}")
+        (score,) = SCORE.unpack(self._request(OP_PREDICT, memoryview(tensor).cast('B')))
+        return score
+
+    def submit(self, tensor):
+        self._check_fork()
+        return self._executor.submit(self.predict, tensor)
+
+    def stats(self):
+        return json.loads(self._request(OP_STATS))
@@ -0,0 +1,41 @@
+from PIL import Image
+
+from .exif import image_exif_block
+from .imagehash import hash_uploaded_file
+
+
+class IngestedUpload:
+    """One upload, read once: digest, lazily-decoded image and raw EXIF bytes.
+
+    ``sha256`` comes from HashingUploadHandler when the view installed it, so
+    the file isn't read again to hash it. Opening the image only parses its
+    header (which is where EXIF lives); pixels are decoded on first use by
+    the preprocessing stage.
+    """
+
+    def __init__(self, uploaded_file):
+        self.file = uploaded_file
+        self.name = uploaded_file.name
+        self.size = uploaded_file.size
+
+        self.sha256 = getattr(uploaded_file, 'sha256', None) or hash_uploaded_file(uploaded_file)
+
+        # Temp-file uploads get their own handle, so closing the image later
+        # doesn't close the UploadedFile that storage still has to move.
+        temporary_file_path = getattr(uploaded_file, 'temporary_file_path', None)
+        if temporary_file_path is not None:
+            self.image = Image.open(temporary_file_path())
+        else:
+            uploaded_file.seek(0)
+            self.image = Image.open(uploaded_file)
+        self.exif = image_exif_block(self.image)
+        self.closed = False
+
+    def close(self):
+        """Release the image; safe to call again from a ``finally``."""
+        if self.closed:
+            return
+        self.closed = True
+        if hasattr(self.file, 'temporary_file_path'):
+            self.image.close()
+        self.file.seek(0)
@@ -0,0 +1,173 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .metrics import VERIFICATIONS, stage
+
+logger = logging.getLogger(__name__)
+
+# How often run_worker looks for address lookups lost with their process
+ADDRESS_SWEEP_SECONDS = 60
+
+# ✅ In-memory broker: a process pool owned by this web worker (lazy-created).
+# Nothing re-submits its jobs if the web worker stops; a 'db' worker would
+# pick them up once their claim goes stale.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker_process():
+    """Child-process initializer: spawned workers start without Django configured."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'evidence_authenticator.settings')
+    import django
+    django.setup()
+
+
+def _get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'VERIFY_JOB_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker_process,
+            )
+    return _pool
+
+
+def enqueue_job(job):
+    """Hand a pending VerificationJob to the configured broker."""
+    broker = getattr(settings, 'VERIFY_JOB_BROKER', 'db')
+    if broker == 'local':
+        _get_pool().submit(process_job, str(job.pk))
+    # 'db': the row itself is the queue entry; run_verification_workers picks it up.
+
+
+def _stale_before():
+    """Claims older than this belong to a worker that died (or was redeployed) mid-job."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'VERIFY_JOB_STALE_SECONDS', 600))
+
+
+def _claimable(stale_before):
+    from ..models import Evidence
+    return (Q(status=Evidence.STATUS_PENDING)
+            | Q(status=Evidence.STATUS_PROCESSING, claimed_at__lt=stale_before))
+
+
+def claim_job(job_id):
+    """Atomically move a job to processing; False if someone else got it.
+
+    A job whose claim has gone stale can be claimed again, until it has
+    used VERIFY_JOB_MAX_ATTEMPTS attempts.
+    """
+    from ..models import Evidence, VerificationJob
+    claimed = (VerificationJob.objects
+               .filter(_claimable(_stale_before()), pk=job_id,
+                       attempts__lt=getattr(settings, 'VERIFY_JOB_MAX_ATTEMPTS', 3))
+               .update(status=Evidence.STATUS_PROCESSING, claimed_at=timezone.now(), attempts=F('attempts') + 1))
+    return claimed == 1
+
+
+def fail_abandoned_jobs():
+    """Give up on stale jobs that have used every attempt (each one took its worker down)."""
+    from ..models import Evidence, VerificationJob
+    abandoned = dict(VerificationJob.objects
+                     .filter(status=Evidence.STATUS_PROCESSING, claimed_at__lt=_stale_before(),
+                             attempts__gte=getattr(settings, 'VERIFY_JOB_MAX_ATTEMPTS', 3))
+                     .values_list('pk', 'evidence_id'))
+    if not abandoned:
+        return 0
+
+    failed = (VerificationJob.objects
+              .filter(pk__in=abandoned, status=Evidence.STATUS_PROCESSING)
+              .update(status=Evidence.STATUS_FAILED, error='The worker stopped while processing this job.'))
+    Evidence.objects.filter(pk__in=abandoned.values()).update(status=Evidence.STATUS_FAILED)
+    logger.warning("Gave up on %d verification job(s) after repeated worker failures", failed)
+    return failed
+
+
+def claim_next_job():
+    """Claim the oldest pending (or stale) job, or return None if the queue is empty."""
+    from ..models import VerificationJob
+    fail_abandoned_jobs()
+    candidates = (VerificationJob.objects
+                  .filter(_claimable(_stale_before()))
+                  .order_by('created_at')
+                  .values_list('pk', flat=True)[:10])
+    for job_id in candidates:
+        if claim_job(job_id):
+            return job_id
+    return None
+
+
+def process_job(job_id, claimed=False):
+    """Run the verify pipeline for one job and record the outcome on the job and its Evidence."""
+    from ..models import Evidence, VerificationJob
+    from .pipeline import (
+        RESULT_FIELDS, analyze_stored_evidence, apply_results, build_results, cacheable_analysis, enrich_later,
+        verdict_model_version,
+    )
+    from .result_cache import store_result
+
+    close_old_connections()
+    if not claimed and not claim_job(job_id):
+        return
+
+    job = VerificationJob.objects.select_related('evidence').get(pk=job_id)
+    evidence = job.evidence
+    Evidence.objects.filter(pk=evidence.pk).update(status=Evidence.STATUS_PROCESSING)
+
+    try:
+        timings = {}
+        label, confidence, metadata, hashes, summary = analyze_stored_evidence(evidence, timings, job.multicrop)
+        apply_results(evidence, label, confidence, metadata, hashes, timings, summary)
+        evidence.status = Evidence.STATUS_DONE if label != 'Error' else Evidence.STATUS_FAILED
+        with stage('db'):
+            evidence.save(update_fields=RESULT_FIELDS + ['status'])
+        VERIFICATIONS.inc(label.lower())
+
+        job.result = build_results(evidence, metadata, job.filename)
+        job.status = evidence.status
+        job.save(update_fields=['result', 'status', 'updated_at'])
+
+        if label != 'Error':
+            store_result(evidence.image_hash, cacheable_analysis(evidence), verdict_model_version(job.multicrop))
+        enrich_later(evidence)
+    except Exception as e:
+        logger.exception("Verification job %s failed", job_id)
+        Evidence.objects.filter(pk=evidence.pk).update(status=Evidence.STATUS_FAILED)
+        job.status = Evidence.STATUS_FAILED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+
+
+def run_worker(poll_interval=1.0):
+    """Worker loop for the 'db' broker: claim and process pending jobs forever.
+
+    Every ADDRESS_SWEEP_SECONDS it also re-schedules address lookups that a
+    stopped web worker left pending.
+    """
+    from .enrichment import resume_stale_address_resolution
+
+    logger.info("Verification worker %d started.", os.getpid())
+    next_sweep = 0.0
+    while True:
+        close_old_connections()
+        if time.monotonic() >= next_sweep:
+            resume_stale_address_resolution()
+            next_sweep = time.monotonic() + ADDRESS_SWEEP_SECONDS
+        job_id = claim_next_job()
+        if job_id is None:
+            time.sleep(poll_interval)
+            continue
+        process_job(job_id, claimed=True)
@@ -1,48 +1,66 @@
+import io
+
 import exifread
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderUnavailable, GeocoderTimedOut
-
-# Cache to avoid repeated requests for same coordinates
-GEOCODE_CACHE = {}
-
-def reverse_geocode(lat, lon):
-    # Create a unique key for these coordinates
-    cache_key = f"{lat:.6f},{lon:.6f}"
-    
-    # Check cache first
-    if cache_key in GEOCODE_CACHE:
-        return GEOCODE_CACHE[cache_key]
-    
-    try:
-        geolocator = Nominatim(user_agent="image_evidence_authenticator")
-        location = geolocator.reverse((lat, lon), exactly_one=True)
-        
-        if location:
-            address = location.address
-            # Save to cache
-            GEOCODE_CACHE[cache_key] = address
-            return address
-    except (GeocoderUnavailable, GeocoderTimedOut):
-        pass
-    
-    return None
-
-def verify_metadata(image_path):
+
+from .exif import format_value, parse_exif, read_exif_block
+from .geocoding import reverse_geocode
+
+def read_exif_tags(image_path=None, exif_bytes=None):
+    """Full exifread tag dump from a file path, or from the raw EXIF block PIL already read.
+
+    This parses every tag, MakerNotes and thumbnails included, so it is only
+    used when a caller explicitly asks for full details (see verify_metadata).
+
+    ``exif_bytes`` is the APP1 payload as found in ``Image.info['exif']``
+    ("Exif\\0\\0" followed by a TIFF structure), which exifread parses directly.
+    """
+    if exif_bytes is not None:
+        if exif_bytes.startswith(b'Exif\x00\x00'):
+            exif_bytes = exif_bytes[6:]
+        return exifread.process_file(io.BytesIO(exif_bytes))
+
+    if image_path is None:
+        return {}
+
     with open(image_path, 'rb') as f:
-        tags = exifread.process_file(f)
+        return exifread.process_file(f)
+
+def full_exif_details(image_path=None, exif_bytes=None):
+    """Every EXIF tag, stringified (the opt-in ``details=full`` dump)."""
+    return {k: str(v) for k, v in read_exif_tags(image_path, exif_bytes).items()}
+
+def verify_metadata(image_path=None, exif_bytes=None, resolve_address=True, full_details=False):
+    """EXIF analysis of an image.
 
-    if not tags:
+    Only the handful of tags the checks use are decoded, by walking the
+    IFDs directly (utils/exif.py). ``details`` lists those tags unless
+    ``full_details`` asks for the complete exifread dump.
+
+    With ``resolve_address=False`` the GPS position is returned
+    (``latitude``/``longitude``) but not reverse geocoded, so the caller can
+    resolve the address later, off the request path.
+    """
+    if exif_bytes is None and image_path is not None:
+        exif_bytes = read_exif_block(image_path)
+    tags = parse_exif(exif_bytes)
+
+    if tags is None:
         return {
             "status": "No metadata",
             "details": {},
             "device": None,
             "location": None,
+            "latitude": None,
+            "longitude": None,
             "address": None,  # New field
             "timestamp": None,
             "inconsistencies": []
         }
 
-    details = {k: str(v) for k, v in tags.items()}
+    if full_details:
+        details = full_exif_details(exif_bytes=exif_bytes)
+    else:
+        details = {k: format_value(v) for k, v in tags.items()}
     software = str(tags.get('Image Software', ''))
 
     # Device Info
@@ -77,31 +95,33 @@ def verify_metadata(image_path):
     def convert_to_degrees(value):
         # Handle different GPS formats
         try:
-            if hasattr(value, 'values'):
-                d = float(value.values[0].num) / float(value.values[0].den)
-                m = float(value.values[1].num) / float(value.values[1].den)
-                s = float(value.values[2].num) / float(value.values[2].den)
+            if isinstance(value, tuple):
+                d, m, s = value[0], value[1], value[2]
                 return d + (m / 60.0) + (s / 3600.0)
             else:
                 return float(value)
-        except (TypeError, AttributeError, IndexError):
+        except (TypeError, ValueError, IndexError):
             return None
 
     location = None
     address = None
+    lat = lon = None
     if gps_lat and gps_lon and gps_lat_ref and gps_lon_ref:
         lat = convert_to_degrees(gps_lat)
         lon = convert_to_degrees(gps_lon)
 
         if lat is not None and lon is not None:
-            if gps_lat_ref.values[0] != "N":
+            if str(gps_lat_ref)[:1] != "N":
                 lat = -lat
-            if gps_lon_ref.values[0] != "E":
+            if str(gps_lon_ref)[:1] != "E":
                 lon = -lon
 
             location = f"{lat:.6f}, {lon:.6f}"
             # Get human-readable address
-            address = reverse_geocode(lat, lon)
+            if resolve_address:
+                address = reverse_geocode(lat, lon)
+        else:
+            lat = lon = None
 
     # Inconsistencies (basic)
     inconsistencies = []
@@ -125,6 +145,8 @@ def verify_metadata(image_path):
         "details": details,
         "device": device,
         "location": location,
+        "latitude": lat,
+        "longitude": lon,
         "address": address,  # New field
         "timestamp": timestamp,
         "inconsistencies": inconsistencies
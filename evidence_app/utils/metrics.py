@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+
+# Latency buckets in seconds, 1 ms .. 30 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stages timed across the verify pipeline (Server-Timing names and histogram labels)
+STAGES = ('upload', 'hash', 'preprocess', 'inference', 'phash', 'exif', 'geocode', 'db')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _check(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._samples(series))
+        return lines
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self._check(labels)
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def _samples(self, series):
+        for labels, value in series:
+            yield f'{self.name}{_labels(zip(self.labelnames, labels))} {_number(value)}'
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram in the Prometheus sense, one series per label tuple."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        self._check(labels)
+        # bisect_left: a value equal to a bound belongs to that bucket (le is inclusive)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self, series):
+        for labels, (counts, total) in series:
+            pairs = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{_labels(pairs + [("le", _number(bound))])} {cumulative}'
+            yield f'{self.name}_sum{_labels(pairs)} {_number(total)}'
+            yield f'{self.name}_count{_labels(pairs)} {cumulative}'
+
+
+STAGE_SECONDS = Histogram(
+    'evidence_stage_duration_seconds',
+    'Time spent in each stage of the verification pipeline.',
+    ('stage',),
+)
+REQUEST_SECONDS = Histogram(
+    'evidence_request_duration_seconds',
+    'Verify request latency, from the start of the upload to the response.',
+    ('endpoint',),
+)
+VERIFICATIONS = Counter(
+    'evidence_verifications_total',
+    'Verified images by outcome (real, fake, error, cached, queued).',
+    ('outcome',),
+)
+STAGE_TIMEOUTS = Counter(
+    'evidence_stage_timeouts_total',
+    'Pipeline stages the verification stopped waiting for.',
+    ('stage',),
+)
+
+
+def record_stage(name, seconds, timings=None):
+    """Observe a stage measured elsewhere; also added to ``timings`` (ms) when given."""
+    STAGE_SECONDS.observe(seconds, name)
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000.0
+
+
+class stage:
+    """Context manager timing one pipeline stage into STAGE_SECONDS (and ``timings``, in ms)."""
+
+    def __init__(self, name, timings=None):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, time.perf_counter() - self.start, self.timings)
+        return False
+
+
+def server_timing(timings, total_ms=None):
+    """``Server-Timing`` header value for a dict of stage durations in ms."""
+    entries = [f'{name};dur={ms:.1f}' for name, ms in timings.items()]
+    if total_ms is not None:
+        entries.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(entries)
+
+
+def render(extra_gauges=None):
+    """Every registered metric in the Prometheus text format (this process only).
+
+    ``extra_gauges`` maps gauge names to (help, value) for values read at
+    scrape time.
+    """
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for name, (documentation, value) in (extra_gauges or {}).items():
+        lines.extend([f'# HELP {name} {documentation}', f'# TYPE {name} gauge', f'{name} {_number(value)}'])
+    return '\n'.join(lines) + '\n'
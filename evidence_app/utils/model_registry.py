@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+from .imagehash import generate_sha256_hash
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # not on POSIX: downloads just aren't serialised across processes
+    fcntl = None
+
+# Every Keras .h5 file starts with the HDF5 signature; a Drive quota/HTML page doesn't
+_HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+
+# ✅ Artifacts already checksummed by this process: {(path, size, mtime): sha256}
+_verified = {}
+_verified_lock = threading.Lock()
+
+
+class ModelArtifactError(RuntimeError):
+    """The model file couldn't be fetched, or doesn't match its expected checksum."""
+
+
+def current_model_version():
+    """Version string stored with every verdict and used to key cached results.
+
+    Converted/quantized backends score slightly differently from Keras, so
+    their results carry their own version.
+    """
+    version = getattr(settings, 'MODEL_VERSION', 'unversioned')
+    backend = getattr(settings, 'INFERENCE_BACKEND', 'keras')
+    return version if backend == 'keras' else f"{version}+{backend}"
+
+
+def cache_dir():
+    path = getattr(settings, 'MODEL_CACHE_DIR')
+    os.makedirs(os.path.join(path, 'sha256'), exist_ok=True)
+    return path
+
+
+def _artifact_path(digest):
+    return os.path.join(cache_dir(), 'sha256', f'{digest}.h5')
+
+
+def _manifest_path(version):
+    return os.path.join(cache_dir(), f'{version}.json')
+
+
+def _read_manifest(version):
+    try:
+        with open(_manifest_path(version)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(version, manifest):
+    """Write the version -> artifact manifest atomically (temp file + rename)."""
+    fd, tmp = tempfile.mkstemp(dir=cache_dir(), suffix='.json.part')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, _manifest_path(version))
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive inter-process lock, so concurrent workers don't all download at once."""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def checksum(path):
+    """SHA256 of ``path``, computed once per process per (size, mtime) of the file."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _verified_lock:
+        if key in _verified:
+            return _verified[key]
+
+    digest = generate_sha256_hash(path)
+    if digest is None:
+        raise ModelArtifactError(f"Could not read model file {path}")
+    with _verified_lock:
+        _verified[key] = digest
+    return digest
+
+
+def verify_artifact(path, expected_sha256=None):
+    """Check ``path`` against ``expected_sha256`` (or, without one, for an HDF5 header).
+
+    Returns the file's SHA256; raises ModelArtifactError on a mismatch.
+    """
+    if expected_sha256:
+        digest = checksum(path)
+        if digest != expected_sha256.lower():
+            raise ModelArtifactError(
+                f"Checksum mismatch for {path}: expected {expected_sha256}, got {digest}"
+            )
+        return digest
+
+    with open(path, 'rb') as f:
+        if f.read(len(_HDF5_SIGNATURE)) != _HDF5_SIGNATURE:
+            raise ModelArtifactError(f"{path} is not an HDF5 model file")
+    return checksum(path)
+
+
+def _cached_artifact(version, expected_sha256):
+    """Path of the verified cached artifact for ``version``, or None if it must be (re)fetched."""
+    manifest = _read_manifest(version)
+    if manifest is None:
+        return None
+
+    digest = manifest.get('sha256')
+    if expected_sha256 and digest != expected_sha256.lower():
+        return None  # MODEL_SHA256 moved on: fetch the new artifact
+    path = _artifact_path(digest)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        verify_artifact(path, digest)
+    except ModelArtifactError as e:
+        logger.warning("%s; discarding the cached copy.", e)
+        os.remove(path)
+        return None
+    return path
+
+
+def _download(url, dest):
+    import gdown
+
+    if gdown.download(url, dest, quiet=True) is None:
+        raise ModelArtifactError(f"Download from {url} failed")
+
+
+def fetch_model(version=None):
+    """Local path of the verified model artifact for ``version`` (default MODEL_VERSION).
+
+    With MODEL_LOCAL_PATH set, that file is used as-is (checked against
+    MODEL_SHA256 if given) and the network is never touched. Otherwise the
+    artifact comes from MODEL_CACHE_DIR, where files are stored under their
+    SHA256 and a small per-version manifest pins which one a version means.
+    Missing or corrupt artifacts are downloaded from MODEL_URL into a temp
+    file, verified, then renamed into place, under a file lock so only one
+    worker downloads while the others wait for its result.
+    """
+    expected = getattr(settings, 'MODEL_SHA256', None)
+
+    local_path = getattr(settings, 'MODEL_LOCAL_PATH', None)
+    if local_path:
+        if not os.path.exists(local_path):
+            raise ModelArtifactError(f"MODEL_LOCAL_PATH does not exist: {local_path}")
+        verify_artifact(local_path, expected)
+        return local_path
+
+    version = version or getattr(settings, 'MODEL_VERSION', 'unversioned')
+    path = _cached_artifact(version, expected)
+    if path is not None:
+        return path
+
+    with _file_lock(os.path.join(cache_dir(), f'{version}.lock')):
+        # Another worker may have fetched it while we waited for the lock
+        path = _cached_artifact(version, expected)
+        if path is not None:
+            return path
+
+        url = getattr(settings, 'MODEL_URL')
+        retries = getattr(settings, 'MODEL_DOWNLOAD_RETRIES', 3)
+        for attempt in range(1, retries + 1):
+            fd, tmp = tempfile.mkstemp(dir=cache_dir(), suffix='.h5.part')
+            os.close(fd)
+            try:
+                logger.info("Downloading model %s (attempt %d/%d)...", version, attempt, retries)
+                _download(url, tmp)
+                digest = verify_artifact(tmp, expected)
+
+                path = _artifact_path(digest)
+                os.replace(tmp, path)
+                _write_manifest(version, {
+                    'version': version,
+                    'sha256': digest,
+                    'size': os.path.getsize(path),
+                    'source': url,
+                    'fetched_at': timezone.now().isoformat(),
+                })
+                logger.info("Model %s cached as %s.", version, digest[:12])
+                return path
+            except Exception as e:
+                logger.warning("Model download failed: %s", e)
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                if attempt < retries:
+                    time.sleep(2 ** attempt)
+
+    raise ModelArtifactError(f"Could not fetch model {version} after {retries} attempt(s)")
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image
+
+from .preprocess import TARGET_SIZE, decode_for_model, pixels_to_model_input
+
+logger = logging.getLogger(__name__)
+
+TILE = TARGET_SIZE[0]
+# Neighbouring tiles overlap by half, so an artifact on a tile edge is whole in the next one
+STRIDE = TILE // 2
+
+# Appended to the model version of multi-crop verdicts, which score differently
+MULTICROP_VERSION_SUFFIX = '+multicrop'
+
+# ✅ Running estimate of model time per crop (ms), refined after every multi-crop run
+_ms_per_crop = None
+_estimate_lock = threading.Lock()
+
+
+class CropBatch:
+    """Every view of one image as a single float32 model batch.
+
+    Row 0 is the whole image squashed to model size (what standard mode
+    scores), rows 1..nx*ny are the tiles in row-major order, and the second
+    half of the batch repeats all of them mirrored left to right.
+    ``thumbnail`` is the squashed image (for perceptual hashing);
+    ``scale`` maps work-image pixels back to the original.
+    """
+
+    def __init__(self, batch, thumbnail, nx, ny, scale):
+        self.batch = batch
+        self.thumbnail = thumbnail
+        self.nx = nx
+        self.ny = ny
+        self.scale = scale
+
+
+def crop_budget():
+    """Crops (flips included) that fit MULTICROP_LATENCY_BUDGET_MS at the current cost per crop."""
+    per_crop = _ms_per_crop or getattr(settings, 'MULTICROP_MS_PER_CROP', 40.0)
+    budget = int(getattr(settings, 'MULTICROP_LATENCY_BUDGET_MS', 1000.0) // per_crop)
+    return max(2, min(budget, getattr(settings, 'MULTICROP_MAX_CROPS', 64)))
+
+
+def plan_grid(width, height, positions):
+    """(nx, ny) of the largest tile grid with at most ``positions`` tiles.
+
+    The grid keeps the image's aspect ratio and never needs upscaling: at
+    most as many tiles as fit the original resolution.
+    """
+    max_nx = 1 + max(0, width - TILE) // STRIDE
+    max_ny = 1 + max(0, height - TILE) // STRIDE
+
+    best = (1, 1)
+    for nx in range(1, max_nx + 1):
+        covered_height = (TILE + (nx - 1) * STRIDE) * height / width
+        ny = min(max_ny, max(1, 1 + round((covered_height - TILE) / STRIDE)))
+        if nx * ny > positions:
+            break
+        best = (nx, ny)
+    return best
+
+
+def prepare_crops(img, max_crops=None):
+    """Decode an opened PIL image once and cut it into a CropBatch of at most ``max_crops`` views.
+
+    The image is decoded at exactly the size the tile grid covers, so the
+    tiles are plain strided windows over one pixel array: a single
+    vectorized pass converts all of them into the batch, with no copy per
+    crop.
+    """
+    width, height = img.size
+    views_per_position = 2  # as is, and mirrored
+    positions = max(1, (max_crops or crop_budget()) // views_per_position - 1)  # less the whole-image view
+    nx, ny = plan_grid(width, height, positions)
+
+    work_size = (TILE + (nx - 1) * STRIDE, TILE + (ny - 1) * STRIDE)
+    work = decode_for_model(img, work_size)
+    thumbnail = work.resize(TARGET_SIZE, Image.BILINEAR)
+
+    pixels = np.asarray(work)
+    # (ny, nx, TILE, TILE, 3) view of the tiles; nothing is copied yet
+    windows = sliding_window_view(pixels, (TILE, TILE, 3))[::STRIDE, ::STRIDE, 0]
+
+    half = 1 + nx * ny
+    batch = np.empty((views_per_position * half, TILE, TILE, 3), dtype=np.float32)
+    pixels_to_model_input(np.asarray(thumbnail), out=batch[0])
+    pixels_to_model_input(windows, out=batch[1:half].reshape(ny, nx, TILE, TILE, 3))
+    batch[half:] = batch[:half, :, ::-1]
+
+    return CropBatch(batch, thumbnail, nx, ny, scale=width / work_size[0])
+
+
+def _update_estimate(ms_per_crop):
+    global _ms_per_crop
+
+    with _estimate_lock:
+        _ms_per_crop = ms_per_crop if _ms_per_crop is None else 0.8 * _ms_per_crop + 0.2 * ms_per_crop
+
+
+def score_crops(crops):
+    """Run a CropBatch through the model; returns ((label, confidence), summary).
+
+    All crops are queued on the shared batcher before any result is
+    awaited, so they go through the model as consecutive full batches. Each
+    view's score is averaged with its mirror image; the verdict aggregates
+    the whole-image and tile scores with MULTICROP_AGGREGATE ('mean', or
+    'max' to let a single suspicious tile decide). ``summary`` holds the
+    per-tile fake probabilities as a heatmap, in original-image pixels.
+    """
+    from .ai_models import get_batcher, verdict_from_score
+
+    start = time.perf_counter()
+    batcher = get_batcher()
+    futures = [batcher.submit(view) for view in crops.batch]
+    scores = np.array([float(future.result()) for future in futures])
+    _update_estimate((time.perf_counter() - start) * 1000.0 / len(scores))
+
+    scores = scores.reshape(2, -1).mean(axis=0)  # each view with its mirror
+    aggregate = getattr(settings, 'MULTICROP_AGGREGATE', 'mean')
+    score = float(scores.max() if aggregate == 'max' else scores.mean())
+
+    summary = {
+        'crops': len(crops.batch),
+        'aggregate': aggregate,
+        'whole_image_score': round(float(scores[0]), 4),
+        'grid': [crops.ny, crops.nx],
+        'tile_px': round(TILE * crops.scale),
+        'stride_px': round(STRIDE * crops.scale),
+        'heatmap': np.round(scores[1:].reshape(crops.ny, crops.nx), 4).tolist(),
+    }
+    return verdict_from_score(score), summary
+
+
+def check_tampering_multicrop(crops):
+    """score_crops as (label, confidence, summary), with ('Error', 0.0, None) on failure."""
+    try:
+        (label, confidence), summary = score_crops(crops)
+        return label, confidence, summary
+    except Exception as e:
+        logger.error("Multi-crop prediction failed: %s", e)
+        return 'Error', 0.0, None
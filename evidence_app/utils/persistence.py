@@ -0,0 +1,62 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _discard_files(evidence_items):
+    """Remove files already copied into storage for rows that were never written."""
+    for evidence in evidence_items:
+        try:
+            if evidence.image and evidence.image._committed:
+                evidence.image.delete(save=False)
+        except Exception:
+            logger.exception("Could not remove %s", evidence.image.name)
+
+
+def insert_evidence(evidence):
+    """Write a fully populated, unsaved Evidence with a single INSERT.
+
+    The digest, verdict and analysis must already be set: the model does no
+    I/O of its own in save(). The upload is copied into storage by the image
+    field just before the INSERT, and removed again if the row can't be written.
+    """
+    try:
+        with transaction.atomic():
+            evidence.save(force_insert=True)
+    except Exception:
+        _discard_files([evidence])
+        raise
+    return evidence
+
+
+
+async def ainsert_evidence(evidence):
+    """insert_evidence for async views, through the async ORM.
+
+    A single INSERT commits on its own in autocommit mode, so no
+    transaction block is needed around it.
+    """
+    try:
+        await evidence.asave(force_insert=True)
+    except Exception:
+        await sync_to_async(_discard_files)([evidence])
+        raise
+    return evidence
+
+def bulk_ingest(evidence_items, batch_size=None):
+    """Insert many unsaved Evidence rows in one transaction: all of them or none.
+
+    Returns the rows with their primary keys set.
+    """
+    from ..models import Evidence
+
+    evidence_items = list(evidence_items)
+    try:
+        with transaction.atomic():
+            return Evidence.objects.bulk_create(evidence_items, batch_size=batch_size)
+    except Exception:
+        _discard_files(evidence_items)
+        raise
@@ -0,0 +1,83 @@
+import numpy as np
+
+# ITU-R 601-2 luma weights, as used by PIL's convert('L')
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+_PHASH_SIZE = 32   # grey image the DCT runs on
+_PHASH_LOW = 8     # low-frequency block kept -> 64 bits
+_DHASH_SIZE = 8    # 8 rows x (8 + 1) columns -> 64 bits
+
+_area_matrices = {}
+_dct_matrix = None
+
+
+def _area_matrix(n_out, n_in):
+    """(n_out, n_in) matrix that area-averages a length-n_in axis down to n_out samples."""
+    key = (n_out, n_in)
+    if key not in _area_matrices:
+        edges = np.linspace(0.0, n_in, n_out + 1)
+        lo, hi = edges[:-1, None], edges[1:, None]
+        pixels = np.arange(n_in)[None, :]
+        overlap = np.clip(np.minimum(hi, pixels + 1) - np.maximum(lo, pixels), 0.0, None)
+        _area_matrices[key] = (overlap / overlap.sum(axis=1, keepdims=True)).astype(np.float32)
+    return _area_matrices[key]
+
+
+def _resize(grey, height, width):
+    """Area-average resize of a 2-D array with two small matrix products."""
+    return _area_matrix(height, grey.shape[0]) @ grey @ _area_matrix(width, grey.shape[1]).T
+
+
+def _dct():
+    """Orthonormal DCT-II matrix for _PHASH_SIZE points."""
+    global _dct_matrix
+    if _dct_matrix is None:
+        n = _PHASH_SIZE
+        k, i = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+        matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+        matrix[0] /= np.sqrt(2.0)
+        _dct_matrix = matrix.astype(np.float32)
+    return _dct_matrix
+
+
+def _pack(bits):
+    """Boolean array of 64 bits -> unsigned Python int, first bit most significant."""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def to_grey(image):
+    """RGB PIL image or (H, W, 3) uint8 array -> float32 luma array."""
+    return np.asarray(image, dtype=np.float32) @ _LUMA
+
+
+def phash(grey):
+    """64-bit DCT perceptual hash: which low-frequency coefficients are above their median."""
+    small = _resize(grey, _PHASH_SIZE, _PHASH_SIZE)
+    dct = _dct()
+    low = (dct @ small @ dct.T)[:_PHASH_LOW, :_PHASH_LOW].ravel()
+    return _pack(low > np.median(low[1:]))  # median without the DC term
+
+
+def dhash(grey):
+    """64-bit difference hash: is each sample brighter than its right-hand neighbour?"""
+    small = _resize(grey, _DHASH_SIZE, _DHASH_SIZE + 1)
+    return _pack(small[:, 1:] > small[:, :-1])
+
+
+def perceptual_hashes(image):
+    """(phash, dhash) of an image, typically the 224x224 RGB decode made for the model."""
+    grey = to_grey(image)
+    return phash(grey), dhash(grey)
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> signed, so it fits a BigIntegerField."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a, b):
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
@@ -0,0 +1,157 @@
+import threading
+from itertools import combinations
+
+from django.conf import settings
+
+from .phash import to_unsigned
+
+# ✅ Process-wide index over Evidence.phash (lazy, kept in sync incrementally)
+_index = None
+_index_lock = threading.Lock()
+_synced_pk = 0
+# Rows that were still pending/processing when scanned: re-checked by pk until they settle
+_unsettled = frozenset()
+
+# Rows fetched per query while catching the index up with the table
+_SYNC_CHUNK = 10000
+
+
+class MultiIndexHashTable:
+    """Multi-index hashing over 64-bit hashes for Hamming-radius search.
+
+    Each hash is split into ``chunks`` 16-bit substrings, each with its own
+    exact-match table. By the pigeonhole principle, a hash within distance
+    r of the query matches it within r // chunks bits on at least one
+    substring. So a query only probes the few substrings near each of its
+    own (137 per table for r = 10), and then checks the full distance on
+    that candidate set instead of on every stored hash.
+    """
+
+    def __init__(self, chunks=4):
+        self.chunks = chunks
+        self.chunk_bits = 64 // chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self.tables = [{} for _ in range(chunks)]
+        self.hashes = {}
+        self._probe_masks = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _substrings(self, value):
+        return [(value >> (i * self.chunk_bits)) & self.chunk_mask for i in range(self.chunks)]
+
+    def _masks(self, radius):
+        """Every chunk-width bit pattern with at most ``radius`` bits set."""
+        if radius not in self._probe_masks:
+            masks = [0]
+            for r in range(1, radius + 1):
+                for bits in combinations(range(self.chunk_bits), r):
+                    masks.append(sum(1 << b for b in bits))
+            self._probe_masks[radius] = masks
+        return self._probe_masks[radius]
+
+    def add(self, key, value):
+        value = to_unsigned(value)
+        if self.hashes.get(key) == value:
+            return
+        self.remove(key)
+        self.hashes[key] = value
+        for table, sub in zip(self.tables, self._substrings(value)):
+            table.setdefault(sub, set()).add(key)
+
+    def remove(self, key):
+        value = self.hashes.pop(key, None)
+        if value is None:
+            return
+        for table, sub in zip(self.tables, self._substrings(value)):
+            bucket = table.get(sub)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[sub]
+
+    def search(self, value, max_distance):
+        """[(key, distance)] of stored hashes within ``max_distance`` bits, nearest first."""
+        value = to_unsigned(value)
+        masks = self._masks(max_distance // self.chunks)
+
+        candidates = set()
+        for table, sub in zip(self.tables, self._substrings(value)):
+            for mask in masks:
+                bucket = table.get(sub ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        matches = []
+        for key in candidates:
+            distance = (self.hashes[key] ^ value).bit_count()
+            if distance <= max_distance:
+                matches.append((key, distance))
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches
+
+
+def _sync(index):
+    """Add Evidence rows hashed since the last sync.
+
+    The cursor moves past every row it scans. Rows still pending/processing
+    at that point (async jobs) get their phash later, so they are remembered
+    and re-checked by pk until they settle. A row that settles without a
+    hash is left to the backfill_phash command.
+    """
+    global _synced_pk, _unsettled
+    from ..models import Evidence
+
+    unsettled_statuses = (Evidence.STATUS_PENDING, Evidence.STATUS_PROCESSING)
+    unsettled = set()
+
+    def add(rows):
+        for pk, value, status in rows:
+            if value is not None:
+                index.add(pk, value)
+            elif status in unsettled_statuses:
+                unsettled.add(pk)
+
+    if _unsettled:
+        add(Evidence.objects.filter(pk__in=_unsettled).values_list('pk', 'phash', 'status'))
+
+    while True:
+        rows = list(Evidence.objects
+                    .filter(pk__gt=_synced_pk)
+                    .order_by('pk')
+                    .values_list('pk', 'phash', 'status')[:_SYNC_CHUNK])
+        add(rows)
+        _unsettled = frozenset(unsettled)
+        if rows:
+            _synced_pk = rows[-1][0]
+        if len(rows) < _SYNC_CHUNK:
+            break
+
+
+def get_index():
+    """The process-wide phash index, caught up with the Evidence table.
+
+    Every process (each gunicorn worker, each job worker) builds its own copy
+    from the table on first use and then only adds new rows, so hashes that
+    backfill_phash writes for old rows show up after a restart. Deleted rows
+    are never pruned, and rows of every owner are indexed, so the table stays the
+    source of truth: callers re-read matches from it (see
+    ``NearDuplicateMixin.similar_response``) and drop the ones that are gone
+    or not theirs.
+    """
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = MultiIndexHashTable()
+        _sync(_index)
+        return _index
+
+
+def find_similar(phash_value, max_distance=None, exclude=None):
+    """[(evidence_id, distance)] of stored evidence within ``max_distance`` bits of ``phash_value``."""
+    if max_distance is None:
+        max_distance = getattr(settings, 'PHASH_MAX_DISTANCE', 10)
+    matches = get_index().search(phash_value, max_distance)
+    return [(pk, distance) for pk, distance in matches if pk != exclude]
@@ -0,0 +1,293 @@
+import logging
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image
+
+from .ai_models import check_tampering
+from .dag import Stage, run_stages, run_stages_async
+from .enrichment import schedule_address_resolution
+from .exif import image_exif_block
+from .geocoding import alookup_address, lookup_address
+from .metadata import verify_metadata
+from .model_registry import current_model_version
+from .multicrop import MULTICROP_VERSION_SUFFIX, check_tampering_multicrop, prepare_crops
+from .phash import perceptual_hashes, to_signed, to_unsigned
+from .preprocess import decode_for_model
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the layout of Evidence.analysis changes
+ANALYSIS_VERSION = 2
+
+# Normalized verify_metadata keys kept in the stored analysis
+METADATA_KEYS = ('status', 'details', 'device', 'location', 'latitude', 'longitude',
+                 'address', 'timestamp', 'inconsistencies')
+
+# Parts of the analysis that hold for any upload of the same file: what the result cache keeps
+CACHED_ANALYSIS_KEYS = ('verdict', 'metadata', 'perceptual_hashes', 'multicrop')
+
+# Every column apply_results writes, for save(update_fields=...)
+RESULT_FIELDS = ['is_authentic', 'confidence', 'model_version', 'metadata_status', 'latitude',
+                 'longitude', 'address', 'address_pending', 'phash', 'dhash', 'analysis']
+
+# Result of a geocode stage that ran out of time
+_GEOCODE_TIMED_OUT = object()
+
+
+def readable_timestamp():
+    return timezone.now().strftime("%B %d, %Y at %I:%M %p")
+
+
+def multicrop_requested(flag=None):
+    """A ``?multicrop=`` query value as a bool, INFERENCE_MULTICROP when absent."""
+    if flag is None:
+        return getattr(settings, 'INFERENCE_MULTICROP', False)
+    return flag.lower() in ('1', 'true', 'yes')
+
+
+def verdict_model_version(multicrop=False):
+    """Model version a verdict is stored and cached under; multi-crop scores differently."""
+    version = current_model_version()
+    return version + MULTICROP_VERSION_SUFFIX if multicrop else version
+
+
+def address_deferred():
+    return getattr(settings, 'GEOCODE_DEFERRED', True)
+
+
+def analyze_metadata(exif_bytes):
+    """verify_metadata, leaving geocoding to the background stage when GEOCODE_DEFERRED is on."""
+    return verify_metadata(exif_bytes=exif_bytes, resolve_address=not address_deferred())
+
+
+def perceptual_hashes_or_none(decoded):
+    try:
+        return perceptual_hashes(decoded)
+    except Exception as e:
+        logger.error("Perceptual hashing failed: %s", e)
+        return None
+
+
+def geocode_metadata(metadata):
+    """Address for verify_metadata's GPS position (None without one), as the 'geocode' stage."""
+    if metadata['latitude'] is None:
+        return None
+    # Runs on a pool thread: the geocode cache lives in the database
+    close_old_connections()
+    try:
+        return lookup_address(metadata['latitude'], metadata['longitude'])
+    finally:
+        close_old_connections()
+
+
+async def ageocode_metadata(metadata):
+    """geocode_metadata for the async pipeline, on the event loop."""
+    if metadata['latitude'] is None:
+        return None
+    return await alookup_address(metadata['latitude'], metadata['longitude'])
+
+
+def analysis_stages(image, exif_bytes, geocode, multicrop=False):
+    """The verify stage graph; ``geocode`` is the geocode stage's function.
+
+    In multi-crop mode the preprocess stage builds a CropBatch (utils/multicrop.py)
+    and perceptual hashes come from its whole-image view.
+    """
+    inference_timeout = getattr(settings, 'PIPELINE_INFERENCE_TIMEOUT', 60.0)
+    if multicrop:
+        stages = [
+            Stage('preprocess', lambda: prepare_crops(image)),
+            Stage('inference', check_tampering_multicrop, after=('preprocess',),
+                  timeout=inference_timeout, fallback=('Error', 0.0, None)),
+            Stage('phash', lambda crops: perceptual_hashes_or_none(crops.thumbnail), after=('preprocess',)),
+        ]
+    else:
+        stages = [
+            Stage('preprocess', lambda: decode_for_model(image)),
+            Stage('inference', check_tampering, after=('preprocess',),
+                  timeout=inference_timeout, fallback=('Error', 0.0)),
+            Stage('phash', perceptual_hashes_or_none, after=('preprocess',)),
+        ]
+    stages.append(Stage('exif', lambda: verify_metadata(exif_bytes=exif_bytes, resolve_address=False)))
+    if not address_deferred():
+        stages.append(Stage('geocode', geocode, after=('exif',),
+                            timeout=getattr(settings, 'PIPELINE_GEOCODE_TIMEOUT', 2.0),
+                            fallback=_GEOCODE_TIMED_OUT))
+    return stages
+
+
+def analysis_from_stages(results):
+    """(label, confidence, metadata, hashes, multicrop summary or None) from the stage graph's results."""
+    label, confidence, *summary = results['inference']
+    logger.debug("AI label: %s | confidence: %s", label, confidence)
+    metadata = results['exif']
+    address = results.get('geocode')
+    if address is _GEOCODE_TIMED_OUT:
+        metadata['address_pending'] = True
+    elif address is not None:
+        metadata['address'] = address
+    logger.debug("Metadata: %s", metadata)
+    return label, confidence, metadata, results['phash'], summary[0] if summary else None
+
+
+def analyze_image(image, exif_bytes, timings=None, multicrop=False):
+    """Run the tamper model, perceptual hashing and metadata checks on an opened image.
+
+    Pixels are decoded once, at model input size; the model and the
+    perceptual hashes both work from that decode. The checks run as a stage
+    graph (utils/dag.py): inference and perceptual hashing run side by side
+    once the decode is done, while EXIF parsing (and the geocode, unless
+    GEOCODE_DEFERRED) runs alongside all of them.
+
+    Inference past PIPELINE_INFERENCE_TIMEOUT gives an Error verdict. A
+    geocode past PIPELINE_GEOCODE_TIMEOUT leaves the address to the
+    background enrichment, as a deferred one would.
+
+    With ``multicrop`` the model also scores overlapping tiles and mirror
+    images (utils/multicrop.py), and the fifth value returned is the
+    multi-crop summary with its heatmap (None otherwise).
+
+    Each stage is recorded in the stage histograms, and in ``timings`` (ms)
+    when a dict is passed.
+    """
+    results = run_stages(analysis_stages(image, exif_bytes, geocode_metadata, multicrop), timings)
+    return analysis_from_stages(results)
+
+
+async def aanalyze_image(image, exif_bytes, timings=None, multicrop=False):
+    """analyze_image for async views.
+
+    Decoding, inference, hashing and EXIF parsing run on the stage pool
+    while the caller awaits; the geocode is an async HTTP request on the
+    event loop, cancelled if it runs past PIPELINE_GEOCODE_TIMEOUT.
+    """
+    results = await run_stages_async(analysis_stages(image, exif_bytes, ageocode_metadata, multicrop), timings)
+    return analysis_from_stages(results)
+
+
+def analyze_stored_evidence(evidence, timings=None, multicrop=False):
+    """Same as analyze_image, for an Evidence whose file is already in storage."""
+    with Image.open(evidence.image.path) as img:
+        return analyze_image(img, image_exif_block(img), timings, multicrop)
+
+
+def build_analysis(label, confidence, metadata, hashes=None, timings=None, multicrop=None):
+    """JSON document of everything one verification found, stored as Evidence.analysis.
+
+    Reports and detail views read this instead of re-parsing EXIF or
+    re-geocoding from the image file.
+    """
+    metadata_doc = {key: metadata.get(key) for key in METADATA_KEYS}
+    metadata_doc['details'] = metadata_doc['details'] or {}
+    metadata_doc['inconsistencies'] = metadata_doc['inconsistencies'] or []
+
+    return {
+        'version': ANALYSIS_VERSION,
+        'analyzed_at': timezone.now().isoformat(),
+        'verdict': {
+            'label': label,
+            'is_authentic': label == 'Real',
+            'confidence': float(confidence),
+            'model_version': verdict_model_version(multicrop is not None) if label != 'Error' else None,
+        },
+        'metadata': metadata_doc,
+        'perceptual_hashes': {
+            'phash': f'{to_unsigned(hashes[0]):016x}',
+            'dhash': f'{to_unsigned(hashes[1]):016x}',
+        } if hashes is not None else None,
+        'timings_ms': {name: round(ms, 2) for name, ms in (timings or {}).items()},
+        'multicrop': multicrop,
+    }
+
+
+def apply_results(evidence, label, confidence, metadata, hashes=None, timings=None, multicrop=None):
+    """Copy the verdict, perceptual hashes and analysis document onto the Evidence row.
+
+    Does not save; every column it sets is listed in RESULT_FIELDS.
+    """
+    evidence.is_authentic = (label == 'Real')
+    evidence.confidence = float(confidence)
+    evidence.model_version = verdict_model_version(multicrop is not None) if label != 'Error' else ''
+    evidence.metadata_status = metadata['status']
+    evidence.latitude = metadata.get('latitude')
+    evidence.longitude = metadata.get('longitude')
+    evidence.address = metadata.get('address')
+    evidence.address_pending = (evidence.latitude is not None and evidence.address is None
+                                and (address_deferred() or metadata.get('address_pending', False)))
+    if hashes is not None:
+        evidence.phash, evidence.dhash = (to_signed(h) for h in hashes)
+    evidence.analysis = build_analysis(label, confidence, metadata, hashes, timings, multicrop)
+
+
+def cacheable_analysis(evidence):
+    """Result cache payload for a verified Evidence: no row id, file URL, owner or timings."""
+    return {key: evidence.analysis.get(key) for key in CACHED_ANALYSIS_KEYS}
+
+
+def analysis_from_cache(payload):
+    """A cached payload as (label, confidence, metadata, hashes, multicrop summary), like analyze_image.
+
+    The caller still writes its own Evidence row from these, through apply_results.
+    """
+    verdict = payload['verdict']
+    hashes = payload['perceptual_hashes']
+    if hashes is not None:
+        hashes = (int(hashes['phash'], 16), int(hashes['dhash'], 16))
+    return verdict['label'], verdict['confidence'], dict(payload['metadata']), hashes, payload['multicrop']
+
+
+def enrich_later(evidence):
+    """Queue background address resolution for a saved Evidence, if it needs one."""
+    if evidence.address_pending:
+        schedule_address_resolution(evidence)
+
+
+def build_results(evidence, metadata, filename):
+    """Response payload for a finished verification."""
+    return {
+        'id': evidence.id,
+        'image_url': evidence.image.url,
+        'is_authentic': evidence.is_authentic,
+        'confidence': evidence.confidence,
+        'metadata_status': metadata['status'],
+        'metadata_details': metadata.get('details', {}),
+        'metadata_device': metadata.get('device'),
+        'metadata_location': evidence.address,
+        'metadata_coordinates': metadata.get('location'),
+        'address_pending': evidence.address_pending,
+        'image_hash': evidence.image_hash,
+        'model_version': evidence.model_version,
+        'multicrop': evidence.analysis.get('multicrop'),
+        'filename': filename,
+        'timestamp': readable_timestamp(),
+    }
+
+
+def build_report(evidence):
+    """Verification report for a stored Evidence, built from its analysis document alone."""
+    analysis = evidence.analysis
+    metadata = analysis['metadata']
+    return {
+        'id': evidence.id,
+        'title': evidence.title,
+        'image_url': evidence.image.url if evidence.image else None,
+        'image_hash': evidence.image_hash,
+        'created_at': evidence.created_at.isoformat(),
+        'analyzed_at': analysis['analyzed_at'],
+        'verdict': analysis['verdict'],
+        'metadata': {
+            'status': metadata['status'],
+            'device': metadata['device'],
+            'captured_at': metadata['timestamp'],
+            'coordinates': metadata['location'],
+            'address': metadata['address'],
+            'address_pending': evidence.address_pending,
+            'inconsistencies': metadata['inconsistencies'],
+            'details': metadata['details'],
+        },
+        'perceptual_hashes': analysis['perceptual_hashes'],
+        'timings_ms': analysis['timings_ms'],
+        'multicrop': analysis.get('multicrop'),  # not in version 1 documents
+    }
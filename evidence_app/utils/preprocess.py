@@ -0,0 +1,51 @@
+import numpy as np
+from PIL import Image
+
+# ✅ ResNet50 input size
+TARGET_SIZE = (224, 224)
+
+# ImageNet channel means in BGR order, as subtracted by
+# tf.keras.applications.resnet50.preprocess_input ('caffe' mode)
+_CAFFE_MEAN_BGR = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+
+def decode_for_model(img, size=TARGET_SIZE):
+    """Decode an opened (not yet loaded) PIL image straight down to ``size`` RGB.
+
+    For JPEGs, ``draft`` asks libjpeg to scale by 1/2, 1/4 or 1/8 during
+    the DCT, so a 50 MP photo is never decoded at full resolution. Whatever
+    integer factor remains is removed with ``reduce`` (a cheap box filter)
+    before the final resize. The source file is only read, never written.
+    """
+    img.draft('RGB', size)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    factor = min(img.width // size[0], img.height // size[1])
+    if factor > 1:
+        img = img.reduce(factor)
+
+    return img.resize(size, Image.BILINEAR)
+
+
+def to_model_input(img):
+    """RGB PIL image -> float32 (H, W, 3) array, preprocessed like resnet50.preprocess_input."""
+    return pixels_to_model_input(np.asarray(img))
+
+
+def pixels_to_model_input(pixels, out=None):
+    """uint8 RGB pixels (..., H, W, 3) -> float32 BGR less the channel means, in one pass.
+
+    ``pixels`` may be any strided view (a stack of crop windows, say); with
+    ``out`` the result is written straight into an existing batch.
+    """
+    return np.subtract(pixels[..., ::-1], _CAFFE_MEAN_BGR, out=out, dtype=np.float32)  # RGB -> BGR
+
+
+def preprocess(source):
+    """File path or opened PIL image -> float32 (224, 224, 3) model input, decoded once in memory."""
+    if isinstance(source, Image.Image):
+        return to_model_input(decode_for_model(source))
+
+    with Image.open(source) as img:
+        return to_model_input(decode_for_model(img))
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .model_registry import current_model_version
+from .multicrop import MULTICROP_VERSION_SUFFIX
+
+
+class LRUCache:
+    """Small thread-safe, size-bounded LRU mapping."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ✅ In-process tier, in front of the VerificationResult table
+_memory = LRUCache(getattr(settings, 'RESULT_CACHE_MEMORY_SIZE', 1024))
+
+
+def is_enabled():
+    return getattr(settings, 'RESULT_CACHE_ENABLED', True)
+
+
+def get_cached_result(image_hash, model_version=None):
+    """Return the stored result payload for this digest under ``model_version`` (the current model), or None.
+
+    Payloads hold only what is true of the file itself (pipeline.cacheable_analysis):
+    a hit still gets its own Evidence row, never the first uploader's.
+    """
+    if not is_enabled() or not image_hash:
+        return None
+
+    model_version = model_version or current_model_version()
+    key = (image_hash, model_version)
+    payload = _memory.get(key)
+    if payload is not None:
+        return payload
+
+    from ..models import VerificationResult
+    payload = (VerificationResult.objects
+               .filter(image_hash=image_hash, model_version=model_version)
+               .values_list('payload', flat=True)
+               .first())
+    if payload is not None:
+        _memory.set(key, payload)
+    return payload
+
+
+def store_result(image_hash, payload, model_version=None):
+    """Record a verification result for this digest under ``model_version`` (the current model)."""
+    if not is_enabled() or not image_hash:
+        return
+
+    from ..models import VerificationResult
+    model_version = model_version or current_model_version()
+    VerificationResult.objects.update_or_create(
+        image_hash=image_hash,
+        model_version=model_version,
+        defaults={'payload': payload},
+    )
+    _memory.set((image_hash, model_version), payload)
+
+
+def invalidate(stale_only=True):
+    """Drop cached results.
+
+    With ``stale_only`` (the default) only rows produced by a model version
+    other than the current one are deleted; otherwise everything is.
+    Returns the number of persistent rows removed.
+    """
+    from ..models import VerificationResult
+    rows = VerificationResult.objects.all()
+    if stale_only:
+        rows = rows.exclude(model_version=current_model_version())
+    deleted, _ = rows.delete()
+    _memory.clear()
+    return deleted
+
+
+def update_result(image_hash, **metadata):
+    """Merge ``metadata`` into the stored payloads' metadata for this digest (e.g. a late-resolved address)."""
+    if not is_enabled() or not image_hash:
+        return
+
+    from ..models import VerificationResult
+    model_version = current_model_version()
+    rows = VerificationResult.objects.filter(
+        image_hash=image_hash, model_version__in=[model_version, model_version + MULTICROP_VERSION_SUFFIX],
+    )
+    for row in rows:
+        row.payload = dict(row.payload, metadata=dict(row.payload['metadata'], **metadata))
+        row.save(update_fields=['payload'])
+        _memory.set((image_hash, row.model_version), row.payload)
@@ -3,6 +3,13 @@ ASGI config for evidence_authenticator project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with uvicorn, e.g.
+`uvicorn evidence_authenticator.asgi:application --workers 2 --port $PORT`.
+POST /api/verify/asgi/ is the async-native verify endpoint: slow uploads and
+geocoding waits cost a coroutine rather than a worker thread. The gunicorn.conf.py
+preload hooks don't apply here; set INFERENCE_WARMUP=True to load the model in
+each worker at startup.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
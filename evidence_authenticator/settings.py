@@ -68,7 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware'
+    'evidence_app.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable for ASGI
     
 ]
 
@@ -170,4 +170,166 @@ SIMPLE_JWT = {
 CSRF_TRUSTED_ORIGINS = [
     'https://evidence-authen-frontend.vercel.app',
     'https://evidence-authen-backend-4.onrender.com'
-]
\ No newline at end of file
+]
+
+# Inference micro-batching
+# Concurrent verify requests share one model call; a batch is flushed when it
+# reaches INFERENCE_BATCH_SIZE images or after INFERENCE_BATCH_WAIT_MS.
+INFERENCE_BATCH_SIZE = int(os.environ.get('INFERENCE_BATCH_SIZE', 8))
+INFERENCE_BATCH_WAIT_MS = float(os.environ.get('INFERENCE_BATCH_WAIT_MS', 10))
+
+# Load and warm the model when the app starts (set in the web process only;
+# management commands like migrate don't need TensorFlow).
+INFERENCE_WARMUP = os.environ.get('INFERENCE_WARMUP', 'False') == 'True'
+
+# Shared inference server: with INFERENCE_SERVER_SOCKET set, web workers load
+# no model and send preprocessed tensors to `manage.py run_inference_server`
+# over this Unix socket; the server batches requests from all workers.
+INFERENCE_SERVER_SOCKET = os.environ.get('INFERENCE_SERVER_SOCKET') or None
+INFERENCE_CLIENT_TIMEOUT = float(os.environ.get('INFERENCE_CLIENT_TIMEOUT', 30))  # seconds
+INFERENCE_CLIENT_CONNECTIONS = int(os.environ.get('INFERENCE_CLIENT_CONNECTIONS', 8))
+
+# Preload inference in the gunicorn master before it forks workers (see
+# gunicorn.conf.py). Fork-safe backends (tflite) are loaded and warmed once and
+# shared copy-on-write; for keras the master imports TensorFlow and downloads
+# the model, and each worker loads and warms it before taking requests.
+# Takes over from INFERENCE_WARMUP, which would otherwise warm in the master.
+INFERENCE_PRELOAD = os.environ.get('INFERENCE_PRELOAD', 'False') == 'True'
+
+# Inference backend: 'keras' (the .h5 model through TensorFlow), 'tflite' or
+# 'onnx'. Converted models come from `manage.py export_model` (optionally
+# INT8-quantized). INFERENCE_THREADS caps the TFLite/ONNX Runtime thread pool.
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH', os.path.join(BASE_DIR, 'evidence_app', 'utils', 'deepfake_detection_resnet50.tflite'))
+ONNX_MODEL_PATH = os.environ.get('ONNX_MODEL_PATH', os.path.join(BASE_DIR, 'evidence_app', 'utils', 'deepfake_detection_resnet50.onnx'))
+INFERENCE_THREADS = int(os.environ['INFERENCE_THREADS']) if os.environ.get('INFERENCE_THREADS') else None
+
+# Multi-crop inference (utils/multicrop.py): besides the whole image, the model
+# scores overlapping tiles and their mirror images, and the response carries a
+# per-tile heatmap. On for every request with INFERENCE_MULTICROP, or per
+# request with ?multicrop=true. The crop count is sized to fit
+# MULTICROP_LATENCY_BUDGET_MS at the measured model time per crop (starting
+# from MULTICROP_MS_PER_CROP). MULTICROP_AGGREGATE is 'mean' or 'max'.
+INFERENCE_MULTICROP = os.environ.get('INFERENCE_MULTICROP', 'False') == 'True'
+MULTICROP_LATENCY_BUDGET_MS = float(os.environ.get('MULTICROP_LATENCY_BUDGET_MS', 1000))
+MULTICROP_MS_PER_CROP = float(os.environ.get('MULTICROP_MS_PER_CROP', 40))
+MULTICROP_MAX_CROPS = int(os.environ.get('MULTICROP_MAX_CROPS', 64))
+MULTICROP_AGGREGATE = os.environ.get('MULTICROP_AGGREGATE', 'mean')
+
+# Model artifacts
+# The .h5 is cached under MODEL_CACHE_DIR by content hash, with a manifest per
+# MODEL_VERSION. Set MODEL_SHA256 to pin the expected file (otherwise the first
+# good download is trusted); set MODEL_LOCAL_PATH to load a local file and never
+# touch the network (offline and test runs).
+MODEL_CACHE_DIR = os.environ.get('MODEL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'evidence_authenticator', 'models'))
+MODEL_URL = os.environ.get('MODEL_URL', 'https://drive.google.com/uc?id=1MaD9ZpejHMoULsSlD8ipMRTDkk8QAeyt')
+MODEL_SHA256 = os.environ.get('MODEL_SHA256') or None
+MODEL_LOCAL_PATH = os.environ.get('MODEL_LOCAL_PATH') or None
+MODEL_DOWNLOAD_RETRIES = int(os.environ.get('MODEL_DOWNLOAD_RETRIES', 3))
+
+# Verification result cache
+# Results are keyed by image SHA256 + MODEL_VERSION; bump MODEL_VERSION whenever
+# the model file changes so stale verdicts are never served.
+MODEL_VERSION = os.environ.get('MODEL_VERSION', 'resnet50-deepfake-v1')
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', 'True') == 'True'
+RESULT_CACHE_MEMORY_SIZE = int(os.environ.get('RESULT_CACHE_MEMORY_SIZE', 1024))
+
+# Asynchronous verification jobs
+# VERIFY_ASYNC makes /api/verify/ answer 202 + job id by default (clients can
+# also ask per request with ?async=true). VERIFY_JOB_BROKER is 'db' (jobs wait
+# in the VerificationJob table for `manage.py run_verification_workers`) or
+# 'local' (a pool of VERIFY_JOB_WORKERS processes inside each web worker, for
+# development: its jobs are lost if the web worker stops). A job claimed more
+# than VERIFY_JOB_STALE_SECONDS ago is taken to have lost its worker and is
+# claimed again, at most VERIFY_JOB_MAX_ATTEMPTS times in all.
+VERIFY_ASYNC = os.environ.get('VERIFY_ASYNC', 'False') == 'True'
+VERIFY_JOB_BROKER = os.environ.get('VERIFY_JOB_BROKER', 'db')
+VERIFY_JOB_WORKERS = int(os.environ.get('VERIFY_JOB_WORKERS', 2))
+VERIFY_JOB_STALE_SECONDS = int(os.environ.get('VERIFY_JOB_STALE_SECONDS', 600))
+VERIFY_JOB_MAX_ATTEMPTS = int(os.environ.get('VERIFY_JOB_MAX_ATTEMPTS', 3))
+
+# Batch verification (/api/verify/batch/)
+# Upper bound on images per request (files + zip members together). Zip
+# members are held to VERIFY_UPLOAD_MAX_BYTES each once decompressed, and all
+# of a request's archived images together to BATCH_ARCHIVE_MAX_BYTES.
+BATCH_VERIFY_MAX_ITEMS = int(os.environ.get('BATCH_VERIFY_MAX_ITEMS', 500))
+BATCH_ARCHIVE_MAX_BYTES = int(os.environ.get('BATCH_ARCHIVE_MAX_BYTES', 1024 * 1024 * 1024))
+
+# Evidence uploads (see evidence_app/uploadhandlers.py)
+# VERIFY_UPLOAD_MAX_BYTES caps each image, BATCH_UPLOAD_MAX_BYTES a whole batch
+# request (zip archives included); bigger bodies are refused with 413 before
+# they are read. Uploads are staged under MEDIA_ROOT so moving one into
+# storage is a rename on the same filesystem rather than a copy.
+VERIFY_UPLOAD_MAX_BYTES = int(os.environ.get('VERIFY_UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+BATCH_UPLOAD_MAX_BYTES = int(os.environ.get('BATCH_UPLOAD_MAX_BYTES', 500 * 1024 * 1024))
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR', os.path.join(MEDIA_ROOT, '.uploads'))
+
+# Reverse geocoding cache
+# Coordinates are bucketed by geohash (precision 7 is roughly a 150 m cell), so
+# nearby shots from one scene share a lookup. Failed lookups are cached for
+# GEOCODE_NEGATIVE_TTL so an outage doesn't hammer Nominatim.
+GEOCODE_USER_AGENT = os.environ.get('GEOCODE_USER_AGENT', 'image_evidence_authenticator')
+GEOCODE_GEOHASH_PRECISION = int(os.environ.get('GEOCODE_GEOHASH_PRECISION', 7))
+GEOCODE_CACHE_TTL = int(os.environ.get('GEOCODE_CACHE_TTL', 30 * 24 * 3600))  # seconds
+GEOCODE_NEGATIVE_TTL = int(os.environ.get('GEOCODE_NEGATIVE_TTL', 3600))  # seconds
+GEOCODE_CACHE_MAX_ENTRIES = int(os.environ.get('GEOCODE_CACHE_MAX_ENTRIES', 100000))
+GEOCODE_MIN_DELAY_SECONDS = float(os.environ.get('GEOCODE_MIN_DELAY_SECONDS', 1.0))
+
+# Reverse geocoding backend: 'online' (Nominatim), 'offline' (local gazetteer
+# only) or 'offline_fallback' (gazetteer, then Nominatim if nothing is nearby).
+# GAZETTEER_PATH points at a GeoNames dump such as cities500.txt; a compiled
+# .npz index is written next to it on first load.
+GEOCODER_BACKEND = os.environ.get('GEOCODER_BACKEND', 'online')
+GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH', os.path.join(BASE_DIR, 'data', 'cities500.txt'))
+GAZETTEER_MAX_DISTANCE_KM = float(os.environ.get('GAZETTEER_MAX_DISTANCE_KM', 25))
+
+# Resolve GPS addresses in the background instead of inside the verify request.
+# The response carries coordinates + address_pending; the address is written
+# back onto the Evidence row (GET /api/evidence/<id>/address/) when it resolves.
+# Lookups queued by a process that stopped before finishing them are picked up
+# again by the verification workers once GEOCODE_STALE_SECONDS have passed.
+GEOCODE_DEFERRED = os.environ.get('GEOCODE_DEFERRED', 'True') == 'True'
+GEOCODE_ENRICHMENT_THREADS = int(os.environ.get('GEOCODE_ENRICHMENT_THREADS', 2))
+GEOCODE_STALE_SECONDS = int(os.environ.get('GEOCODE_STALE_SECONDS', 600))
+
+# Verify pipeline stage graph (utils/dag.py): the independent checks of one
+# verification (inference, perceptual hashing, EXIF, inline geocoding) run
+# side by side on a pool of PIPELINE_THREADS threads shared by every request
+# in the process. A stage past its timeout stops holding the response: late
+# inference is reported as an Error verdict, and a late geocode leaves the
+# address to the background enrichment above.
+PIPELINE_THREADS = int(os.environ.get('PIPELINE_THREADS', 16))
+PIPELINE_INFERENCE_TIMEOUT = float(os.environ.get('PIPELINE_INFERENCE_TIMEOUT', 60))  # seconds
+PIPELINE_GEOCODE_TIMEOUT = float(os.environ.get('PIPELINE_GEOCODE_TIMEOUT', 2))  # seconds
+
+# Async geocoding (POST /api/verify/asgi/) calls Nominatim over httpx; this
+# bounds each HTTP request, on top of PIPELINE_GEOCODE_TIMEOUT for the stage.
+GEOCODE_HTTP_TIMEOUT = float(os.environ.get('GEOCODE_HTTP_TIMEOUT', 10))  # seconds
+
+# Near-duplicate search (/api/evidence/similar/): default Hamming radius, in
+# bits out of 64, for perceptual-hash matches. ~10 catches resized and
+# re-compressed copies without pulling in unrelated images.
+PHASH_MAX_DISTANCE = int(os.environ.get('PHASH_MAX_DISTANCE', 10))
+
+# Logging
+# Per-request pipeline details (verdicts, metadata, response payloads) are
+# logged at DEBUG; at the default INFO they are skipped without being formatted.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '[{levelname}] {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'evidence_app': {'handlers': ['console'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
+# Prometheus metrics (GET /metrics): stage and request latency histograms.
+# When METRICS_TOKEN is set, scrapers must send "Authorization: Bearer <token>".
+# Without a token, /metrics is only served with DEBUG on or to staff users.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
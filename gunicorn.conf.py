@@ -0,0 +1,31 @@
+"""gunicorn settings: `gunicorn evidence_authenticator.wsgi -c gunicorn.conf.py`.
+
+With INFERENCE_PRELOAD=True the Django app is imported once in the master
+and inference is prepared there before workers are forked (see
+evidence_app.utils.ai_models.preload_inference).
+"""
+import os
+
+preload_app = os.environ.get('INFERENCE_PRELOAD', 'False') == 'True'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def when_ready(server):
+    # Runs in the master after the (preloaded) app is imported, before any worker is forked.
+    if preload_app:
+        from evidence_app.utils.ai_models import preload_inference
+        try:
+            preload_inference()
+        except Exception:
+            server.log.exception("Inference preload failed; workers will load the model on demand.")
+
+
+def post_fork(server, worker):
+    # Runs in each worker before it accepts connections: load (if the master
+    # couldn't) and warm the model so no request pays for it.
+    if preload_app:
+        from evidence_app.utils.ai_models import warmup_model
+        try:
+            warmup_model()
+        except Exception:
+            worker.log.exception("Model warmup failed; it will load on the first request.")